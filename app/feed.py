@@ -0,0 +1,129 @@
+"""
+Live feed hub for WebSocket viewers of a running simulation.
+
+Every frame is JSON-encoded once and the same string is queued for all
+subscribers. Each subscriber has a small bounded queue drained by its own
+sender task, so one slow socket never blocks the others:
+
+- a subscriber whose queue overflows is marked lagging and its backlog is
+  dropped (coalesced) instead of growing without bound
+- lagging subscribers get one "resync" frame with the latest full state as
+  soon as their queue has room again; that frame is also encoded once per
+  publish and shared by every lagging subscriber
+- control frames (CONTROL_TYPES, e.g. the terminal "done") are never
+  skipped: lagging subscribers get their resync and then the control frame
+- a subscriber whose send fails unregisters itself and its task ends
+  normally
+"""
+from typing import Callable, Dict, Optional, Set
+import asyncio
+import json
+
+from fastapi import WebSocket
+
+
+# Frame types every subscriber must receive, lagging or not
+CONTROL_TYPES = ("done",)
+
+class Subscriber:
+    def __init__(self, websocket: WebSocket, max_queue: int,
+                 on_close: Optional[Callable[["Subscriber"], None]] = None):
+        """on_close: called with the subscriber once its socket fails (unregisters it)."""
+        self.websocket = websocket
+        self.on_close = on_close
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.lagging: bool = True  # new subscribers start with a full-state frame
+        self.dropped: int = 0
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        """Send queued frames until the socket goes away."""
+        try:
+            while True:
+                text = await self.queue.get()
+                await self.websocket.send_text(text)
+        except Exception as e:
+            print(f"[warn] feed subscriber dropped: {e}")
+        if self.on_close is not None:
+            self.on_close(self)
+
+
+class FeedHub:
+    def __init__(self, max_queue: int = 64):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscriber] = set()
+        self.state_fn: Optional[Callable[[], Dict]] = None  # latest full state, for resyncs
+
+        # Statistics for monitoring
+        self.frames_published: int = 0
+        self.frames_dropped: int = 0
+
+    async def connect(self, websocket: WebSocket) -> Subscriber:
+        await websocket.accept()
+        sub = Subscriber(websocket, self.max_queue, on_close=self.subscribers.discard)
+        sub.task = asyncio.create_task(sub.run())
+        self.subscribers.add(sub)
+        self._resync([sub])
+        return sub
+
+    def disconnect(self, sub: Subscriber):
+        self.subscribers.discard(sub)
+        if sub.task is not None:
+            sub.task.cancel()
+
+    def _resync(self, subs):
+        """Queue one shared full-state frame for lagging subscribers with room."""
+        ready = [s for s in subs if s.queue.empty()]
+        if not ready or self.state_fn is None:
+            return
+        text = json.dumps({"type": "resync", **self.state_fn()})
+        for sub in ready:
+            sub.queue.put_nowait(text)
+            sub.lagging = False
+
+    def _drop_backlog(self, sub: Subscriber, extra: int = 0):
+        """Coalesce: drop the backlog, catch up later with a resync."""
+        dropped = sub.queue.qsize() + extra
+        sub.dropped += dropped
+        self.frames_dropped += dropped
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.lagging = True
+
+    def publish(self, frame: Dict):
+        """Encode `frame` once and fan it out without awaiting any socket."""
+        self.frames_published += 1
+        text = json.dumps(frame)
+        if frame.get("type") in CONTROL_TYPES:
+            self._publish_control(text)
+            return
+        lagging = []
+        for sub in self.subscribers:
+            if sub.lagging:
+                lagging.append(sub)
+                continue
+            try:
+                sub.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                self._drop_backlog(sub, extra=1)
+        if lagging:
+            self._resync(lagging)
+
+    def _publish_control(self, text: str):
+        """Queue a control frame for every subscriber, after a resync for lagging ones."""
+        for sub in self.subscribers:
+            if not sub.lagging and sub.queue.full():
+                self._drop_backlog(sub)
+        self._resync([s for s in self.subscribers if s.lagging])
+        for sub in self.subscribers:
+            if sub.queue.full():
+                self._drop_backlog(sub)
+            sub.queue.put_nowait(text)
+
+    def get_stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "lagging": sum(1 for s in self.subscribers if s.lagging),
+            "frames_published": self.frames_published,
+            "frames_dropped": self.frames_dropped,
+        }
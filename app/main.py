@@ -1,29 +1,80 @@
-from typing import Optional
+from typing import List, Optional
+import asyncio
+import re
 from src.core.metrics import compute_metrics
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
 from src.coordinator.coordinator import Coordinator
+from src.data.catalog import DatasetCatalog
+from src.data.run_store import RunStore
+from app.feed import FeedHub
 
 # Initialize FastAPI app
 app = FastAPI(title="Agentic Trading System API")
 
+# Datasets under data/, looked up by symbol (created on first use, see get_catalog)
+catalog: Optional[DatasetCatalog] = None
+DEFAULT_SYMBOL = "AAPL"
+
+# Archive of every backtest run through the API, written in the background (see get_run_store)
+run_store: Optional[RunStore] = None
+
 # Global coordinator for now (simple design)
 coord: Optional[Coordinator] = None
 
+# Live feed for WebSocket viewers and the simulation currently streaming to it
+hub = FeedHub()
+sim_task: Optional[asyncio.Task] = None
+
 
 class BacktestRequest(BaseModel):
     start_index: int = 0
     end_index: Optional[int] = None
     starting_cash: float = 100_000.0
+    symbol: str = DEFAULT_SYMBOL
+
+
+class SimulationRequest(BacktestRequest):
+    step_delay: float = 0.05  # seconds between published steps
+
+
+def get_catalog() -> DatasetCatalog:
+    """The dataset catalog, created on first use so importing the app touches no files."""
+    global catalog
+    if catalog is None:
+        catalog = DatasetCatalog()
+    return catalog
+
+
+def get_run_store() -> RunStore:
+    """The run archive, created (with its writer) on first use."""
+    global run_store
+    if run_store is None:
+        run_store = RunStore()
+    return run_store
+
+
+def _dataset_path(symbol: str) -> str:
+    try:
+        return get_catalog().path(symbol)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+def _new_coordinator(symbol: str, starting_cash: float) -> Coordinator:
+    path = _dataset_path(symbol)
+    return Coordinator(path, starting_cash=starting_cash, data=get_catalog().load(symbol))
 
 
 @app.on_event("startup")
 def startup_event():
     global coord
-    # Initialize once with default data path
-    coord = Coordinator("data/raw/aapl_1y.csv", starting_cash=100_000.0)
+    get_catalog()
+    get_run_store()
+    # Initialize once with the default symbol
+    coord = _new_coordinator(DEFAULT_SYMBOL, starting_cash=100_000.0)
 
 
 @app.get("/health")
@@ -31,21 +82,145 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/datasets")
+def list_datasets():
+    return {"symbols": get_catalog().symbols()}
+
+
 @app.post("/backtest")
 def run_backtest(req: BacktestRequest):
     global coord
     if coord is None:
-        coord = Coordinator("data/raw/aapl_1y.csv", starting_cash=req.starting_cash)
+        coord = _new_coordinator(req.symbol, starting_cash=req.starting_cash)
 
-    if coord.engine.cash != req.starting_cash:
-        coord = Coordinator("data/raw/aapl_1y.csv", starting_cash=req.starting_cash)
+    if coord.engine.cash != req.starting_cash or coord.loader.filepath != _dataset_path(req.symbol):
+        coord = _new_coordinator(req.symbol, starting_cash=req.starting_cash)
 
     results = coord.run_backtest(start_index=req.start_index, end_index=req.end_index)
     metrics = compute_metrics(results)
+    run_id = get_run_store().save_backtest(
+        coord, results, symbol=req.symbol, start_index=req.start_index, end_index=req.end_index
+    )
 
     return {
+        "run_id": run_id,
         "steps": len(results),
         "results": results,
         "metrics": metrics,
     }
 
+
+def _parse_filter(text: str) -> tuple:
+    match = re.fullmatch(r"\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.+?)\s*", text)
+    if match is None:
+        raise HTTPException(status_code=400, detail=f"Bad filter {text!r}, expected e.g. long_window>30")
+    key, op, value = match.groups()
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return key, op, value
+
+
+@app.get("/runs")
+def list_runs(
+    symbol: Optional[str] = None,
+    where: List[str] = Query(default=[]),
+    order_by: str = "sharpe_ratio",
+    descending: bool = True,
+    limit: int = 20,
+):
+    """Archived runs, e.g. /runs?symbol=AAPL&where=long_window>30&order_by=sharpe_ratio&limit=20"""
+    try:
+        store = get_run_store()
+        runs = store.query(symbol, [_parse_filter(w) for w in where], order_by, descending, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"runs": runs, "archived": store.count(), "pending": store.pending()}
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str):
+    try:
+        run = get_run_store().load(run_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    run["equity"] = run["equity"].tolist()
+    run["fills"] = {c: v.tolist() for c, v in run["fills"].items()}
+    return run
+
+
+def _full_state(sim: Coordinator, last_snapshot: dict) -> dict:
+    """Latest full book + portfolio, sent to new or lagging viewers."""
+    book = sim.engine.order_book
+    return {
+        "depth": {
+            "seq": book.depth_seq,
+            "bids": [{"price": p, "quantity": q} for p, q in reversed(book.bids.items())],
+            "asks": [{"price": p, "quantity": q} for p, q in book.asks.items()],
+        },
+        "snapshot": last_snapshot,
+    }
+
+
+async def _stream_simulation(req: SimulationRequest):
+    """Run a fresh backtest step by step and publish one frame per step."""
+    sim = _new_coordinator(req.symbol, starting_cash=req.starting_cash)
+    end_index = len(sim.df) if req.end_index is None else req.end_index
+    book = sim.engine.order_book
+
+    depth_seq = 0
+    trade_count = 0
+    last_snapshot: dict = {}
+    hub.state_fn = lambda: _full_state(sim, last_snapshot)
+
+    for i in range(req.start_index, end_index):
+        try:
+            snapshot = sim.run_step(i)
+        except Exception as e:
+            print(f"[error] Exception at step {i}: {e}")
+            continue
+
+        depth = book.get_depth_updates(depth_seq)
+        depth_seq = depth["seq"]
+        fills = sim.engine.trades.to_dicts(trade_count)
+        trade_count = len(sim.engine.trades)
+        last_snapshot = {k: snapshot[k] for k in ("step", "price", "cash", "position", "portfolio_value")}
+
+        hub.publish({"type": "step", "depth": depth, "fills": fills, "snapshot": last_snapshot})
+        await asyncio.sleep(req.step_delay)
+
+    hub.publish({"type": "done", "snapshot": last_snapshot})
+
+
+@app.post("/simulate")
+async def start_simulation(req: SimulationRequest):
+    """Start streaming a simulation to /ws/feed viewers (one at a time)."""
+    global sim_task
+    if sim_task is not None and not sim_task.done():
+        raise HTTPException(status_code=409, detail="A simulation is already running")
+    sim_task = asyncio.create_task(_stream_simulation(req))
+    return {"status": "started", "subscribers": len(hub.subscribers)}
+
+
+@app.get("/feed/stats")
+def feed_stats():
+    return hub.get_stats()
+
+
+@app.websocket("/ws/feed")
+async def feed(websocket: WebSocket):
+    """
+    Live frames while a simulation runs:
+    {"type": "resync", "depth": {...full...}, "snapshot": {...}}
+    {"type": "step", "depth": get_depth_updates diff, "fills": [...], "snapshot": {...}}
+    {"type": "done"}
+    """
+    sub = await hub.connect(websocket)
+    try:
+        while True:
+            await websocket.receive_text()  # viewers only send keep-alives
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(sub)
@@ -0,0 +1,103 @@
+"""
+ML signal agent benchmarks on seeded synthetic bars (src/agents/ml_agent.py).
+
+    python -m benchmarks.bench_ml --bars 1000000 --lags 20
+
+- features: zero-copy lagged views of the feature series
+- train: ridge fit (fit_linear) rows/s
+- batch: LinearSignalModel.predict_views rows/s over all bars
+- live: MLSignalAgent.update (single-row inference) latency
+- backtest: Coordinator backtest steps/s with the saved model
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.agents.ml_agent import MLSignalAgent, LinearSignalModel, base_series, fit_linear, lagged_views
+from src.coordinator.coordinator import Coordinator
+from src.data.synthetic import SyntheticMarket, to_frame
+
+
+def bench_features(df, lags: int) -> dict:
+    t0 = time.perf_counter()
+    series = base_series(df)
+    views = lagged_views(series, lags)
+    elapsed = time.perf_counter() - t0
+    shared = all(np.shares_memory(views[g], series[g]) for g in views)
+    return {"bars": len(df), "seconds": elapsed, "zero_copy": shared}
+
+
+def bench_train(df, lags: int) -> dict:
+    t0 = time.perf_counter()
+    model = fit_linear(df, lags=lags)
+    elapsed = time.perf_counter() - t0
+    return {"rows": len(df), "seconds": elapsed, "rows_per_s": len(df) / elapsed}, model
+
+
+def bench_batch(df, model: LinearSignalModel) -> dict:
+    views = lagged_views(base_series(df), model.lags, model.groups)
+    t0 = time.perf_counter()
+    model.predict_views(views)
+    elapsed = time.perf_counter() - t0
+    return {"rows": len(df), "seconds": elapsed, "rows_per_s": len(df) / elapsed}
+
+
+def bench_live(df, model: LinearSignalModel, n_rows: int) -> dict:
+    agent = MLSignalAgent(None, model, live=True)
+    states = [
+        {"price": c, "high": h, "low": l, "volume": v, "index": i}
+        for i, (c, h, l, v) in enumerate(zip(
+            df["Close"].tolist()[:n_rows], df["High"].tolist()[:n_rows],
+            df["Low"].tolist()[:n_rows], df["Volume"].tolist()[:n_rows],
+        ))
+    ]
+    t0 = time.perf_counter()
+    for state in states:
+        agent.update(state)
+    elapsed = time.perf_counter() - t0
+    return {"rows": n_rows, "seconds": elapsed, "us_per_row": elapsed / n_rows * 1e6}
+
+
+def bench_backtest(market: SyntheticMarket, model: LinearSignalModel, n_bars: int, directory: str) -> dict:
+    path = market.write_csv(os.path.join(directory, "bars.csv"), n_bars)
+    model_path = os.path.join(directory, "model.npz")
+    model.save(model_path)
+    coord = Coordinator(path, ml_model=model_path)
+    t0 = time.perf_counter()
+    results = coord.run_backtest()
+    elapsed = time.perf_counter() - t0
+    return {"bars": n_bars, "seconds": elapsed, "steps_per_s": len(results) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--lags", type=int, default=20)
+    parser.add_argument("--live-rows", type=int, default=100_000)
+    parser.add_argument("--backtest-bars", type=int, default=20_000)
+    args = parser.parse_args()
+
+    market = SyntheticMarket(seed=args.seed, chunk_rows=args.bars)
+    df = to_frame(next(market.ohlcv_chunks(args.bars)))
+
+    def show(name, stats):
+        print(name, " ".join(
+            f"{k}={v}" if isinstance(v, bool) else f"{k}={v:,.2f}" if isinstance(v, float) else f"{k}={v:,}"
+            for k, v in stats.items()
+        ))
+
+    show("features", bench_features(df, args.lags))
+    stats, model = bench_train(df, args.lags)
+    show("train", stats)
+    show("batch", bench_batch(df, model))
+    show("live", bench_live(df, model, min(args.live_rows, args.bars)))
+    with tempfile.TemporaryDirectory() as tmp:
+        show("backtest", bench_backtest(SyntheticMarket(seed=args.seed), model, args.backtest_bars, tmp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Anomaly Detection Agent: Flags bars whose return or volume is far outside
+recent behaviour.
+
+Each bar is scored against the trailing `window` bars (excluding itself):
+- return score: |log return - mean| / std of recent log returns
+- volume score: (volume - mean) / std of recent volumes
+A bar is anomalous when either score exceeds `z_threshold`. State is a
+fixed-size ring of recent values, so it works the same in backtests and on
+a live feed.
+"""
+from typing import Dict, Optional
+import numpy as np
+
+
+class AnomalyDetectionAgent:
+    def __init__(self, window: int = 50, z_threshold: float = 4.0):
+        """
+        window: trailing bars used for the mean / std estimates.
+        z_threshold: score above which a bar is flagged.
+        """
+        self.window = window
+        self.z_threshold = z_threshold
+        self.returns = np.zeros(window)
+        self.volumes = np.zeros(window)
+        self.n = 0
+        self.last_price: Optional[float] = None
+
+    @staticmethod
+    def _z(history: np.ndarray, value: float) -> float:
+        std = history.std()
+        return 0.0 if std <= 0 else float((value - history.mean()) / std)
+
+    def score(self, market_state: Dict) -> Dict:
+        """
+        Score one bar and fold it into the history.
+
+        Output example:
+        {
+            "anomaly": bool,
+            "return_z": float,
+            "volume_z": float
+        }
+        """
+        price = market_state["price"]
+        volume = market_state.get("volume") or 0.0
+        ret = 0.0 if not self.last_price or price <= 0 else float(np.log(price / self.last_price))
+        self.last_price = price
+
+        return_z = volume_z = 0.0
+        if self.n >= self.window:
+            return_z = abs(self._z(self.returns, ret))
+            volume_z = self._z(self.volumes, volume)
+
+        slot = self.n % self.window
+        self.returns[slot] = ret
+        self.volumes[slot] = volume
+        self.n += 1
+
+        anomaly = return_z > self.z_threshold or volume_z > self.z_threshold
+        return {"anomaly": bool(anomaly), "return_z": return_z, "volume_z": volume_z}
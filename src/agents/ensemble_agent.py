@@ -0,0 +1,251 @@
+"""
+Ensemble Agent: many rule-based strategies combined by weighted voting.
+
+Members are small dicts, e.g.
+    {"kind": "sma_cross", "fast": 5, "slow": 20}
+    {"kind": "price_sma", "window": 5}
+    {"kind": "rsi", "window": 14, "lower": 30, "upper": 70}
+    {"kind": "breakout", "window": 20}
+    {"kind": "momentum", "window": 10}
+
+Every member signal (+1 long, -1 short, 0 flat) is computed once over the
+whole series into a (members x bars) int8 matrix. Indicators are computed
+once per distinct window and shared; members of one kind are evaluated
+together by fancy-indexing the stacked indicator rows, so the cost grows
+with the number of distinct windows, not with the number of members.
+
+The combined score per bar is the weighted mean of the member signals:
+- weighting="static": fixed weights (default equal)
+- weighting="performance": each member is weighted by its positive rolling
+  P&L over the last `perf_window` bars (signal at t-1 times return at t),
+  maintained incrementally by RollingPerformance; equal weights while no
+  member is in profit
+"""
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from src.core.indicators import rolling_mean, rolling_max, rolling_min, rsi
+from src.agents.market_agent import ACTIONS
+
+
+KINDS = ("sma_cross", "price_sma", "rsi", "breakout", "momentum")
+
+
+def strategy_grid(
+    sma_fast: Sequence[int] = (3, 5, 10, 15),
+    sma_slow: Sequence[int] = (20, 30, 50, 100),
+    rsi_windows: Sequence[int] = (7, 14, 21),
+    rsi_bands: Sequence[tuple] = ((30, 70), (20, 80)),
+    breakout_windows: Sequence[int] = (10, 20, 55),
+    momentum_windows: Sequence[int] = (5, 10, 20, 60),
+) -> List[Dict]:
+    """Cartesian grid of members over the given parameters."""
+    members = [{"kind": "sma_cross", "fast": f, "slow": s} for f in sma_fast for s in sma_slow if f < s]
+    members += [{"kind": "price_sma", "window": w} for w in sma_fast]
+    members += [{"kind": "rsi", "window": w, "lower": lo, "upper": hi} for w in rsi_windows for lo, hi in rsi_bands]
+    members += [{"kind": "breakout", "window": w} for w in breakout_windows]
+    members += [{"kind": "momentum", "window": w} for w in momentum_windows]
+    return members
+
+
+class _Features:
+    """Indicator rows per distinct window, computed on first use."""
+
+    def __init__(self, close: np.ndarray, high: np.ndarray, low: np.ndarray):
+        self.close = close
+        self.high = high
+        self.low = low
+        self.cache: Dict[tuple, np.ndarray] = {}
+
+    def stack(self, name: str, windows: np.ndarray) -> tuple:
+        """(rows, matrix): matrix[rows[i]] is indicator `name` for windows[i]."""
+        distinct, rows = np.unique(windows, return_inverse=True)
+        return rows, np.stack([self.get(name, int(w)) for w in distinct])
+
+    def get(self, name: str, window: int) -> np.ndarray:
+        key = (name, window)
+        if key not in self.cache:
+            self.cache[key] = self._compute(name, window)
+        return self.cache[key]
+
+    def _compute(self, name: str, window: int) -> np.ndarray:
+        n = len(self.close)
+        if name == "sma":
+            return rolling_mean(self.close, window)
+        if name == "rsi":
+            return rsi(self.close, window)
+        if name in ("prior_high", "prior_low"):
+            # Extreme of the `window` bars before this one
+            series = self.high if name == "prior_high" else self.low
+            extreme = rolling_max(series, window) if name == "prior_high" else rolling_min(series, window)
+            return np.concatenate([[np.nan], extreme[:-1]])
+        if name == "momentum":
+            out = np.full(n, np.nan)
+            out[window:] = self.close[window:] / self.close[:-window] - 1.0
+            return out
+        raise ValueError(f"Unknown feature {name!r}")
+
+
+def _sign(x: np.ndarray) -> np.ndarray:
+    """+1 / -1 / 0 as int8, with NaN -> 0."""
+    return (x > 0).astype(np.int8) - (x < 0).astype(np.int8)
+
+
+def signal_matrix(strategies: List[Dict], close: np.ndarray, high: Optional[np.ndarray] = None,
+                  low: Optional[np.ndarray] = None) -> np.ndarray:
+    """(len(strategies) x len(close)) int8 matrix of member signals."""
+    close = np.asarray(close, dtype=float)
+    feats = _Features(close, close if high is None else np.asarray(high, dtype=float),
+                      close if low is None else np.asarray(low, dtype=float))
+    out = np.zeros((len(strategies), len(close)), dtype=np.int8)
+    kinds = np.array([s["kind"] for s in strategies])
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown strategy kinds {sorted(unknown)}; expected {KINDS}")
+
+    def members(kind, *params):
+        idx = np.flatnonzero(kinds == kind)
+        return idx, [np.array([strategies[i][p] for i in idx]) for p in params]
+
+    idx, (fast, slow) = members("sma_cross", "fast", "slow")
+    if len(idx):
+        rows, sma = feats.stack("sma", np.concatenate([fast, slow]))
+        out[idx] = _sign(sma[rows[: len(idx)]] - sma[rows[len(idx):]])
+
+    idx, (window,) = members("price_sma", "window")
+    if len(idx):
+        rows, sma = feats.stack("sma", window)
+        out[idx] = _sign(close - sma[rows])
+
+    idx, (window, lower, upper) = members("rsi", "window", "lower", "upper")
+    if len(idx):
+        rows, value = feats.stack("rsi", window)
+        value = value[rows]
+        out[idx] = (value < lower[:, None]).astype(np.int8) - (value > upper[:, None]).astype(np.int8)
+
+    idx, (window,) = members("breakout", "window")
+    if len(idx):
+        rows, high_ = feats.stack("prior_high", window)
+        _, low_ = feats.stack("prior_low", window)
+        out[idx] = (close > high_[rows]).astype(np.int8) - (close < low_[rows]).astype(np.int8)
+
+    idx, (window,) = members("momentum", "window")
+    if len(idx):
+        rows, mom = feats.stack("momentum", window)
+        out[idx] = _sign(mom[rows])
+    return out
+
+
+class RollingPerformance:
+    """
+    Rolling-window P&L per member, updated one block of bars at a time
+    (a block can be a single bar). Keeps the last `window` P&L columns as
+    carry, so memory is members x (window + block) whatever the series length.
+    """
+
+    def __init__(self, n_members: int, window: int):
+        self.window = window
+        self.carry = np.zeros((n_members, window))
+        self.last_signal = np.zeros(n_members)
+
+    def update(self, signals: np.ndarray, returns: np.ndarray) -> np.ndarray:
+        """
+        signals: (members x bars) block; returns: per-bar returns of the block.
+        Returns the rolling P&L after each bar of the block.
+        """
+        signals = np.asarray(signals, dtype=float)
+        held = np.concatenate([self.last_signal[:, None], signals[:, :-1]], axis=1)
+        pnl = held * np.asarray(returns, dtype=float)
+        ext = np.concatenate([self.carry, pnl], axis=1)
+        csum = np.cumsum(ext, axis=1)
+        perf = csum[:, self.window:] - csum[:, : pnl.shape[1]]
+        self.carry = ext[:, -self.window:]
+        self.last_signal = signals[:, -1]
+        return perf
+
+
+class EnsembleAgent:
+    # analyze only reads the precomputed scores, so abandoning a call is safe (see AgentGraph offload)
+    stateless = True
+    # Scores are precomputed for every bar, so analyze_batch is always available
+    supports_batch = True
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        strategies: Optional[List[Dict]] = None,
+        weights: Optional[Sequence[float]] = None,
+        weighting: str = "static",
+        perf_window: int = 60,
+        threshold: float = 0.0,
+        block: int = 8192,
+    ):
+        """
+        data: full OHLCV DataFrame (indexed by datetime).
+        strategies: member specs (default strategy_grid()).
+        weights: static weight per member (default equal).
+        weighting: "static" or "performance".
+        perf_window: bars of P&L behind the performance weights.
+        threshold: |score| a bar needs for a buy / sell.
+        block: bars per performance-weighting block (bounds memory).
+        """
+        if weighting not in ("static", "performance"):
+            raise ValueError("weighting must be 'static' or 'performance'")
+        self.data = data
+        self.strategies = strategies if strategies is not None else strategy_grid()
+        self.weighting = weighting
+        self.perf_window = perf_window
+        self.threshold = threshold
+        m = len(self.strategies)
+        self.weights = np.ones(m) if weights is None else np.asarray(weights, dtype=float)
+        if len(self.weights) != m:
+            raise ValueError(f"{len(self.weights)} weights for {m} strategies")
+
+        close = data["Close"].to_numpy(dtype=float)
+        high = data["High"].to_numpy(dtype=float) if "High" in data.columns else None
+        low = data["Low"].to_numpy(dtype=float) if "Low" in data.columns else None
+        self.signals = signal_matrix(self.strategies, close, high, low)
+
+        if weighting == "static":
+            self.score = (self.weights @ self.signals) / np.abs(self.weights).sum()
+        else:
+            returns = np.concatenate([[0.0], close[1:] / close[:-1] - 1.0])
+            self.performance = RollingPerformance(m, perf_window)
+            self.score = np.empty(len(close))
+            for lo in range(0, len(close), block):
+                hi = min(len(close), lo + block)
+                self.score[lo:hi] = self._performance_score(self.signals[:, lo:hi], returns[lo:hi])
+
+    def _performance_score(self, signals: np.ndarray, returns: np.ndarray) -> np.ndarray:
+        perf = np.maximum(self.performance.update(signals, returns), 0.0)
+        total = perf.sum(axis=0)
+        weights = np.where(total > 0, perf / np.where(total > 0, total, 1.0), 1.0 / len(perf))
+        return (weights * signals).sum(axis=0)
+
+    def _proposal(self, score: float, price: float) -> Dict:
+        if score > self.threshold:
+            action = "buy"
+        elif score < -self.threshold:
+            action = "sell"
+        else:
+            action = "hold"
+        return {"action": action, "confidence": min(1.0, abs(float(score))), "target_price": price}
+
+    def analyze(self, market_state: Dict) -> Dict:
+        """Same output as MarketAnalysisAgent.analyze, from the combined score."""
+        return self._proposal(self.score[market_state["index"]], market_state["price"])
+
+    def analyze_batch(self, start: int, end: int, price: np.ndarray) -> Dict[str, np.ndarray]:
+        score = self.score[start:end]
+        action = (score > self.threshold).astype(np.int8) - (score < -self.threshold).astype(np.int8)
+        return {
+            "action": action,
+            "confidence": np.minimum(1.0, np.abs(score)),
+            "target_price": np.asarray(price, dtype=float),
+        }
+
+    def votes(self, index: int) -> Dict[str, int]:
+        """Number of members long / short / flat at one bar."""
+        col = self.signals[:, index]
+        return {ACTIONS[1]: int((col > 0).sum()), ACTIONS[-1]: int((col < 0).sum()), ACTIONS[0]: int((col == 0).sum())}
@@ -1,12 +1,87 @@
 """
 Execution Agent: Turns approved trade decisions into concrete orders.
+
+With an execution algorithm (twap / vwap / pov) the approved size becomes a
+parent order that is sliced into child orders over the following bars;
+build_orders must then be called on every step so due children are released,
+followed by on_sent() with the orders that actually went out.
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.order_scheduler import OrderScheduler
+from src.core.depth_index import DepthIndex
 
 
 class ExecutionAgent:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        algo: Optional[str] = None,
+        horizon: int = 5,
+        pov_rate: float = 0.1,
+        volume: Optional[np.ndarray] = None,
+        depth_indexes: Optional[List[DepthIndex]] = None,
+        max_impact_bps: Optional[float] = None,
+    ):
+        """
+        algo: None for a single limit order per decision, or "twap" / "vwap" / "pov".
+        horizon: number of bars a parent order is spread over.
+        pov_rate: participation rate for "pov".
+        volume: per-bar volume array (the `Volume` column); the vwap profile
+            for a parent starting at bar i is the volume of bars [i-horizon, i).
+        depth_indexes: cumulative-depth indexes of the venue books the
+            engine routes against; orders are tagged with their estimated
+            impact ("est_impact_bps").
+        max_impact_bps: cap each order at the resting depth within this many
+            bps of the current price, summed over the venues (needs
+            depth_indexes). With no depth inside the band the order is sent
+            as is; its limit price already bounds what it can take.
+        """
+        self.algo = algo
+        self.horizon = horizon
+        self.pov_rate = pov_rate
+        self.volume = volume
+        self.scheduler = OrderScheduler(max_horizon=max(1, horizon)) if algo else None
+        self.depth_indexes = depth_indexes
+        self.max_impact_bps = max_impact_bps
+
+    def _with_impact(self, order: Dict) -> Dict:
+        """Estimate impact from the depth indexes and apply the impact cap."""
+        if not self.depth_indexes:
+            return order
+        side, price = order["side"], order["price"]
+        taken = "sell" if side == "buy" else "buy"
+        # Split the order over the venues by their depth (inside the impact band when
+        # there is any) and weight the per-venue impacts the same way
+        depth = [idx.resting(taken) for idx in self.depth_indexes]
+        if self.max_impact_bps is not None:
+            within = [idx.depth_within_bps(taken, self.max_impact_bps, mid=price) for idx in self.depth_indexes]
+            available = sum(within)
+            if available > 0:
+                order = {**order, "quantity": min(order["quantity"], available)}
+                depth = within
+        total = sum(depth)
+        impact = None
+        if total > 0:
+            impact = 0.0
+            for idx, d in zip(self.depth_indexes, depth):
+                if d > 0:
+                    share = d / total
+                    impact += share * idx.impact_bps(side, order["quantity"] * share, mid=price)
+        order["est_impact_bps"] = impact
+        return order
+
+    def _volume_profile(self, index: int) -> Optional[np.ndarray]:
+        if self.volume is None or index < self.horizon:
+            return None
+        return self.volume[index - self.horizon:index]
+
+    def pending(self) -> Dict[str, float]:
+        """Approved quantity not yet sent, per side."""
+        if self.scheduler is None:
+            return {"buy": 0.0, "sell": 0.0}
+        return self.scheduler.pending()
 
     def build_orders(self, decision: Dict, market_state: Dict) -> List[Dict]:
         """
@@ -18,6 +93,9 @@ class ExecutionAgent:
           {"side": "buy" / "sell", "price": float, "quantity": float}
         ]
         """
+        if self.scheduler is not None:
+            return self._build_scheduled(decision, market_state)
+
         if not decision.get("approved", False):
             return []
 
@@ -33,8 +111,56 @@ class ExecutionAgent:
             # RiskAgent currently doesn't copy action; we’ll set it there in a moment
             return []
 
-        return [{
+        order = self._with_impact({
             "side": action,
             "price": float(price),
             "quantity": float(max_size),
-        }]
+        })
+        return [order]
+
+    def _build_scheduled(self, decision: Dict, market_state: Dict) -> List[Dict]:
+        """Submit a new parent (if approved) and release the children due this bar."""
+        index = market_state["index"]
+        action = decision.get("action", "hold")
+        max_size = decision.get("max_size", 0.0)
+
+        if decision.get("approved", False) and max_size > 0 and action in ("buy", "sell"):
+            self.scheduler.submit(
+                action,
+                float(max_size),
+                start=index,
+                algo=self.algo,
+                horizon=self.horizon,
+                volume_profile=self._volume_profile(index),
+                pov_rate=self.pov_rate,
+            )
+
+        due = self.scheduler.due(index, bar_volume=market_state.get("volume", 0.0))
+        price = float(market_state["price"])
+        return [
+            self._with_impact({"side": side, "price": price, "quantity": qty})
+            for side, qty in due.items()
+            if qty > 0
+        ]
+
+    def on_sent(self, orders: List[Dict]):
+        """Orders sent this bar (after caps); scheduled parents give up only this quantity."""
+        if self.scheduler is not None:
+            self.scheduler.confirm(sum(o["quantity"] for o in orders))
+
+    @property
+    def supports_batch(self) -> bool:
+        """Only single limit orders without impact capping are stateless per bar."""
+        return self.scheduler is None and not self.depth_indexes
+
+    def build_batch(self, decisions: Dict[str, np.ndarray], action: np.ndarray, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        build_orders() for a range of bars: one order per approved bar.
+        Returns {"side" (+1 buy / -1 sell, 0 = no order), "price", "quantity"} arrays.
+        """
+        send = np.asarray(decisions["approved"]) & (np.asarray(action) != 0)
+        return {
+            "side": np.where(send, action, 0).astype(np.int8),
+            "price": np.asarray(price, dtype=float),
+            "quantity": np.where(send, decisions["max_size"], 0.0),
+        }
@@ -5,25 +5,64 @@ Initial strategy: Simple Moving Average (SMA) crossover.
 - If price > SMA(window_short) and SMA(window_short) > SMA(window_long): BUY
 - If price < SMA(window_short) and SMA(window_short) < SMA(window_long): SELL
 - Else: HOLD
+
+With a MultiTimeframeAggregator a signal also has to agree with the higher
+timeframes: a BUY needs the price above the last completed close of every
+timeframe, a SELL below it; otherwise the agent holds.
 """
-from typing import Dict
+from typing import Dict, Optional
+import numpy as np
 import pandas as pd
 
+from src.core.indicators import rolling_mean
+from src.data.bars import MultiTimeframeAggregator
+
+
+# Batch signal codes
+ACTIONS = {1: "buy", -1: "sell", 0: "hold"}
+
 
 class MarketAnalysisAgent:
-    def __init__(self, data: pd.DataFrame, short_window: int = 5, long_window: int = 20):
+    # analyze only reads precomputed arrays, so abandoning a call is safe (see AgentGraph offload)
+    stateless = True
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        short_window: int = 5,
+        long_window: int = 20,
+        indicators: Optional[Dict[int, np.ndarray]] = None,
+        bars: Optional[MultiTimeframeAggregator] = None,
+    ):
         """
         data: full OHLCV DataFrame (indexed by datetime).
         short_window: short SMA length.
         long_window: long SMA length.
+        indicators: optional precomputed {window: SMA array} over the full
+            Close series (see sma_table), shared read-only between agents.
+        bars: higher-timeframe bars, kept up to date by the caller through
+            the current bar; used as a trend filter (see module docstring).
         """
         self.data = data
         self.short_window = short_window
         self.long_window = long_window
+        self.bars = bars
 
         # Precompute indicators
-        self.data["sma_short"] = self.data["Close"].rolling(window=self.short_window).mean()
-        self.data["sma_long"] = self.data["Close"].rolling(window=self.long_window).mean()
+        if indicators is not None:
+            self.sma_short = indicators[short_window]
+            self.sma_long = indicators[long_window]
+        else:
+            close = self.data["Close"].to_numpy(dtype=float)
+            self.sma_short = rolling_mean(close, self.short_window)
+            self.sma_long = rolling_mean(close, self.long_window)
+            self.data["sma_short"] = self.sma_short
+            self.data["sma_long"] = self.sma_long
+
+    @property
+    def supports_batch(self) -> bool:
+        """analyze_batch has no trend filter, so batch only without higher timeframes."""
+        return self.bars is None
 
     def analyze(self, market_state: Dict) -> Dict:
         """
@@ -41,9 +80,8 @@ class MarketAnalysisAgent:
         if idx < self.long_window:
             return {"action": "hold", "confidence": 0.0, "target_price": market_state["price"]}
 
-        row = self.data.iloc[idx]
-        sma_short = row["sma_short"]
-        sma_long = row["sma_long"]
+        sma_short = self.sma_short[idx]
+        sma_long = self.sma_long[idx]
         price = market_state["price"]
 
         if pd.isna(sma_short) or pd.isna(sma_long):
@@ -51,10 +89,43 @@ class MarketAnalysisAgent:
 
         # Simple crossover logic
         # Replace the crossover logic with this simpler version:
-        if price > sma_short:
+        if price > sma_short and self._trend_agrees("buy", price):
             return {"action": "buy", "confidence": 0.6, "target_price": price}
-        elif price < sma_short:
+        elif price < sma_short and self._trend_agrees("sell", price):
             return {"action": "sell", "confidence": 0.6, "target_price": price}
         else:
             return {"action": "hold", "confidence": 0.1, "target_price": price}
 
+    def _trend_agrees(self, action: str, price: float) -> bool:
+        """True when no higher timeframe's last completed close contradicts `action`."""
+        if self.bars is None:
+            return True
+        for name in self.bars.timeframes:
+            close = self.bars.close(name, 1)
+            if len(close) and (close[0] >= price if action == "buy" else close[0] <= price):
+                return False
+        return True
+
+    def analyze_batch(self, start: int, end: int, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        analyze() for every bar in [start, end) at once.
+        price: the bars' prices (Close), length end - start.
+
+        Returns {"action": int8 codes (see ACTIONS), "confidence", "target_price"}.
+        """
+        price = np.asarray(price, dtype=float)
+        sma_short = np.asarray(self.sma_short[start:end], dtype=float)
+        sma_long = np.asarray(self.sma_long[start:end], dtype=float)
+        action = (price > sma_short).astype(np.int8) - (price < sma_short).astype(np.int8)
+        confidence = np.where(action != 0, 0.6, 0.1)
+
+        warmup = (np.arange(start, end) < self.long_window) | np.isnan(sma_short) | np.isnan(sma_long)
+        action[warmup] = 0
+        confidence[warmup] = 0.0
+        return {"action": action, "confidence": confidence, "target_price": price}
+
+
+def sma_table(close: pd.Series, windows) -> Dict[int, np.ndarray]:
+    """SMA of `close` for every window, computed once and reused by many agents."""
+    values = close.to_numpy(dtype=float)
+    return {w: rolling_mean(values, w) for w in sorted(set(windows))}
@@ -0,0 +1,250 @@
+"""
+ML Signal Agent: a small CPU model predicting the next bars' log return.
+
+Features are the last `lags` values of a few per-bar series:
+- "ret":    log return close / previous close
+- "range":  (high - low) / close
+- "volume": change in log(1 + volume)
+
+For a backtest, each series is turned into a (bars x lags) matrix with
+sliding_window_view, which is a strided view of the series (no copy). The
+model is linear, so the prediction for every bar is one matrix-vector
+product per series; standardization is folded into the stored weights, so
+inference never materializes a scaled or concatenated feature matrix.
+
+In live mode the agent keeps the last `lags` values of each series in a
+small ring buffer and scores one row per bar; warm_up() fills it from the
+bars before the first decision, so live scores match batch scores.
+
+Models are fit with ridge regression (fit_linear) and stored as .npz files
+(LinearSignalModel.save / load).
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+GROUPS = ("ret", "range", "volume")
+
+
+def base_series(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Per-bar feature series (NaN where undefined, i.e. the first return)."""
+    close = data["Close"].to_numpy(dtype=float)
+    high = data["High"].to_numpy(dtype=float) if "High" in data.columns else close
+    low = data["Low"].to_numpy(dtype=float) if "Low" in data.columns else close
+    volume = data["Volume"].to_numpy(dtype=float) if "Volume" in data.columns else np.zeros(len(close))
+    log_volume = np.log1p(volume)
+    return {
+        "ret": np.concatenate([[np.nan], np.log(close[1:] / close[:-1])]),
+        "range": (high - low) / close,
+        "volume": np.concatenate([[np.nan], log_volume[1:] - log_volume[:-1]]),
+    }
+
+
+def lagged_views(series: Dict[str, np.ndarray], lags: int, groups=GROUPS) -> Dict[str, np.ndarray]:
+    """
+    {group: (bars - lags + 1) x lags view}; row j holds bars j .. j + lags - 1,
+    i.e. the features of bar j + lags - 1. Views share memory with `series`.
+    """
+    return {g: sliding_window_view(series[g], lags) for g in groups}
+
+
+@dataclass
+class LinearSignalModel:
+    lags: int
+    groups: Tuple[str, ...]
+    weights: np.ndarray  # (groups x lags), in raw feature units
+    bias: float
+    horizon: int = 1
+    target_std: float = 1.0
+
+    def predict_views(self, views: Dict[str, np.ndarray]) -> np.ndarray:
+        """Batch inference: one matrix-vector product per feature group."""
+        out = np.full(len(views[self.groups[0]]), self.bias)
+        for k, g in enumerate(self.groups):
+            out += views[g] @ self.weights[k]
+        return out
+
+    def predict_row(self, rows: np.ndarray) -> float:
+        """Single-row inference; rows is (groups x lags), oldest lag first."""
+        return float((rows * self.weights).sum() + self.bias)
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            lags=self.lags,
+            groups=np.array(self.groups),
+            weights=self.weights,
+            bias=self.bias,
+            horizon=self.horizon,
+            target_std=self.target_std,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LinearSignalModel":
+        with np.load(path) as f:
+            return cls(
+                lags=int(f["lags"]),
+                groups=tuple(str(g) for g in f["groups"]),
+                weights=f["weights"],
+                bias=float(f["bias"]),
+                horizon=int(f["horizon"]),
+                target_std=float(f["target_std"]),
+            )
+
+
+def fit_linear(
+    data: pd.DataFrame,
+    lags: int = 10,
+    horizon: int = 1,
+    ridge: float = 1.0,
+    groups=GROUPS,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> LinearSignalModel:
+    """
+    Ridge regression of the `horizon`-bar forward log return on the lagged
+    features, using bars [start, end) as training targets' anchor bars.
+    """
+    series = base_series(data)
+    views = lagged_views(series, lags, groups)
+    close = data["Close"].to_numpy(dtype=float)
+    n = len(close)
+    end = n if end is None else end
+
+    # Anchor bars t need a full window (t >= lags, first return is NaN) and a target
+    t = np.arange(max(start, lags), min(end, n - horizon))
+    if len(t) <= lags * len(groups):
+        raise ValueError(f"Not enough bars to fit {lags * len(groups)} features: {len(t)}")
+    X = np.concatenate([views[g][t - lags + 1] for g in groups], axis=1)  # training copy
+    y = np.log(close[t + horizon] / close[t])
+
+    mean, std = X.mean(axis=0), X.std(axis=0)
+    std[std == 0] = 1.0
+    Xs = (X - mean) / std
+    y_mean = y.mean()
+    coef = np.linalg.solve(Xs.T @ Xs + ridge * np.eye(Xs.shape[1]), Xs.T @ (y - y_mean))
+
+    raw = coef / std
+    return LinearSignalModel(
+        lags=lags,
+        groups=tuple(groups),
+        weights=raw.reshape(len(groups), lags),
+        bias=float(y_mean - mean @ raw),
+        horizon=horizon,
+        target_std=float(y.std()) or 1.0,
+    )
+
+
+class MLSignalAgent:
+    def __init__(
+        self,
+        data: Optional[pd.DataFrame],
+        model: LinearSignalModel,
+        threshold: float = 0.0,
+        live: bool = False,
+    ):
+        """
+        data: full OHLCV DataFrame; predictions for all bars are computed
+            up front in one batch. Not needed in live mode.
+        model: fitted / loaded LinearSignalModel.
+        threshold: |predicted log return| needed for a buy / sell.
+        live: score bars one at a time from analyze() calls instead.
+        """
+        self.data = data
+        self.model = model
+        self.threshold = threshold
+        self.live = live
+        self.predictions: Optional[np.ndarray] = None
+
+        if not live:
+            views = lagged_views(base_series(data), model.lags, model.groups)
+            self.predictions = np.full(len(data), np.nan)
+            self.predictions[model.lags - 1:] = model.predict_views(views)
+
+        # Live state: ring of the last `lags` feature rows
+        self.rows = np.zeros((len(model.groups), model.lags))
+        self.filled = 0
+        self.last: Optional[Dict] = None
+
+    def reset(self):
+        """Empty the live buffer."""
+        self.rows[:] = 0.0
+        self.filled = 0
+        self.last = None
+
+    def warm_up(self, get_state: Callable[[int], Dict], start: int):
+        """
+        Live mode: fold the `lags` bars before `start` into the buffer (skipping
+        bars it already holds), so the first decision at `start` scores the same
+        features as batch mode. get_state(i) returns the market state of bar i.
+        """
+        if not self.live:
+            return
+        lo = max(0, start - self.model.lags)
+        seen = self.last["index"] + 1 if self.last else 0
+        if not lo <= seen <= start:
+            self.reset()
+            seen = lo
+        for i in range(seen, start):
+            self.update(get_state(i))
+
+    def update(self, market_state: Dict) -> float:
+        """Fold one bar into the live buffer and score it (NaN until warmed up)."""
+        last = self.last
+        price = market_state["price"]
+        high = market_state.get("high") or price
+        low = market_state.get("low") or price
+        values = {
+            "ret": np.log(price / last["price"]) if last else np.nan,
+            "range": (high - low) / price,
+            "volume": np.log1p(market_state.get("volume") or 0.0) - np.log1p(last.get("volume") or 0.0) if last else np.nan,
+        }
+        self.last = market_state
+        self.rows[:, :-1] = self.rows[:, 1:]
+        self.rows[:, -1] = [values[g] for g in self.model.groups]
+        self.filled += 1
+        if self.filled < self.model.lags:
+            return np.nan
+        return self.model.predict_row(self.rows)
+
+    def _proposal(self, prediction: float, price: float) -> Dict:
+        if np.isnan(prediction):
+            return {"action": "hold", "confidence": 0.0, "target_price": price}
+        if prediction > self.threshold:
+            action = "buy"
+        elif prediction < -self.threshold:
+            action = "sell"
+        else:
+            action = "hold"
+        confidence = min(1.0, abs(prediction) / self.model.target_std)
+        return {"action": action, "confidence": confidence, "target_price": price}
+
+    def analyze(self, market_state: Dict) -> Dict:
+        """Same output as MarketAnalysisAgent.analyze, from the model's forecast."""
+        if self.live:
+            prediction = self.update(market_state)
+        else:
+            prediction = float(self.predictions[market_state["index"]])
+        return self._proposal(prediction, market_state["price"])
+
+    @property
+    def supports_batch(self) -> bool:
+        return not self.live
+
+    @property
+    def stateless(self) -> bool:
+        """Live scoring updates the feature buffer, so it must not be abandoned mid-call."""
+        return not self.live
+
+    def analyze_batch(self, start: int, end: int, price: np.ndarray) -> Dict[str, np.ndarray]:
+        prediction = self.predictions[start:end]
+        action = (prediction > self.threshold).astype(np.int8) - (prediction < -self.threshold).astype(np.int8)
+        confidence = np.minimum(1.0, np.abs(prediction) / self.model.target_std)
+        return {
+            "action": action,
+            "confidence": np.where(np.isnan(prediction), 0.0, confidence),
+            "target_price": np.asarray(price, dtype=float),
+        }
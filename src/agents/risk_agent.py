@@ -1,13 +1,81 @@
 """
 Risk Management Agent: Position sizing, stop-loss, exposure limits.
 """
-from typing import Dict
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from src.core.risk_engine import RiskEngine
+from src.core.limit_checker import LimitChecker
 
 
 class RiskManagementAgent:
-    def __init__(self, max_position: float = 1000, max_single_trade: float = 100):
+    def __init__(
+        self,
+        max_position: float = 1000,
+        max_single_trade: float = 100,
+        stop_loss_pct: Optional[float] = None,
+        take_profit_pct: Optional[float] = None,
+        risk_engine: Optional[RiskEngine] = None,
+        target_vol: Optional[float] = None,
+        max_var_pct: Optional[float] = None,
+        limit_checker: Optional[LimitChecker] = None,
+        strategy_id: int = 0,
+        symbol_id: int = 0,
+    ):
+        """
+        stop_loss_pct / take_profit_pct: distance of the exit levels from the
+        entry price as a fraction (0.03 = 3%). None disables that exit.
+        risk_engine: rolling volatility / VaR estimates fed by the coordinator.
+        target_vol: annualized volatility target for position sizing (0.15 = 15%).
+        max_var_pct: cap on one-bar parametric VaR as a fraction of portfolio value.
+        limit_checker: shared firm-wide limits checked under (strategy_id,
+            symbol_id). Approvals only take order rate tokens; exposure is
+            booked from fills reported through on_fill().
+        """
         self.max_position = max_position
         self.max_single_trade = max_single_trade
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.risk_engine = risk_engine
+        self.target_vol = target_vol
+        self.max_var_pct = max_var_pct
+        self.limit_checker = limit_checker
+        self.strategy_id = strategy_id
+        self.symbol_id = symbol_id
+
+    def exit_levels(self, action: str, entry_price: float) -> Dict:
+        """Stop-loss / take-profit prices for a new entry."""
+        sign = 1.0 if action == "buy" else -1.0
+        stop_loss = None
+        take_profit = None
+        if self.stop_loss_pct is not None:
+            stop_loss = entry_price * (1.0 - sign * self.stop_loss_pct)
+        if self.take_profit_pct is not None:
+            take_profit = entry_price * (1.0 + sign * self.take_profit_pct)
+        return {"stop_loss": stop_loss, "take_profit": take_profit}
+
+    def _risk_capacity(self, proposal: Dict, portfolio: Dict) -> float:
+        """
+        Extra quantity allowed by the volatility target and VaR cap.
+        Unlimited until the risk engine has enough history.
+        """
+        engine = self.risk_engine
+        price = proposal.get("target_price", 0.0)
+        if engine is None or not engine.ready or price <= 0:
+            return float("inf")
+
+        position = portfolio.get("position", 0.0)
+        value = portfolio.get("cash", 0.0) + position * price
+        engine.set_exposure([position * price])
+
+        capacity = float("inf")
+        if self.target_vol is not None:
+            target_qty = engine.target_exposure(0, value, self.target_vol) / price
+            capacity = min(capacity, target_qty - position)
+        if self.max_var_pct is not None:
+            capacity = min(capacity, engine.max_exposure_for_var(0, self.max_var_pct * value) / price)
+        return capacity
 
     def approve_trade(self, proposal: Dict, portfolio: Dict) -> Dict:
         action = proposal.get("action", "hold")
@@ -15,16 +83,80 @@ class RiskManagementAgent:
             return {"approved": False, "max_size": 0.0, "reason": "No trade (hold)", "action": action}
 
         current_position = portfolio.get("position", 0.0)
+        # Quantity already approved but still being worked by the execution agent
+        pending = portfolio.get("pending", {})
 
         if action == "buy":
-            remaining = self.max_position - current_position
+            remaining = self.max_position - current_position - pending.get("buy", 0.0)
+            remaining = min(remaining, self._risk_capacity(proposal, portfolio))
             max_size = min(self.max_single_trade, max(0.0, remaining))
         elif action == "sell":
-            max_size = min(self.max_single_trade, max(0.0, current_position))
+            max_size = min(self.max_single_trade, max(0.0, current_position - pending.get("sell", 0.0)))
         else:
             return {"approved": False, "max_size": 0.0, "reason": "Unknown action", "action": action}
 
         if max_size <= 0:
             return {"approved": False, "max_size": 0.0, "reason": "Risk limit reached", "action": action}
 
-        return {"approved": True, "max_size": max_size, "reason": "Within risk limits", "action": action}
+        if self.limit_checker is not None:
+            signed = max_size if action == "buy" else -max_size
+            check = self.limit_checker.check(
+                self.strategy_id, self.symbol_id, signed, proposal.get("target_price", 0.0), book=False
+            )
+            if not check["approved"]:
+                return {"approved": False, "max_size": 0.0, "reason": check["reason"], "action": action}
+
+        decision = {"approved": True, "max_size": max_size, "reason": "Within risk limits", "action": action}
+        if action == "buy":
+            decision.update(self.exit_levels(action, proposal.get("target_price", 0.0)))
+        return decision
+
+    def on_fill(self, side: str, quantity: float, price: float):
+        """Book a fill against the shared limits (if any)."""
+        if self.limit_checker is not None and quantity > 0:
+            signed = quantity if side == "buy" else -quantity
+            self.limit_checker.book_fills([self.strategy_id], [self.symbol_id], [signed], [price])
+
+    @property
+    def supports_batch(self) -> bool:
+        """Batch sizing needs the limits to depend on position only."""
+        return self.target_vol is None and self.max_var_pct is None and self.limit_checker is None
+
+    def _batch_sizes(self, action: np.ndarray, position: np.ndarray) -> np.ndarray:
+        buy = np.minimum(self.max_single_trade, np.maximum(0.0, self.max_position - position))
+        sell = np.minimum(self.max_single_trade, np.maximum(0.0, position))
+        return np.where(action > 0, buy, np.where(action < 0, sell, 0.0))
+
+    def approve_batch(self, proposals: Dict[str, np.ndarray], position: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        approve_trade() for a range of bars (no pending quantity).
+        proposals: analyze_batch() output.
+        position: position before each bar, or a starting position; the path
+            is then rolled forward assuming every approved order fills.
+
+        Returns {"approved", "max_size", "position"} arrays.
+        """
+        action = np.asarray(proposals["action"])
+        if np.ndim(position) == 0:
+            path = np.empty(len(action))
+            pos = float(position)
+            for k, a in enumerate(action.tolist()):
+                path[k] = pos
+                if a > 0:
+                    pos += min(self.max_single_trade, max(0.0, self.max_position - pos))
+                elif a < 0:
+                    pos -= min(self.max_single_trade, max(0.0, pos))
+            position = path
+        max_size = self._batch_sizes(action, np.asarray(position, dtype=float))
+        return {"approved": max_size > 0, "max_size": max_size, "position": position}
+
+    def decision_from_batch(self, action: str, max_size: float, target_price: float) -> Dict:
+        """The approve_trade() dict for one bar of an approve_batch() result."""
+        if action == "hold":
+            return {"approved": False, "max_size": 0.0, "reason": "No trade (hold)", "action": action}
+        if max_size <= 0:
+            return {"approved": False, "max_size": 0.0, "reason": "Risk limit reached", "action": action}
+        decision = {"approved": True, "max_size": max_size, "reason": "Within risk limits", "action": action}
+        if action == "buy":
+            decision.update(self.exit_levels(action, target_price))
+        return decision
@@ -0,0 +1,149 @@
+"""
+Concurrent agent pipeline as a small DAG.
+
+An agent node is any callable taking one `inputs` dict and returning its
+output: the step context (market state, portfolio, ...) plus the outputs
+of the nodes it depends on, keyed by node name. Both `def` and `async def`
+callables work:
+
+- async agents are awaited on the event loop (I/O-bound lookups)
+- sync agents with offload=True run on a worker thread, so CPU work that
+  releases the GIL (numpy, model inference) overlaps with other nodes
+- sync agents with offload=False run inline on the loop; use this for
+  agents that mutate shared state (risk bookings, order scheduling)
+
+Every node starts as soon as its dependencies finish, so independent
+agents (market analysis and anomaly detection, say) run concurrently.
+
+Each node can have a timeout and a fallback. A node that times out, raises,
+or is still busy with a previous call that timed out yields its fallback
+instead of stalling the step. Timeouts only apply to async and offloaded
+nodes: an inline call cannot be interrupted, it is only flagged as slow.
+A timed-out thread keeps running in the background, so offload only agents
+that are safe to abandon.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+
+
+@dataclass
+class AgentNode:
+    name: str
+    fn: Callable[[Dict], Any]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Any = None  # value, or callable(inputs) -> value
+    offload: bool = False
+    busy: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    # Statistics for monitoring
+    calls: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    skipped: int = 0
+    total_ms: float = 0.0
+
+    def default(self, inputs: Dict) -> Any:
+        return self.fallback(inputs) if callable(self.fallback) else self.fallback
+
+
+class AgentGraph:
+    def __init__(self):
+        self.nodes: Dict[str, AgentNode] = {}
+        self._order: Optional[List[str]] = None
+
+    def add(self, name: str, fn: Callable[[Dict], Any], deps=(), timeout: Optional[float] = None,
+            fallback: Any = None, offload: bool = False) -> "AgentGraph":
+        """Register an agent node; returns self so calls can be chained."""
+        if name in self.nodes:
+            raise ValueError(f"Agent {name!r} already registered")
+        self.nodes[name] = AgentNode(name, fn, tuple(deps), timeout, fallback, offload)
+        self._order = None
+        return self
+
+    def order(self) -> List[str]:
+        """Node names in dependency order (cached); rejects unknown deps and cycles."""
+        if self._order is not None:
+            return self._order
+        for node in self.nodes.values():
+            missing = [d for d in node.deps if d not in self.nodes]
+            if missing:
+                raise ValueError(f"Agent {node.name!r} depends on unknown {missing}")
+
+        indegree = {name: len(node.deps) for name, node in self.nodes.items()}
+        ready = [name for name, d in indegree.items() if d == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other in self.nodes.values():
+                if name in other.deps:
+                    indegree[other.name] -= 1
+                    if indegree[other.name] == 0:
+                        ready.append(other.name)
+        if len(order) != len(self.nodes):
+            raise ValueError("Agent graph has a cycle")
+        self._order = order
+        return order
+
+    async def _call(self, node: AgentNode, inputs: Dict) -> Tuple[Any, str]:
+        if node.busy is not None and not node.busy.done():
+            node.skipped += 1
+            return node.default(inputs), "busy"
+        try:
+            if asyncio.iscoroutinefunction(node.fn):
+                return await asyncio.wait_for(node.fn(inputs), node.timeout), "ok"
+            if node.offload:
+                node.busy = asyncio.ensure_future(asyncio.to_thread(node.fn, inputs))
+                return await asyncio.wait_for(asyncio.shield(node.busy), node.timeout), "ok"
+            t0 = time.perf_counter()
+            out = node.fn(inputs)
+            slow = node.timeout is not None and time.perf_counter() - t0 > node.timeout
+            return out, "slow" if slow else "ok"
+        except asyncio.TimeoutError:
+            node.timeouts += 1
+            print(f"[warn] agent {node.name!r} timed out after {node.timeout}s, using fallback")
+            return node.default(inputs), "timeout"
+        except Exception as e:
+            node.errors += 1
+            print(f"[warn] agent {node.name!r} failed: {e}, using fallback")
+            return node.default(inputs), "error"
+
+    async def _run_node(self, node: AgentNode, context: Dict, tasks: Dict[str, asyncio.Task],
+                        status: Dict[str, Dict]) -> Any:
+        outputs = await asyncio.gather(*(tasks[d] for d in node.deps))
+        inputs = {**context, **dict(zip(node.deps, outputs))}
+        t0 = time.perf_counter()
+        out, state = await self._call(node, inputs)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        node.calls += 1
+        node.total_ms += elapsed
+        status[node.name] = {"status": state, "ms": elapsed}
+        return out
+
+    async def run(self, context: Dict) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
+        """
+        Run every node once for this step.
+        Returns ({name: output}, {name: {"status", "ms"}}), where status is
+        "ok", "slow", "timeout", "error" or "busy".
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        status: Dict[str, Dict] = {}
+        for name in self.order():
+            tasks[name] = asyncio.ensure_future(self._run_node(self.nodes[name], context, tasks, status))
+        outputs = await asyncio.gather(*tasks.values())
+        return dict(zip(tasks, outputs)), status
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                "calls": n.calls,
+                "timeouts": n.timeouts,
+                "errors": n.errors,
+                "skipped": n.skipped,
+                "mean_ms": n.total_ms / n.calls if n.calls else 0.0,
+            }
+            for name, n in self.nodes.items()
+        }
@@ -1,61 +1,520 @@
-from typing import Dict
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
 
 from src.core.engine import TradingEngine
+from src.core.router import Venue
+from src.core.depth_index import DepthIndex
+from src.core.trigger_book import TriggerBook
+from src.core.risk_engine import RiskEngine
 from src.data.loader import DataLoader
-from src.agents.market_agent import MarketAnalysisAgent
+from src.data.stream import StreamingLoader
+from src.data.bars import MultiTimeframeAggregator
+from src.agents.market_agent import MarketAnalysisAgent, ACTIONS
 from src.agents.risk_agent import RiskManagementAgent
 from src.agents.execution_agent import ExecutionAgent
+from src.agents.anomaly_agent import AnomalyDetectionAgent
+from src.agents.ensemble_agent import EnsembleAgent
+from src.agents.ml_agent import LinearSignalModel, MLSignalAgent
+from src.coordinator.agent_graph import AgentGraph
 
 
 class Coordinator:
-    def __init__(self, data_path: str, starting_cash: float = 100_000.0):
-        self.loader = DataLoader(data_path)
-        self.df = self.loader.load_csv()
+    # Bars planned per batch call: grows while plans hold, shrinks when fills diverge
+    BATCH_BLOCK = (8, 1024)
 
-        self.engine = TradingEngine(starting_cash=starting_cash)
+    def __init__(
+        self,
+        data_path: str,
+        starting_cash: float = 100_000.0,
+        stop_loss_pct: Optional[float] = None,
+        take_profit_pct: Optional[float] = None,
+        target_vol: Optional[float] = None,
+        max_var_pct: Optional[float] = None,
+        exec_algo: Optional[str] = None,
+        exec_horizon: int = 5,
+        pov_rate: float = 0.1,
+        venues: Optional[list[Venue]] = None,
+        max_impact_bps: Optional[float] = None,
+        auction: Optional[str] = None,
+        short_window: int = 5,
+        long_window: int = 20,
+        data: Optional[pd.DataFrame] = None,
+        indicators: Optional[Dict[int, np.ndarray]] = None,
+        stream: bool = False,
+        chunk_rows: int = 100_000,
+        anomaly_window: Optional[int] = None,
+        anomaly_z: float = 4.0,
+        agent_timeouts: Optional[Dict[str, float]] = None,
+        batch: bool = True,
+        ensemble: Optional[Dict] = None,
+        ml_model: Optional[str] = None,
+        timeframes: Optional[Dict[str, int]] = None,
+    ):
+        """
+        data / indicators: an already loaded OHLCV frame and precomputed SMA
+        table (see sma_table) to reuse instead of re-reading data_path, e.g.
+        across the many backtests of a walk-forward run.
+        stream: read data_path in blocks of chunk_rows through a StreamCursor
+        instead of loading it whole (self.df is then None and backtests can
+        only move forward).
+        anomaly_window / anomaly_z: enable the anomaly agent; new buys are
+        held back on bars it flags.
+        agent_timeouts: {agent name: seconds} for the concurrent pipeline
+            (on_market_state_async); see build_agent_graph.
+        batch: let run_backtest use the agents' batch methods when they all
+            support them (see supports_batch).
+        ensemble: EnsembleAgent keyword arguments (strategies, weights,
+            weighting, ...) to use a strategy ensemble as the market agent.
+        ml_model: path of a saved LinearSignalModel (.npz) to use an
+            MLSignalAgent as the market agent; it scores bars one at a time
+            when streaming and in one batch otherwise.
+        timeframes: {name: length in bars}, e.g. {"1w": 5, "1mo": 21}, to
+            aggregate the bars into higher timeframes as they are processed
+            (self.bars). The SMA market agent then only trades with their
+            trend (see MarketAnalysisAgent), bar by bar instead of in batch.
+        """
+        # Scalar settings of this run, e.g. for archiving it (RunStore)
+        self.config = {
+            "data_path": data_path,
+            "starting_cash": starting_cash,
+            "stop_loss_pct": stop_loss_pct,
+            "take_profit_pct": take_profit_pct,
+            "target_vol": target_vol,
+            "max_var_pct": max_var_pct,
+            "exec_algo": exec_algo,
+            "exec_horizon": exec_horizon,
+            "pov_rate": pov_rate,
+            "max_impact_bps": max_impact_bps,
+            "auction": auction,
+            "short_window": short_window,
+            "long_window": long_window,
+            "anomaly_window": anomaly_window,
+            "anomaly_z": anomaly_z,
+            "ml_model": ml_model,
+            "ensemble": None if ensemble is None else ensemble.get("weighting", "static"),
+            "timeframes": None if timeframes is None else ",".join(f"{k}={v}" for k, v in timeframes.items()),
+        }
+        model = LinearSignalModel.load(ml_model) if ml_model is not None else None
+        if stream:
+            # Carry enough rows for the SMAs, vwap profiles and the ML warm-up
+            self.loader = StreamingLoader(data_path, chunk_rows=chunk_rows).cursor(
+                carry=max(long_window, exec_horizon, model.lags if model is not None else 0)
+            )
+            self.df = None
+            indicators = {w: self.loader.sma(w) for w in (short_window, long_window)}
+        elif data is not None:
+            self.loader = DataLoader(data_path)
+            self.loader.data = data
+            self.df = data
+        else:
+            self.loader = DataLoader(data_path)
+            self.df = self.loader.load_csv()
 
-        self.market_agent = MarketAnalysisAgent(self.df, short_window=5, long_window=20)
-        self.risk_agent = RiskManagementAgent()
-        self.execution_agent = ExecutionAgent()
+        self.engine = TradingEngine(starting_cash=starting_cash, venues=venues, auction=auction)
+        # Call auction: a bar's trigger exits and agent orders clear together in one uncross
+        self.auction = self.engine.router is None and self.engine.order_book.auction_mode
+        self.trigger_book = TriggerBook()
+        self.risk_engine = RiskEngine(n_symbols=1, window=60)
+        # Impact caps only mean something where fills take the resting book (venue mode);
+        # the single-book engine brings its own counterparty for every order
+        self.depth_indexes: Optional[List[DepthIndex]] = None
+        if max_impact_bps is not None:
+            if venues:
+                self.depth_indexes = [DepthIndex().attach(v.book) for v in venues]
+            else:
+                print("[warn] max_impact_bps only applies with venues (fills use the resting book there); ignored")
+                max_impact_bps = None
 
-    def run_step(self, index: int) -> Dict:
-        market_state = self.loader.get_current_state(index)
-        proposal = self.market_agent.analyze(market_state)
+        # Bar index is the time unit, so timeframes work the same for files, streams and live feeds
+        self.bars = MultiTimeframeAggregator(timeframes) if timeframes else None
 
-        decision = self.risk_agent.approve_trade(
-            proposal,
-            {
-                "cash": self.engine.cash,
-                "position": self.engine.position,
-            },
+        if model is not None:
+            self.market_agent = MLSignalAgent(self.df, model, live=self.df is None)
+        elif ensemble is not None:
+            if self.df is None:
+                raise ValueError("ensemble needs the data in memory (stream=False)")
+            self.market_agent = EnsembleAgent(self.df, **ensemble)
+        else:
+            self.market_agent = MarketAnalysisAgent(
+                self.df, short_window=short_window, long_window=long_window, indicators=indicators,
+                bars=self.bars,
+            )
+        self.risk_agent = RiskManagementAgent(
+            stop_loss_pct=stop_loss_pct,
+            take_profit_pct=take_profit_pct,
+            risk_engine=self.risk_engine,
+            target_vol=target_vol,
+            max_var_pct=max_var_pct,
+        )
+        self.execution_agent = ExecutionAgent(
+            algo=exec_algo,
+            horizon=exec_horizon,
+            pov_rate=pov_rate,
+            volume=self._volume(),
+            depth_indexes=self.depth_indexes,
+            max_impact_bps=max_impact_bps,
         )
+        self.anomaly_agent = (
+            AnomalyDetectionAgent(window=anomaly_window, z_threshold=anomaly_z)
+            if anomaly_window is not None else None
+        )
+        self.agent_graph = self.build_agent_graph(agent_timeouts or {})
+        self.batch = batch
 
-        orders = self.execution_agent.build_orders(decision, market_state)
+    def _volume(self):
+        if self.df is None:
+            return self.loader.column("Volume")
+        return self.df["Volume"].to_numpy(dtype=float) if "Volume" in self.df.columns else None
+
+    def run_triggers(self, market_state: Dict) -> tuple:
+        """
+        Pre-execution stage: exit every lot whose stop-loss / take-profit was
+        crossed by this bar, before the agents see the portfolio.
+        Any unfilled remainder stays open and is re-armed for the next bar.
+        In auction mode the exits are only built here; they clear with the
+        agents' orders in the bar's single auction (see execute_orders).
+        """
+        triggered = self.trigger_book.on_bar(
+            market_state["open"] or market_state["price"],
+            market_state["high"] or market_state["price"],
+            market_state["low"] or market_state["price"],
+            timestamp=market_state["index"],
+        )
+        orders = [{"side": t["order_side"], "price": t["price"], "quantity": t["quantity"]} for t in triggered]
+        if not self.auction:
+            for t, order in zip(triggered, orders):
+                trades = self.engine.place_and_execute_orders([order], timestamp=market_state["index"])
+                self._settle_trigger(t, order, trades, market_state["index"])
+        return triggered, orders
+
+    def _settle_trigger(self, t: Dict, order: Dict, trades: list, index: int):
+        """Book a trigger exit's fills and re-arm its unfilled remainder."""
+        filled = sum(tr.quantity for tr in trades)
+        if filled > 0:
+            self.risk_agent.on_fill(order["side"], filled, sum(tr.quantity * tr.price for tr in trades) / filled)
+        unfilled = t["quantity"] - filled
+        if unfilled > 0:
+            self.trigger_book.add_lot(
+                t["side"],
+                unfilled,
+                t["entry_price"],
+                stop_loss=t["stop_loss"],
+                take_profit=t["take_profit"],
+                timestamp=index,
+            )
+
+    def _settle_order(self, order: Dict, trades: list, index: int):
+        """Book an agent order's fills and keep the open lots in sync."""
+        filled = sum(t.quantity for t in trades)
+        if filled <= 0:
+            return
+        avg_price = sum(t.quantity * t.price for t in trades) / filled
+        self.risk_agent.on_fill(order["side"], filled, avg_price)
+        if order["side"] == "buy":
+            levels = self.risk_agent.exit_levels("buy", avg_price)
+            self.trigger_book.add_lot(
+                "long",
+                filled,
+                avg_price,
+                stop_loss=levels["stop_loss"],
+                take_profit=levels["take_profit"],
+                timestamp=index,
+            )
+        else:
+            self.trigger_book.release("long", filled)
+
+    def execute_orders(self, orders: list[dict], index: int, triggered: Optional[list] = None,
+                       trigger_orders: Optional[list] = None) -> list[dict]:
+        """
+        Send agent orders to the engine one by one and keep the open lots in
+        sync with the fills. Sells are capped at the current position, since
+        scheduled child orders may arrive after a stop-loss already exited.
+        In auction mode the bar's trigger exits (triggered / trigger_orders
+        from run_triggers) and the agent orders go out in one call, with the
+        sells of the whole batch capped at the position.
+        Returns the agent orders actually sent.
+        """
+        if self.auction:
+            return self._execute_auction(orders, index, triggered or [], trigger_orders or [])
+
+        sent = []
+        for order in orders:
+            if order["side"] == "sell":
+                qty = min(order["quantity"], max(0.0, self.engine.position))
+                if qty <= 0:
+                    continue
+                order = {**order, "quantity": qty}
+
+            trades = self.engine.place_and_execute_orders([order], timestamp=index)
+            sent.append(order)
+            self._settle_order(order, trades, index)
+        return sent
+
+    def _execute_auction(self, orders: list, index: int, triggered: list, trigger_orders: list) -> list:
+        """One auction for the bar: trigger exits first, then the agent orders."""
+        room = max(0.0, self.engine.position) - sum(o["quantity"] for o in trigger_orders if o["side"] == "sell")
+        sent = []
+        for order in orders:
+            if order["side"] == "sell":
+                qty = min(order["quantity"], max(0.0, room))
+                if qty <= 0:
+                    continue
+                room -= qty
+                order = {**order, "quantity": qty}
+            sent.append(order)
+
+        batch = trigger_orders + sent
+        trades = self.engine.place_and_execute_orders(batch, timestamp=index)
+        by_order: Dict[int, list] = {}
+        for t in trades:
+            by_order.setdefault(t.buy_order_id if t.buy_order_id != -1 else t.sell_order_id, []).append(t)
+
+        for t, order in zip(triggered, trigger_orders):
+            self._settle_trigger(t, order, by_order.get(order["order_id"], []), index)
+        for order in sent:
+            self._settle_order(order, by_order.get(order["order_id"], []), index)
+        return sent
+
+    def update_bars(self, market_state: Dict):
+        """Fold the bar into the higher timeframes, if any (before the agents read them)."""
+        if self.bars is not None:
+            self.bars.update_bar(market_state["index"], market_state["open"], market_state["high"],
+                                 market_state["low"], market_state["close"], market_state["volume"])
+
+    def warm_up(self, start_index: int):
+        """
+        Let stateful market agents see the bars before start_index (see
+        MLSignalAgent.warm_up), and fill the higher timeframes' last
+        completed bars.
+        """
+        if self.bars is not None:
+            longest = max(self.bars.timeframes.values())
+            for i in range(max(0, start_index - 2 * longest), start_index):
+                self.update_bars(self.loader.get_current_state(i))
+        warm_up = getattr(self.market_agent, "warm_up", None)
+        if warm_up is not None:
+            warm_up(self.loader.get_current_state, start_index)
+
+    def run_step(self, index: int) -> Dict:
+        return self.on_market_state(self.loader.get_current_state(index))
+
+    def _portfolio(self) -> Dict:
+        return {
+            "cash": self.engine.cash,
+            "position": self.engine.position,
+            "pending": self.execution_agent.pending(),
+        }
 
+    @staticmethod
+    def _gate(proposal: Dict, anomaly: Optional[Dict]) -> Dict:
+        """Hold back new buys on bars the anomaly agent flagged."""
+        if anomaly and anomaly["anomaly"] and proposal.get("action") == "buy":
+            return {**proposal, "action": "hold", "reason": "anomalous bar"}
+        return proposal
+
+    def build_agent_graph(self, timeouts: Dict[str, float]) -> AgentGraph:
+        """
+        Agent DAG for on_market_state_async:
+
+            market ──┐
+                     ├─> risk ─> execution
+            anomaly ─┘
+
+        market and anomaly are independent and fall back to "hold" / "no
+        anomaly" when they fail or time out. A market agent marked
+        `stateless` runs on a worker thread; stateful ones (the anomaly
+        agent's ring buffer, a live MLSignalAgent's feature buffer) run
+        inline, since a timed-out thread would keep mutating them. risk and
+        execution update shared state (order rate tokens, the order
+        scheduler) and always run inline.
+        """
+        graph = AgentGraph()
+        graph.add(
+            "market",
+            lambda inputs: self.market_agent.analyze(inputs["state"]),
+            timeout=timeouts.get("market"),
+            fallback=lambda inputs: {"action": "hold", "confidence": 0.0,
+                                     "target_price": inputs["state"]["price"], "fallback": True},
+            offload=getattr(self.market_agent, "stateless", False),
+        )
+        deps = ["market"]
+        if self.anomaly_agent is not None:
+            graph.add(
+                "anomaly",
+                lambda inputs: self.anomaly_agent.score(inputs["state"]),
+                timeout=timeouts.get("anomaly"),
+                fallback={"anomaly": False, "return_z": 0.0, "volume_z": 0.0, "fallback": True},
+            )
+            deps.append("anomaly")
+        graph.add(
+            "risk",
+            lambda inputs: self.risk_agent.approve_trade(
+                self._gate(inputs["market"], inputs.get("anomaly")), inputs["portfolio"]
+            ),
+            deps=deps,
+            timeout=timeouts.get("risk"),
+            fallback={"approved": False, "max_size": 0.0, "reason": "Risk agent unavailable", "action": "hold"},
+        )
+        graph.add(
+            "execution",
+            lambda inputs: self.execution_agent.build_orders(inputs["risk"], inputs["state"]),
+            deps=["risk"],
+            fallback=[],
+        )
+        return graph
+
+    def _finish_step(self, market_state: Dict, triggered: list, trigger_orders: list,
+                     proposal: Dict, decision: Dict, orders: list) -> Dict:
         # Place and execute orders
-        self.engine.place_and_execute_orders(orders, timestamp=index)
+        orders = self.execute_orders(orders, market_state["index"], triggered, trigger_orders)
+        self.execution_agent.on_sent(orders)
 
         snapshot = self.engine.step(market_state)
         snapshot["proposal"] = proposal
         snapshot["risk_decision"] = decision
-        snapshot["orders"] = orders
+        snapshot["orders"] = trigger_orders + orders
+        snapshot["triggers"] = triggered
+        return snapshot
 
-        # THIS was missing
+    def on_market_state(self, market_state: Dict) -> Dict:
+        """One decision cycle for a bar, whether read by index or pushed by a live feed."""
+        triggered, trigger_orders = self.run_triggers(market_state)
+        self.risk_engine.update([market_state["price"]])
+        self.update_bars(market_state)
+
+        proposal = self.market_agent.analyze(market_state)
+        anomaly = self.anomaly_agent.score(market_state) if self.anomaly_agent is not None else None
+
+        decision = self.risk_agent.approve_trade(self._gate(proposal, anomaly), self._portfolio())
+
+        orders = self.execution_agent.build_orders(decision, market_state)
+
+        snapshot = self._finish_step(market_state, triggered, trigger_orders, proposal, decision, orders)
+        if anomaly is not None:
+            snapshot["anomaly"] = anomaly
+        return snapshot
+
+    async def on_market_state_async(self, market_state: Dict) -> Dict:
+        """
+        Same decision cycle with the agents run through agent_graph: independent
+        agents overlap and slow ones degrade to their fallback.
+        """
+        triggered, trigger_orders = self.run_triggers(market_state)
+        self.risk_engine.update([market_state["price"]])
+        self.update_bars(market_state)
+
+        outputs, status = await self.agent_graph.run({"state": market_state, "portfolio": self._portfolio()})
+
+        snapshot = self._finish_step(
+            market_state, triggered, trigger_orders, outputs["market"], outputs["risk"], outputs["execution"]
+        )
+        if "anomaly" in outputs:
+            snapshot["anomaly"] = outputs["anomaly"]
+        snapshot["agents"] = status
         return snapshot
 
+    def supports_batch(self) -> bool:
+        """True when every agent in the step can be evaluated over index ranges."""
+        agents = (self.market_agent, self.risk_agent, self.execution_agent)
+        return (
+            self.df is not None
+            and self.anomaly_agent is None
+            and all(getattr(a, "supports_batch", False) for a in agents)
+        )
+
+    def _plan_batch(self, close: np.ndarray, start: int, end: int) -> Dict[str, np.ndarray]:
+        """Proposals, decisions and orders for [start, end) from the current position."""
+        price = close[start:end]
+        signals = self.market_agent.analyze_batch(start, end, price)
+        decisions = self.risk_agent.approve_batch(signals, self.engine.position)
+        orders = self.execution_agent.build_batch(decisions, signals["action"], price)
+        return {
+            "action": signals["action"].tolist(),
+            "confidence": signals["confidence"].tolist(),
+            "max_size": decisions["max_size"].tolist(),
+            "position": decisions["position"].tolist(),
+            "side": orders["side"].tolist(),
+            "quantity": orders["quantity"].tolist(),
+        }
+
+    def _run_batch(self, start_index: int, end_index: int) -> list[dict]:
+        """
+        run_backtest with the agents evaluated in blocks. The plan assumes
+        every approved order fills; whenever the engine position differs from
+        the planned one (unfilled order, stop-loss exit) the plan is redone
+        from the actual position, so results match per-step calls. The block
+        length doubles after every plan that held and drops back to the
+        minimum after one that did not.
+        """
+        def col(name):
+            if name in self.df.columns:
+                return self.df[name].to_numpy(dtype=float)
+            return np.zeros(len(self.df))
+
+        close = col("Close")
+        bars = {f.lower(): col(f).tolist() for f in ("Open", "High", "Low", "Volume")}
+        prices = close.tolist()
+
+        results: list[dict] = []
+        plan, base = None, start_index
+        min_block, max_block = self.BATCH_BLOCK
+        block = min_block
+        for i in range(start_index, end_index):
+            try:
+                price = prices[i]
+                market_state = {
+                    "open": bars["open"][i],
+                    "high": bars["high"][i],
+                    "low": bars["low"][i],
+                    "close": price,
+                    "volume": bars["volume"][i],
+                    "price": price,
+                    "index": i,
+                }
+                triggered, trigger_orders = self.run_triggers(market_state)
+                self.risk_engine.update([price])
+
+                k = i - base
+                if plan is None or k >= len(plan["position"]) or plan["position"][k] != self.engine.position:
+                    held = plan is not None and k >= len(plan["position"])
+                    block = min(max_block, 2 * block) if held else min_block
+                    plan, base, k = self._plan_batch(close, i, min(end_index, i + block)), i, 0
+
+                action = ACTIONS[plan["action"][k]]
+                proposal = {"action": action, "confidence": plan["confidence"][k], "target_price": price}
+                decision = self.risk_agent.decision_from_batch(action, plan["max_size"][k], price)
+                side = plan["side"][k]
+                orders = []
+                if side:
+                    orders.append({"side": ACTIONS[side], "price": price, "quantity": plan["quantity"][k]})
+
+                results.append(self._finish_step(market_state, triggered, trigger_orders, proposal, decision, orders))
+            except Exception as e:
+                print(f"[error] Exception at step {i}: {e}")
+                plan = None
+        return results
+
     def run_backtest(self, start_index: int = 0, end_index: int | None = None) -> list[dict]:
         """
         Run a full backtest from start_index to end_index (exclusive).
 
         Returns a list of snapshots (one per time step).
         Any step that raises an error or returns None is skipped, but logged.
+        Uses the agents' batch methods when supports_batch() (and batch=True).
         """
-        if end_index is None:
-            end_index = len(self.df)
+        if self.batch and self.supports_batch():
+            return self._run_batch(start_index, len(self.df) if end_index is None else end_index)
+
+        self.warm_up(start_index)
+        if self.df is None:
+            steps = self.loader.indices(start_index, end_index)
+        else:
+            steps = range(start_index, len(self.df) if end_index is None else end_index)
 
         results: list[dict] = []
 
-        for i in range(start_index, end_index):
+        for i in steps:
             try:
                 snapshot = self.run_step(i)
                 if snapshot is None:
@@ -67,3 +526,19 @@ class Coordinator:
                 continue
 
         return results
+
+    async def run_backtest_async(self, start_index: int = 0, end_index: int | None = None) -> list[dict]:
+        """run_backtest through on_market_state_async (the concurrent agent pipeline)."""
+        self.warm_up(start_index)
+        if self.df is None:
+            steps = self.loader.indices(start_index, end_index)
+        else:
+            steps = range(start_index, len(self.df) if end_index is None else end_index)
+
+        results: list[dict] = []
+        for i in steps:
+            try:
+                results.append(await self.on_market_state_async(self.loader.get_current_state(i)))
+            except Exception as e:
+                print(f"[error] Exception at step {i}: {e}")
+        return results
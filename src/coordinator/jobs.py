@@ -0,0 +1,140 @@
+"""
+Background backtest jobs with a result cache keyed by their parameters.
+
+BacktestRunner.submit(**params) returns a BacktestJob running on a small
+thread pool. A job builds a fresh Coordinator from its params (so no run
+ever starts from another run's cash / position), then runs the backtest in
+chunks of `chunk_steps` bars and appends the snapshots as each chunk
+finishes, so a UI can poll `progress` and draw partial results.
+
+Jobs are cached by their full parameter set: submitting the same params
+again returns the running or finished job instead of starting a new one,
+so repeated combinations are served instantly. Finished jobs are kept LRU
+up to `cache_size`; failed jobs are dropped so they can be retried.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import threading
+import time
+
+from src.coordinator.coordinator import Coordinator
+from src.core.metrics import compute_metrics
+
+
+class BacktestJob:
+    def __init__(self, params: Dict, factory: Callable[[Dict], Coordinator], chunk_steps: int):
+        self.params = params
+        self.factory = factory
+        self.chunk_steps = chunk_steps
+        self.results: List[Dict] = []
+        self.coordinator: Optional[Coordinator] = None
+        self.total_steps: int = 0
+        self.done_steps: int = 0
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def run(self) -> List[Dict]:
+        self.started = time.time()
+        try:
+            coord = self.factory(self.params)
+            self.coordinator = coord
+            start = int(self.params.get("start_index", 0))
+            end = self.params.get("end_index")
+            end = len(coord.df) if end is None else min(int(end), len(coord.df))
+            self.total_steps = max(0, end - start)
+            for lo in range(start, end, self.chunk_steps):
+                hi = min(end, lo + self.chunk_steps)
+                # The coordinator keeps its state between calls, so chunks continue the same run
+                self.results.extend(coord.run_backtest(start_index=lo, end_index=hi))
+                self.done_steps = hi - start
+        except Exception as e:
+            self.error = str(e)
+            print(f"[error] backtest job {self.params} failed: {e}")
+        self.finished = time.time()
+        return self.results
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    @property
+    def progress(self) -> float:
+        if self.done:
+            return 1.0
+        return self.done_steps / self.total_steps if self.total_steps else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def metrics(self) -> Dict:
+        return compute_metrics(self.results)
+
+
+class BacktestRunner:
+    def __init__(self, factory: Callable[[Dict], Coordinator], max_workers: int = 2,
+                 cache_size: int = 32, chunk_steps: int = 50):
+        """
+        factory: builds a new Coordinator from a job's params.
+        max_workers: backtests running at the same time.
+        cache_size: finished jobs kept for instant reuse.
+        chunk_steps: bars per chunk between progress updates.
+        """
+        self.factory = factory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backtest")
+        self.cache_size = cache_size
+        self.chunk_steps = chunk_steps
+        self.jobs: "OrderedDict[tuple, BacktestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics for monitoring
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(params: Dict) -> tuple:
+        return tuple(sorted(params.items()))
+
+    def get(self, **params) -> Optional[BacktestJob]:
+        """The cached (running or finished) job for these params, if any."""
+        with self._lock:
+            return self.jobs.get(self.key(params))
+
+    def submit(self, **params) -> BacktestJob:
+        """Cached job for these params, or a new one started in the background."""
+        key = self.key(params)
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and job.error is None:
+                self.hits += 1
+                self.jobs.move_to_end(key)
+                return job
+            self.misses += 1
+            job = BacktestJob(params, self.factory, self.chunk_steps)
+            self.jobs[key] = job
+            self._evict()
+        job.future = self.executor.submit(job.run)
+        job.future.add_done_callback(lambda _: self._finished(key, job))
+        return job
+
+    def _finished(self, key: tuple, job: BacktestJob):
+        if job.error is not None:
+            with self._lock:
+                if self.jobs.get(key) is job:
+                    del self.jobs[key]
+
+    def _evict(self):
+        # Oldest finished jobs go first; running jobs are never evicted
+        finished = [k for k, j in self.jobs.items() if j.done]
+        while len(self.jobs) > self.cache_size and finished:
+            del self.jobs[finished.pop(0)]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            running = sum(not j.done for j in self.jobs.values())
+            return {"cached": len(self.jobs) - running, "running": running, "hits": self.hits, "misses": self.misses}
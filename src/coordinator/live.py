@@ -0,0 +1,224 @@
+"""
+Live mode: replay historical bars as a real-time feed.
+
+ReplayFeed reads bars from a DataLoader (or StreamCursor) and pushes them
+onto a FeedQueue at `speed` times market time (1.0 = real time, 100.0 =
+100x, None = as fast as possible). LiveRunner consumes the queue in an
+async loop and drives Coordinator.on_market_state for every bar it gets.
+
+With a StreamCursor the feed and the agents share one cursor; the runner
+pins it at the next bar it will handle, so blocks loaded ahead by the feed
+never evict rows a queued bar still needs.
+
+Each bar is stamped when published; the runner records tick-to-order
+latency (publish -> orders placed) split into time waiting in the queue and
+time in the decision cycle.
+
+When the consumer falls behind, the queue policy decides what happens:
+
+- "buffer": unbounded queue, nothing is lost, latency grows with the backlog
+- "drop": bounded queue, the oldest queued bar is discarded for the new one
+- "conflate": bounded queue, the new bar is merged into the newest queued
+  one (high/low extended, volume summed, close/index from the new bar), so
+  the consumer sees fewer but complete bars
+"""
+from collections import deque
+from typing import Dict, List, Optional
+import asyncio
+import time
+import numpy as np
+
+from src.coordinator.coordinator import Coordinator
+
+
+POLICIES = ("buffer", "drop", "conflate")
+
+
+def _conflate(old: Dict, new: Dict) -> Dict:
+    merged = dict(new)
+    merged["open"] = old["open"]
+    merged["high"] = max(old["high"], new["high"])
+    merged["low"] = min(old["low"], new["low"])
+    merged["volume"] = old["volume"] + new["volume"]
+    merged["sent_ns"] = old["sent_ns"]  # latency counts from the oldest bar folded in
+    merged["conflated"] = old.get("conflated", 1) + 1
+    return merged
+
+
+class FeedQueue:
+    def __init__(self, policy: str = "buffer", maxsize: int = 1000):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.policy = policy
+        self.maxsize = maxsize
+        self.items: deque = deque()
+        self.closed: bool = False
+        self._ready = asyncio.Event()
+
+        # Statistics for monitoring
+        self.published: int = 0
+        self.dropped: int = 0
+        self.conflated: int = 0
+        self.max_depth: int = 0
+
+    def put(self, item: Dict):
+        """Enqueue without waiting; the policy applies when the queue is full."""
+        self.published += 1
+        full = self.policy != "buffer" and len(self.items) >= self.maxsize
+        if full and self.policy == "drop":
+            self.items.popleft()
+            self.dropped += 1
+            self.items.append(item)
+        elif full and self.policy == "conflate":
+            self.items[-1] = _conflate(self.items[-1], item)
+            self.conflated += 1
+        else:
+            self.items.append(item)
+        self.max_depth = max(self.max_depth, len(self.items))
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[Dict]:
+        """Next bar, or None once the feed is closed and drained."""
+        while not self.items:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self.items.popleft()
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+
+class ReplayFeed:
+    def __init__(self, loader, queue: FeedQueue, speed: Optional[float] = 1.0,
+                 interval: Optional[float] = None):
+        """
+        loader: DataLoader (loaded) or StreamCursor.
+        speed: market-time multiplier; None publishes as fast as possible.
+        interval: market seconds between bars; default from the loader's
+            Date index when it has one, else 1 second.
+        """
+        self.loader = loader
+        self.queue = queue
+        self.speed = speed
+        self.interval = interval
+
+    async def run(self, start_index: int = 0, end_index: Optional[int] = None):
+        """
+        Publish bars [start_index, end_index) on a market-time schedule, then
+        close the queue. Bars already due are published back to back, so a
+        slow consumer really does fall behind the feed.
+        """
+        data = getattr(self.loader, "data", None)
+        if hasattr(self.loader, "indices"):
+            indices = self.loader.indices(start_index, end_index)
+        else:
+            indices = range(start_index, len(data) if end_index is None else end_index)
+        stamps = None
+        if self.interval is None and data is not None:
+            stamps = data.index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+        t0 = time.perf_counter()
+        market_elapsed = 0.0
+        prev = None
+        for i in indices:
+            if self.speed:
+                if prev is not None:
+                    gap = (stamps[i] - stamps[prev]) / 1e9 if stamps is not None else (self.interval or 1.0)
+                    market_elapsed += gap
+                delay = t0 + market_elapsed / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # consumer-paced: hand over after every bar
+            prev = i
+            state = self.loader.get_current_state(i)
+            state["sent_ns"] = time.perf_counter_ns()
+            self.queue.put(state)
+        self.queue.close()
+
+
+def _percentiles(values_ns: List[int]) -> Dict:
+    if not values_ns:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "mean_ms": 0.0}
+    arr = np.asarray(values_ns) / 1e6
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {"p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99),
+            "max_ms": float(arr.max()), "mean_ms": float(arr.mean())}
+
+
+class LiveRunner:
+    def __init__(self, coordinator: Coordinator, queue: FeedQueue, concurrent: bool = False):
+        """concurrent: run each bar through the coordinator's agent graph (on_market_state_async)."""
+        self.coordinator = coordinator
+        self.queue = queue
+        self.concurrent = concurrent
+        self.results: List[Dict] = []
+        self.latency_ns: List[int] = []
+        self.wait_ns: List[int] = []
+        self.process_ns: List[int] = []
+        # Shared StreamCursor (if any), pinned at the next bar to handle
+        self.cursor = coordinator.loader if hasattr(coordinator.loader, "pin") else None
+
+    def pin(self, index: Optional[int]):
+        if self.cursor is not None:
+            self.cursor.pin = index
+
+    async def run(self) -> List[Dict]:
+        """Consume the queue until the feed closes; one decision cycle per bar."""
+        while True:
+            state = await self.queue.get()
+            if state is None:
+                break
+            picked = time.perf_counter_ns()
+            try:
+                if self.concurrent:
+                    snapshot = await self.coordinator.on_market_state_async(state)
+                else:
+                    snapshot = self.coordinator.on_market_state(state)
+            except Exception as e:
+                print(f"[error] Exception at step {state['index']}: {e}")
+                continue
+            finally:
+                self.pin(state["index"] + 1)
+            done = time.perf_counter_ns()
+            self.wait_ns.append(picked - state["sent_ns"])
+            self.process_ns.append(done - picked)
+            self.latency_ns.append(done - state["sent_ns"])
+            snapshot["latency_ms"] = (done - state["sent_ns"]) / 1e6
+            self.results.append(snapshot)
+            await asyncio.sleep(0)  # let the feed publish between bars
+        self.pin(None)
+        return self.results
+
+    def get_stats(self) -> Dict:
+        q = self.queue
+        return {
+            "policy": q.policy,
+            "published": q.published,
+            "processed": len(self.results),
+            "dropped": q.dropped,
+            "conflated": q.conflated,
+            "max_queue_depth": q.max_depth,
+            "tick_to_order": _percentiles(self.latency_ns),
+            "queue_wait": _percentiles(self.wait_ns),
+            "processing": _percentiles(self.process_ns),
+        }
+
+
+async def run_live(coordinator: Coordinator, start_index: int = 0, end_index: Optional[int] = None,
+                   speed: Optional[float] = 1.0, policy: str = "buffer", maxsize: int = 1000,
+                   interval: Optional[float] = None, concurrent: bool = False) -> Dict:
+    """Replay the coordinator's own data through a feed and run it live."""
+    queue = FeedQueue(policy=policy, maxsize=maxsize)
+    feed = ReplayFeed(coordinator.loader, queue, speed=speed, interval=interval)
+    runner = LiveRunner(coordinator, queue, concurrent=concurrent)
+    coordinator.warm_up(start_index)
+    runner.pin(start_index)
+    await asyncio.gather(feed.run(start_index, end_index), runner.run())
+    return {"results": runner.results, "stats": runner.get_stats()}
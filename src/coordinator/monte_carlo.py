@@ -0,0 +1,298 @@
+"""
+Monte Carlo / bootstrap robustness runs.
+
+Resampled price paths are generated together as one (n_paths, n_bars) array
+per OHLCV field, from one of:
+
+- "bootstrap": moving-block bootstrap of the historical bars (log return,
+  intrabar open/high/low offsets and volume are resampled together, so
+  volatility clustering inside a block and bar shapes are preserved)
+- "gbm": geometric Brownian motion with drift and volatility fitted to the
+  log returns
+- "jump": Merton jump diffusion; returns beyond `jump_threshold` standard
+  deviations are treated as jumps and fitted separately from the diffusion
+
+Path generation, the SMA indicators and the metrics are computed for all
+paths at once along the path axis. The strategy pipeline itself runs
+through the order book, whose state depends on each path's own history, so
+paths are run as independent Coordinator backtests spread over a process
+pool in chunks. Results are summarized as percentile confidence intervals
+of every compute_metrics output, over the paths whose every step ran; paths
+with failed steps are counted and left out.
+"""
+from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+import math
+import time
+import numpy as np
+import pandas as pd
+
+from src.coordinator.coordinator import Coordinator
+from src.core.indicators import rolling_mean
+from src.data.loader import DataLoader
+
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+# ----------------------------------------------------------------------
+# Path generation
+# ----------------------------------------------------------------------
+def _bar_features(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Per-bar log return plus open/high/low as log offsets from the close."""
+    close = df["Close"].to_numpy(dtype=float)
+    log_close = np.log(close)
+    feats = {
+        "ret": np.diff(log_close),
+        "open": np.log(df["Open"].to_numpy(dtype=float)[1:]) - log_close[1:],
+        "high": np.log(df["High"].to_numpy(dtype=float)[1:]) - log_close[1:],
+        "low": np.log(df["Low"].to_numpy(dtype=float)[1:]) - log_close[1:],
+        "volume": df["Volume"].to_numpy(dtype=float)[1:] if "Volume" in df.columns else np.zeros(len(close) - 1),
+    }
+    return feats
+
+
+def _assemble(first: pd.Series, ret, open_off, high_off, low_off, volume) -> Dict[str, np.ndarray]:
+    """Build OHLCV arrays from per-bar log returns; bar 0 is the historical first bar."""
+    n_paths = ret.shape[0]
+    log_close = np.log(float(first["Close"])) + np.concatenate(
+        [np.zeros((n_paths, 1)), np.cumsum(ret, axis=1)], axis=1
+    )
+    close = np.exp(log_close)
+    head = lambda col: np.full((n_paths, 1), float(first.get(col, first["Close"])))
+    open_ = np.concatenate([head("Open"), np.exp(log_close[:, 1:] + open_off)], axis=1)
+    high = np.concatenate([head("High"), np.exp(log_close[:, 1:] + high_off)], axis=1)
+    low = np.concatenate([head("Low"), np.exp(log_close[:, 1:] + low_off)], axis=1)
+    high = np.maximum(high, np.maximum(open_, close))
+    low = np.minimum(low, np.minimum(open_, close))
+    vol = np.concatenate([np.full((n_paths, 1), float(first.get("Volume", 0.0))), volume], axis=1)
+    return {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": vol}
+
+
+def bootstrap_paths(df: pd.DataFrame, n_paths: int, n_bars: Optional[int] = None,
+                    block_size: int = 10, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Moving-block bootstrap of historical bars. Returns {field: (n_paths, n_bars)}."""
+    rng = np.random.default_rng(seed)
+    feats = _bar_features(df)
+    n_src = len(feats["ret"])
+    n_bars = n_bars or len(df)
+    block_size = max(1, min(block_size, n_src))
+    n_blocks = math.ceil((n_bars - 1) / block_size)
+
+    starts = rng.integers(0, n_src - block_size + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, : n_bars - 1]
+    return _assemble(df.iloc[0], feats["ret"][idx], feats["open"][idx], feats["high"][idx],
+                     feats["low"][idx], feats["volume"][idx])
+
+
+def _diffusion_shapes(feats: Dict, rng, n_paths: int, n_steps: int):
+    """Intrabar offsets and volume for model paths, resampled from history."""
+    idx = rng.integers(0, len(feats["ret"]), size=(n_paths, n_steps))
+    return feats["open"][idx], feats["high"][idx], feats["low"][idx], feats["volume"][idx]
+
+
+def gbm_paths(df: pd.DataFrame, n_paths: int, n_bars: Optional[int] = None,
+              seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Geometric Brownian motion fitted to the historical log returns."""
+    rng = np.random.default_rng(seed)
+    feats = _bar_features(df)
+    n_bars = n_bars or len(df)
+    mu, sigma = feats["ret"].mean(), feats["ret"].std(ddof=1)
+    ret = rng.normal(mu, sigma, size=(n_paths, n_bars - 1))
+    return _assemble(df.iloc[0], ret, *_diffusion_shapes(feats, rng, n_paths, n_bars - 1))
+
+
+def jump_diffusion_paths(df: pd.DataFrame, n_paths: int, n_bars: Optional[int] = None,
+                         jump_threshold: float = 3.0, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Merton jump diffusion: Gaussian diffusion plus Poisson-arriving Gaussian jumps."""
+    rng = np.random.default_rng(seed)
+    feats = _bar_features(df)
+    n_bars = n_bars or len(df)
+    r = feats["ret"]
+    is_jump = np.abs(r - r.mean()) > jump_threshold * r.std(ddof=1)
+    diffusion = r[~is_jump]
+    jumps = r[is_jump]
+
+    lam = is_jump.mean()
+    jump_mu = jumps.mean() if len(jumps) else 0.0
+    jump_sigma = jumps.std(ddof=1) if len(jumps) > 1 else 0.0
+
+    shape = (n_paths, n_bars - 1)
+    ret = rng.normal(diffusion.mean(), diffusion.std(ddof=1), size=shape)
+    counts = rng.poisson(lam, size=shape)
+    ret += counts * jump_mu + np.sqrt(counts) * jump_sigma * rng.standard_normal(shape)
+    return _assemble(df.iloc[0], ret, *_diffusion_shapes(feats, rng, n_paths, n_bars - 1))
+
+
+GENERATORS = {
+    "bootstrap": bootstrap_paths,
+    "gbm": gbm_paths,
+    "jump": jump_diffusion_paths,
+}
+
+
+# ----------------------------------------------------------------------
+# Batched indicators and metrics
+# ----------------------------------------------------------------------
+def sma_paths(close: np.ndarray, windows) -> Dict[int, np.ndarray]:
+    """Rolling SMAs of every path at once, (n_paths, n_bars) per window."""
+    return {w: rolling_mean(close, w, axis=1) for w in sorted(set(windows))}
+
+
+def compute_metrics_batch(equity: np.ndarray, periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """
+    compute_metrics for every row of an (n_paths, n_steps) equity array at once.
+    Same definitions as compute_metrics; one value per path for each key.
+    """
+    equity = np.asarray(equity, dtype=float)
+    start, end = equity[:, 0], equity[:, -1]
+    pnl = end - start
+    prev = equity[:, :-1]
+    valid = prev != 0
+    rets = np.where(valid, (equity[:, 1:] - prev) / np.where(valid, prev, 1.0), np.nan)
+    n_ret = valid.sum(axis=1)
+    has = n_ret > 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.where(has, np.nanmean(rets, axis=1), 0.0) if rets.shape[1] else np.zeros(len(equity))
+        std = np.where(has, np.nanstd(rets, axis=1), 0.0) if rets.shape[1] else np.zeros(len(equity))
+        vol = std * math.sqrt(periods_per_year)
+        sharpe = np.where(vol != 0, avg * math.sqrt(periods_per_year) / np.where(vol != 0, vol, 1.0), 0.0)
+
+        down = np.where(rets < 0, rets, np.nan)
+        n_down = (rets < 0).sum(axis=1)
+        down_std = np.zeros(len(equity))
+        if n_down.any():
+            down_std[n_down > 0] = np.nanstd(down[n_down > 0], axis=1)
+        sortino = np.where(down_std != 0, avg * math.sqrt(periods_per_year) / np.where(down_std != 0, down_std, 1.0), 0.0)
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        dd = np.where(peak != 0, (peak - equity) / np.where(peak != 0, peak, 1.0), 0.0)
+        win = np.where(has, (rets > 0).sum(axis=1) / np.maximum(n_ret, 1) * 100, 0.0)
+
+    return {
+        "start_value": start,
+        "end_value": end,
+        "pnl": pnl,
+        "return_pct": np.where(start != 0, pnl / np.where(start != 0, start, 1.0) * 100, 0.0),
+        "max_drawdown_pct": dd.max(axis=1) * 100,
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+        "volatility": vol * 100,
+        "win_rate": win,
+        "total_steps": np.full(len(equity), equity.shape[1]),
+        "avg_return": avg * 100,
+    }
+
+
+def confidence_intervals(metrics: Dict[str, np.ndarray], levels=(0.05, 0.5, 0.95)) -> Dict[str, Dict]:
+    """Mean, std and percentiles of each metric across paths."""
+    out = {}
+    for key, values in metrics.items():
+        qs = np.quantile(values, levels)
+        out[key] = {"mean": float(values.mean()), "std": float(values.std())}
+        out[key].update({f"p{round(q * 100):02d}": float(v) for q, v in zip(levels, qs)})
+    return out
+
+
+# ----------------------------------------------------------------------
+# Running the pipeline
+# ----------------------------------------------------------------------
+def _run_chunk(task) -> np.ndarray:
+    """Backtest a chunk of paths; returns their (k, n_steps) equity curves."""
+    paths, params, start_index, windows = task
+    n_paths, n_bars = paths["Close"].shape
+    tables = sma_paths(paths["Close"], windows)
+    equity = np.full((n_paths, n_bars - start_index), np.nan)
+    for k in range(n_paths):
+        df = pd.DataFrame({f: paths[f][k] for f in FIELDS})
+        coord = Coordinator(
+            "<monte-carlo>",
+            data=df,
+            indicators={w: tables[w][k] for w in windows},
+            **params,
+        )
+        for snap in coord.run_backtest(start_index):
+            equity[k, snap["step"] - start_index] = snap["portfolio_value"]
+    return equity
+
+
+class MonteCarloRunner:
+    def __init__(
+        self,
+        data_path: str,
+        method: str = "bootstrap",
+        n_paths: int = 1000,
+        n_bars: Optional[int] = None,
+        params: Optional[Dict] = None,
+        start_index: int = 0,
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 250,
+        **generator_kwargs,
+    ):
+        """
+        method: "bootstrap", "gbm" or "jump" (see GENERATORS).
+        n_bars: path length (default: length of the historical series).
+        params: Coordinator kwargs for every path (windows, stops, algo, ...).
+        start_index: first bar traded on each path.
+        max_workers: process pool size; 1 runs in this process.
+        chunk_size: paths per pool task.
+        generator_kwargs: passed to the generator (block_size, jump_threshold).
+        """
+        if method not in GENERATORS:
+            raise ValueError(f"method must be one of {sorted(GENERATORS)}")
+        self.data_path = data_path
+        self.df = DataLoader(data_path).load_csv()
+        self.method = method
+        self.n_paths = n_paths
+        self.n_bars = n_bars or len(self.df)
+        self.params = params or {}
+        self.start_index = start_index
+        self.seed = seed
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.generator_kwargs = generator_kwargs
+
+    def generate(self) -> Dict[str, np.ndarray]:
+        """All paths as {field: (n_paths, n_bars)} arrays."""
+        return GENERATORS[self.method](self.df, self.n_paths, self.n_bars, seed=self.seed, **self.generator_kwargs)
+
+    def run(self, paths: Optional[Dict[str, np.ndarray]] = None) -> Dict:
+        """
+        Returns {"equity": (n_paths, n_steps) array, "metrics": per-path arrays,
+                 "failed_steps": per-path count of steps that raised,
+                 "intervals": confidence_intervals over the paths without
+                 failed steps, "elapsed_s"}
+        """
+        t0 = time.perf_counter()
+        paths = self.generate() if paths is None else paths
+        windows = [self.params.get("short_window", 5), self.params.get("long_window", 20)]
+        n = paths["Close"].shape[0]
+        tasks = [
+            ({f: paths[f][i:i + self.chunk_size] for f in FIELDS}, self.params, self.start_index, windows)
+            for i in range(0, n, self.chunk_size)
+        ]
+        if self.max_workers == 1:
+            chunks = [_run_chunk(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                chunks = list(pool.map(_run_chunk, tasks))
+
+        equity = np.vstack(chunks)
+        # Steps that failed inside run_backtest produced no snapshot
+        failed_steps = np.isnan(equity).sum(axis=1)
+        clean = failed_steps == 0
+        if not clean.all():
+            print(f"[warn] {int((~clean).sum())} of {n} paths had failed steps; left out of the intervals")
+        # Carry the previous value forward so every path still has per-path metrics
+        equity = pd.DataFrame(equity.T).ffill().bfill().to_numpy().T
+        metrics = compute_metrics_batch(equity)
+        intervals = confidence_intervals({k: v[clean] for k, v in metrics.items()}) if clean.any() else {}
+        return {
+            "equity": equity,
+            "metrics": metrics,
+            "failed_steps": failed_steps,
+            "intervals": intervals,
+            "elapsed_s": time.perf_counter() - t0,
+        }
@@ -0,0 +1,189 @@
+"""
+Walk-forward optimization.
+
+The series is cut into rolling (or anchored) folds of an in-sample window
+followed by an out-of-sample window. For each fold every parameter set of the
+grid is backtested in sample, the best one by `objective` is run on the
+out-of-sample window, and the OOS equity curves are chained into one curve.
+
+All in-sample runs of all folds are independent, so they go to a process
+pool in one batch. Each worker loads the CSV once and computes the SMA of
+every window used by the grid once over the full series; the backtests then
+share those arrays. Rolling SMAs only look backwards, so a window starting
+at bar `start` sees exactly the values a full-history run would.
+"""
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import time
+
+from src.agents.market_agent import sma_table
+from src.coordinator.coordinator import Coordinator
+from src.core.metrics import compute_metrics
+from src.data.loader import DataLoader
+
+
+# Per-process state: loaded frame and shared indicator table
+_WORKER: Dict = {}
+
+
+def _init_worker(data_path: str, windows: List[int]):
+    """Load data_path once per process; later calls only add missing SMA windows."""
+    if _WORKER.get("data_path") != data_path:
+        _WORKER["data_path"] = data_path
+        _WORKER["df"] = DataLoader(data_path).load_csv()
+        _WORKER["indicators"] = {}
+    missing = [w for w in windows if w not in _WORKER["indicators"]]
+    if missing:
+        _WORKER["indicators"].update(sma_table(_WORKER["df"]["Close"], missing))
+
+
+def _evaluate(params: Dict, start: int, end: int, keep_curve: bool = False) -> Dict:
+    """Backtest `params` on [start, end) with the worker's shared data."""
+    coord = Coordinator(
+        _WORKER["data_path"],
+        data=_WORKER["df"],
+        indicators=_WORKER["indicators"],
+        **params,
+    )
+    results = coord.run_backtest(start, end)
+    out = {"metrics": compute_metrics(results)}
+    if keep_curve:
+        out["equity"] = [s["portfolio_value"] for s in results]
+        out["steps"] = [s["step"] for s in results]
+    return out
+
+
+def _evaluate_task(task) -> Dict:
+    return _evaluate(*task)
+
+
+def expand_grid(param_grid: Dict[str, List]) -> List[Dict]:
+    """Cartesian product of a {name: [values]} grid; drops short >= long SMA pairs."""
+    names = list(param_grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    return [
+        c for c in combos
+        if c.get("short_window", 5) < c.get("long_window", 20)
+    ]
+
+
+class WalkForward:
+    def __init__(
+        self,
+        data_path: str,
+        param_grid: Dict[str, List],
+        train_size: int,
+        test_size: int,
+        step: Optional[int] = None,
+        anchored: bool = False,
+        objective: str = "sharpe_ratio",
+        base_params: Optional[Dict] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        param_grid: {Coordinator kwarg: [candidate values]}, e.g.
+            {"short_window": [5, 10], "long_window": [20, 50], "stop_loss_pct": [None, 0.05]}
+        train_size / test_size: in-sample / out-of-sample bars per fold.
+        step: bars between fold starts (default test_size, i.e. OOS windows tile).
+        anchored: in-sample windows all start at bar 0 and grow.
+        objective: compute_metrics key to maximize in sample.
+        base_params: fixed Coordinator kwargs shared by every run.
+        max_workers: process pool size; 1 runs everything in this process.
+        """
+        self.data_path = data_path
+        self.grid = expand_grid(param_grid)
+        if not self.grid:
+            raise ValueError("param_grid has no valid combinations")
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step or test_size
+        self.anchored = anchored
+        self.objective = objective
+        self.base_params = base_params or {}
+        self.max_workers = max_workers
+
+        self.n_bars = len(DataLoader(data_path).load_csv())
+        windows = {5, 20}
+        for params in self.grid:
+            windows.add(params.get("short_window", 5))
+            windows.add(params.get("long_window", 20))
+        self.windows = sorted(windows)
+
+    def folds(self) -> List[Dict]:
+        """In-sample / out-of-sample index ranges, end-exclusive."""
+        folds = []
+        start = 0
+        while start + self.train_size + self.test_size <= self.n_bars:
+            train_end = start + self.train_size
+            folds.append({
+                "fold": len(folds),
+                "train_start": 0 if self.anchored else start,
+                "train_end": train_end,
+                "test_start": train_end,
+                "test_end": train_end + self.test_size,
+            })
+            start += self.step
+        return folds
+
+    def _map(self, tasks: List[tuple]) -> List[Dict]:
+        if self.max_workers == 1:
+            _init_worker(self.data_path, self.windows)
+            return [_evaluate_task(t) for t in tasks]
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.data_path, self.windows),
+        ) as pool:
+            return list(pool.map(_evaluate_task, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    def run(self) -> Dict:
+        """
+        Returns {"folds": [...], "equity": [...], "steps": [...],
+                 "metrics": compute_metrics of the stitched OOS curve, "elapsed_s"}
+        """
+        t0 = time.perf_counter()
+        folds = self.folds()
+        if not folds:
+            raise ValueError("series too short for one train + test window")
+
+        # In-sample: every (fold, params) pair in one parallel batch
+        tasks = [
+            ({**self.base_params, **params}, f["train_start"], f["train_end"])
+            for f in folds
+            for params in self.grid
+        ]
+        scores = self._map(tasks)
+
+        n = len(self.grid)
+        for i, f in enumerate(folds):
+            fold_scores = [r["metrics"].get(self.objective, float("-inf")) for r in scores[i * n:(i + 1) * n]]
+            best = max(range(n), key=lambda k: fold_scores[k])
+            f["params"] = self.grid[best]
+            f["in_sample"] = scores[i * n + best]["metrics"]
+
+        # Out-of-sample: the chosen parameters per fold
+        oos = self._map([
+            ({**self.base_params, **f["params"]}, f["test_start"], f["test_end"], True)
+            for f in folds
+        ])
+
+        # Chain OOS curves: each fold continues from the previous fold's end value
+        equity: List[float] = []
+        steps: List[int] = []
+        for f, r in zip(folds, oos):
+            f["out_of_sample"] = r["metrics"]
+            curve = r["equity"]
+            if not curve:
+                continue
+            scale = equity[-1] / curve[0] if equity and curve[0] else 1.0
+            equity.extend(v * scale for v in curve)
+            steps.extend(r["steps"])
+
+        return {
+            "folds": folds,
+            "equity": equity,
+            "steps": steps,
+            "metrics": compute_metrics([{"portfolio_value": v} for v in equity]),
+            "elapsed_s": time.perf_counter() - t0,
+        }
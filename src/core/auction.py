@@ -0,0 +1,127 @@
+"""
+Call auction (batch) matching for bar-based simulation.
+
+All orders for a bar are collected, then uncrossed at the single price that
+maximizes executed volume. Demand at price p is the quantity of buys with
+limit >= p and supply the quantity of sells with limit <= p; both curves
+come from one sort + cumsum over the orders, evaluated at every candidate
+price with searchsorted, so thousands of orders clear in one call.
+
+Ties on volume are broken by the smallest |demand - supply| and then by
+closeness to a reference price (e.g. the last close).
+
+At the clearing price every order strictly better than it fills in full;
+the marginal orders at exactly the clearing price share what is left either
+pro rata or by time priority.
+"""
+from typing import Dict, Optional
+import numpy as np
+
+
+def uncross(
+    side: np.ndarray,
+    price: np.ndarray,
+    quantity: np.ndarray,
+    priority: Optional[np.ndarray] = None,
+    allocation: str = "pro_rata",
+    reference_price: Optional[float] = None,
+) -> Dict:
+    """
+    side: +1 buy / -1 sell per order
+    price: limit price (np.inf for market buys, 0 or -np.inf for market sells)
+    quantity: order size
+    priority: arrival time / sequence, lower first (time allocation only)
+    allocation: "pro_rata" or "time" for the marginal price level
+
+    Returns {"price": float | None, "volume": float, "filled": array,
+             "demand": float, "supply": float}
+    """
+    side = np.asarray(side)
+    price = np.asarray(price, dtype=float)
+    quantity = np.asarray(quantity, dtype=float)
+    n = len(quantity)
+    filled = np.zeros(n)
+    empty = {"price": None, "volume": 0.0, "filled": filled, "demand": 0.0, "supply": 0.0}
+    if n == 0:
+        return empty
+
+    buy = side > 0
+    sell = ~buy
+    candidates = np.unique(price[np.isfinite(price) & (price > 0)])
+    if len(candidates) == 0:
+        if reference_price is None:
+            return empty
+        candidates = np.array([float(reference_price)])
+
+    # Demand(p) = buys with limit >= p ; Supply(p) = sells with limit <= p
+    buy_prices = price[buy]
+    order = np.argsort(buy_prices)
+    buy_sorted = buy_prices[order]
+    buy_tail = np.concatenate([np.cumsum(quantity[buy][order][::-1])[::-1], [0.0]])
+    demand = buy_tail[np.searchsorted(buy_sorted, candidates, side="left")]
+
+    sell_prices = price[sell]
+    order = np.argsort(sell_prices)
+    sell_sorted = sell_prices[order]
+    sell_head = np.concatenate([[0.0], np.cumsum(quantity[sell][order])])
+    supply = sell_head[np.searchsorted(sell_sorted, candidates, side="right")]
+
+    executed = np.minimum(demand, supply)
+    best_volume = executed.max()
+    if best_volume <= 0:
+        return empty
+
+    # Max volume, then min imbalance, then closest to the reference price
+    ref = reference_price if reference_price is not None else float(np.median(candidates))
+    keys = np.lexsort((np.abs(candidates - ref), np.abs(demand - supply), -executed))
+    k = keys[0]
+    clearing = float(candidates[k])
+    volume = float(executed[k])
+
+    filled[buy] = _allocate(price[buy], quantity[buy], None if priority is None else np.asarray(priority)[buy],
+                            clearing, volume, allocation, is_buy=True)
+    filled[sell] = _allocate(price[sell], quantity[sell], None if priority is None else np.asarray(priority)[sell],
+                             clearing, volume, allocation, is_buy=False)
+    return {
+        "price": clearing,
+        "volume": volume,
+        "filled": filled,
+        "demand": float(demand[k]),
+        "supply": float(supply[k]),
+    }
+
+
+def _allocate(price, quantity, priority, clearing, volume, allocation, is_buy):
+    """
+    Fill one side by price priority: levels better than the clearing price
+    first, and the first level that does not fit entirely (normally the
+    marginal one at the clearing price) is rationed.
+    """
+    out = np.zeros(len(quantity))
+    eligible = price >= clearing if is_buy else price <= clearing
+    if not eligible.any():
+        return out
+
+    # Price levels best-first: descending for buys, ascending for sells
+    key = -price if is_buy else price
+    levels, inverse = np.unique(key[eligible], return_inverse=True)
+    level_qty = np.bincount(inverse, weights=quantity[eligible], minlength=len(levels))
+    before = np.cumsum(level_qty) - level_qty
+    level_fill = np.clip(volume - before, 0.0, level_qty)
+
+    idx = np.flatnonzero(eligible)
+    full = level_fill[inverse] >= level_qty[inverse]
+    out[idx[full]] = quantity[idx[full]]
+
+    partial = np.flatnonzero((level_fill > 0) & (level_fill < level_qty))
+    if len(partial):
+        lvl = partial[0]
+        members = idx[inverse == lvl]
+        left = level_fill[lvl]
+        if allocation == "time" and priority is not None:
+            members = members[np.argsort(priority[members], kind="stable")]
+            taken = np.cumsum(quantity[members]) - quantity[members]
+            out[members] = np.clip(left - taken, 0.0, quantity[members])
+        else:
+            out[members] = quantity[members] * (left / level_qty[lvl])
+    return out
@@ -0,0 +1,205 @@
+"""
+Cumulative-depth index over OrderBook price levels.
+
+Each side keeps two Fenwick (binary indexed) trees over a tick grid, one for
+quantity and one for notional (price * quantity), ordered from the best
+price outward. That turns the usual "walk the levels" questions into
+O(log n) prefix queries:
+
+- vwap_to_fill(side, Q): average price of taking Q from the book
+- price_for_depth(side, Q): price at which cumulative depth reaches Q
+- depth_within_bps(side, bps): resting quantity within X bps of mid
+
+Prices are bucketed to `tick_size`; distinct prices inside one tick share a
+bucket, but notional is tracked per real price so VWAPs stay exact.
+"""
+from typing import Dict, Optional
+import math
+
+
+class FenwickTree:
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    def add(self, i: int, delta: float):
+        """Add `delta` at 0-based position i. O(log n)."""
+        i += 1
+        tree = self.tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> float:
+        """Sum of positions [0, i). O(log n)."""
+        total = 0.0
+        tree = self.tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def lower_bound(self, target: float) -> int:
+        """
+        Smallest i such that prefix(i + 1) >= target, or `size` if the total
+        is below target. O(log n) binary lifting.
+        """
+        pos = 0
+        remaining = target
+        step = 1 << self.size.bit_length()
+        tree = self.tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and tree[nxt] < remaining:
+                pos = nxt
+                remaining -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class _SideIndex:
+    """One side of the book on a tick grid, position 0 = best possible tick."""
+
+    def __init__(self, sign: int, tick_size: float, size: int):
+        self.sign = sign          # +1 asks (ascending), -1 bids (descending)
+        self.tick_size = tick_size
+        self.size = size
+        self.origin: Optional[int] = None  # signed tick stored at position 0
+        self.qty = FenwickTree(size)
+        self.notional = FenwickTree(size)
+        self.levels: Dict[float, float] = {}  # price -> quantity currently indexed
+
+    def _pos(self, price: float) -> int:
+        return self.sign * round(price / self.tick_size) - self.origin
+
+    def price_at(self, pos: int) -> float:
+        return round(self.sign * (pos + self.origin) * self.tick_size, 10)
+
+    def _rebuild(self, prices):
+        """Re-center the grid so every price fits (rare, O(n log n))."""
+        signed = [self.sign * round(p / self.tick_size) for p in prices]
+        lo, hi = min(signed), max(signed)
+        while hi - lo + 1 > self.size // 2:
+            self.size *= 2
+        self.origin = lo - (self.size - (hi - lo + 1)) // 2
+        self.qty = FenwickTree(self.size)
+        self.notional = FenwickTree(self.size)
+        for price, q in self.levels.items():
+            pos = self._pos(price)
+            self.qty.add(pos, q)
+            self.notional.add(pos, q * price)
+
+    def set(self, price: float, quantity: float):
+        old = self.levels.get(price, 0.0)
+        if quantity > 0:
+            self.levels[price] = quantity
+        else:
+            self.levels.pop(price, None)
+        delta = max(quantity, 0.0) - old
+        if delta == 0:
+            return
+
+        if self.origin is None or not 0 <= self._pos(price) < self.size:
+            self._rebuild(list(self.levels) + [price])
+            return  # rebuild already indexed the new quantity
+        pos = self._pos(price)
+        self.qty.add(pos, delta)
+        self.notional.add(pos, delta * price)
+
+    def total(self) -> float:
+        return self.qty.prefix(self.size)
+
+    def clear(self):
+        self.levels.clear()
+        self.origin = None
+        self.qty = FenwickTree(self.size)
+        self.notional = FenwickTree(self.size)
+
+
+class DepthIndex:
+    def __init__(self, tick_size: float = 0.01, grid_size: int = 1 << 16):
+        self.tick_size = tick_size
+        self.bids = _SideIndex(-1, tick_size, grid_size)
+        self.asks = _SideIndex(1, tick_size, grid_size)
+        self._book = None  # attached OrderBook, for mid-price defaults
+
+    def attach(self, book) -> "DepthIndex":
+        """Index an OrderBook's current levels and keep in sync with it."""
+        for price, qty in book.bids.items():
+            self.bids.set(price, qty)
+        for price, qty in book.asks.items():
+            self.asks.set(price, qty)
+        book.depth_index = self
+        self._book = book
+        return self
+
+    def update(self, side: str, price: float, quantity: float):
+        """Level `price` on `side` ("buy" / "sell") now rests `quantity`."""
+        (self.bids if side == "buy" else self.asks).set(price, quantity)
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
+    def _taken(self, side: str) -> _SideIndex:
+        """Book side consumed by an aggressive order of `side`."""
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be 'buy' or 'sell'")
+        return self.asks if side == "buy" else self.bids
+
+    def vwap_to_fill(self, side: str, quantity: float) -> Dict:
+        """
+        Cost of an aggressive `side` order for `quantity`, without touching the book.
+        Returns {"vwap", "filled", "worst_price"}; vwap/worst_price None if the side is empty.
+        """
+        idx = self._taken(side)
+        if not idx.levels or quantity <= 0:
+            return {"vwap": None, "filled": 0.0, "worst_price": None}
+
+        pos = idx.qty.lower_bound(quantity)
+        if pos >= idx.size:
+            filled = idx.total()
+            notional = idx.notional.prefix(idx.size)
+            worst = max(idx.levels) if side == "buy" else min(idx.levels)
+            return {"vwap": notional / filled, "filled": filled, "worst_price": worst}
+
+        qty_before = idx.qty.prefix(pos)
+        notional_before = idx.notional.prefix(pos)
+        bucket_qty = idx.qty.prefix(pos + 1) - qty_before
+        bucket_notional = idx.notional.prefix(pos + 1) - notional_before
+        # Partial bucket is priced at its own average (exact when one price per tick)
+        take = quantity - qty_before
+        notional = notional_before + take * bucket_notional / bucket_qty
+        return {"vwap": notional / quantity, "filled": quantity, "worst_price": idx.price_at(pos)}
+
+    def price_for_depth(self, side: str, quantity: float) -> Optional[float]:
+        """Tick price at which cumulative resting depth on `side` ("buy" = bids) reaches `quantity`."""
+        idx = self.bids if side == "buy" else self.asks
+        pos = idx.qty.lower_bound(quantity)
+        return None if pos >= idx.size or not idx.levels else idx.price_at(pos)
+
+    def depth_within_bps(self, side: str, bps: float, mid: Optional[float] = None) -> float:
+        """Resting quantity on `side` ("buy" = bids) within `bps` of mid."""
+        idx = self.bids if side == "buy" else self.asks
+        if mid is None:
+            mid = self._book.get_mid_price() if self._book is not None else None
+        if mid is None or idx.origin is None:
+            return 0.0
+        bound = mid * (1 - bps / 10_000.0) if side == "buy" else mid * (1 + bps / 10_000.0)
+        # Last tick inside the bound, rounding toward mid (floor for asks, ceil for bids)
+        last = math.floor(idx.sign * bound / idx.tick_size + 1e-9) - idx.origin
+        return idx.qty.prefix(min(idx.size, max(0, last + 1)))
+
+    def resting(self, side: str) -> float:
+        """Total resting quantity on `side` ("buy" = bids)."""
+        return (self.bids if side == "buy" else self.asks).total()
+
+    def impact_bps(self, side: str, quantity: float, mid: Optional[float] = None) -> Optional[float]:
+        """Estimated slippage of an aggressive order versus mid, in bps."""
+        if mid is None:
+            mid = self._book.get_mid_price() if self._book is not None else None
+        est = self.vwap_to_fill(side, quantity)
+        if mid is None or est["vwap"] is None:
+            return None
+        sign = 1.0 if side == "buy" else -1.0
+        return sign * (est["vwap"] - mid) / mid * 10_000.0
@@ -1,22 +1,53 @@
 """
 Main simulation engine that runs time steps.
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
 from src.core.order_book import OrderBook, Trade
+from src.core.router import SmartOrderRouter, Venue
+from src.core.journal import EventJournal
+from src.core.trade_log import TradeLog
 
 
 class TradingEngine:
-    def __init__(self, starting_cash: float = 100_000.0):
-        self.order_book = OrderBook()
+    def __init__(
+        self,
+        starting_cash: float = 100_000.0,
+        venues: Optional[List[Venue]] = None,
+        journal: Optional[EventJournal] = None,
+        auction: Optional[str] = None,
+    ):
+        """
+        venues: multi-venue mode. Orders are routed across the venues' books
+        by a SmartOrderRouter as immediate-or-cancel orders against the
+        liquidity already resting there (no fake counterparty), and taker
+        fees are charged to cash. Without venues a single OrderBook is used.
+        journal: event journal for the single-venue book (crash recovery / replay).
+        auction: "pro_rata" or "time" to clear each step's orders in one call
+        auction instead of matching them continuously on arrival.
+        """
+        self.router: Optional[SmartOrderRouter] = SmartOrderRouter(venues) if venues else None
+        self.order_book = venues[0].book if venues else OrderBook(journal=journal)
         self.cash: float = starting_cash
         self.position: float = 0.0
-        self.trades: List[Trade] = []
+        self.trades: TradeLog = TradeLog()  # columnar, one row per fill
+        self.fills: List[Dict] = []  # per-venue fill reports (multi-venue mode)
+        self.fees_paid: float = 0.0
         self.current_step: int = 0
 
-    def place_and_execute_orders(self, orders: List[Dict], timestamp: int):
+        if auction is not None:
+            self.order_book.set_auction_mode(True, allocation=auction)
+
+    def place_and_execute_orders(self, orders: List[Dict], timestamp: int) -> List[Trade]:
         """
         Place each order in the order book and update cash/position based on trades.
+        Returns the trades executed for these orders.
         """
+        if self.router is not None:
+            return self._route_orders(orders, timestamp)
+        if self.order_book.auction_mode:
+            return self._auction_orders(orders, timestamp)
+
+        executed: List[Trade] = []
         for order in orders:
             side = order["side"]
             price = order["price"]
@@ -32,7 +63,8 @@ class TradingEngine:
 
             trades = self.order_book.place_order(side=side, price=price, quantity=qty, timestamp=timestamp)
             for t in trades:
-                self.trades.append(t)
+                self.trades.append(t, side=1 if side == "buy" else -1)
+                executed.append(t)
                 if side == "buy":
                     self.position += t.quantity
                     self.cash -= t.quantity * t.price
@@ -40,6 +72,63 @@ class TradingEngine:
                     self.position -= t.quantity
                     self.cash += t.quantity * t.price
 
+        return executed
+
+    def _auction_orders(self, orders: List[Dict], timestamp: int) -> List[Trade]:
+        """
+        Queue the step's orders (with fake counterparties) and clear them in
+        one auction. Each order dict gets the "order_id" its fills carry.
+        """
+        if not orders:
+            return []
+        sides: Dict[int, str] = {}
+        for order in orders:
+            side = order["side"]
+            counter = "sell" if side == "buy" else "buy"
+            self.order_book.queue_order(counter, order["price"], order["quantity"] * 2, timestamp)
+            order_id = self.order_book.queue_order(side, order["price"], order["quantity"], timestamp)
+            order["order_id"] = order_id
+            sides[order_id] = side
+
+        executed: List[Trade] = []
+        for t in self.order_book.uncross(timestamp, reference_price=orders[0]["price"]):
+            order_id = t.buy_order_id if t.buy_order_id != -1 else t.sell_order_id
+            side = sides.get(order_id)
+            if side is None:
+                continue  # fake counterparty fill
+            self.trades.append(t, side=1 if side == "buy" else -1)
+            executed.append(t)
+            if side == "buy":
+                self.position += t.quantity
+                self.cash -= t.quantity * t.price
+            else:
+                self.position -= t.quantity
+                self.cash += t.quantity * t.price
+        return executed
+
+    def _route_orders(self, orders: List[Dict], timestamp: int) -> List[Trade]:
+        """Multi-venue execution through the smart order router."""
+        executed: List[Trade] = []
+        for order in orders:
+            side = order["side"]
+            report = self.router.route(side, order["quantity"], timestamp, limit_price=order["price"])
+            for t in report["trades"]:
+                self.trades.append(t, side=1 if side == "buy" else -1)
+                executed.append(t)
+            for fill in report["fills"]:
+                self.fills.append({**fill, "side": side, "timestamp": timestamp})
+
+            notional = report["filled"] * (report["avg_price"] or 0.0)
+            if side == "buy":
+                self.position += report["filled"]
+                self.cash -= notional
+            else:
+                self.position -= report["filled"]
+                self.cash += notional
+            self.cash -= report["fees"]
+            self.fees_paid += report["fees"]
+        return executed
+
     def step(self, market_state: Dict) -> Dict:
         self.current_step = market_state.get("index", self.current_step)
         price = market_state["price"]
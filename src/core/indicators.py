@@ -0,0 +1,76 @@
+"""
+Window-local indicator kernels.
+
+rolling_sum / rolling_mean are O(n) whatever the window, without a running
+sum carried along the series: rows are cut into blocks of `window` rows
+aligned to absolute row numbers, and each window is the suffix sum of one
+block plus the prefix sum of the next (the van Herk / Gil-Werman split).
+A value therefore depends only on the `window` inputs it covers and on
+their absolute position, and there is no drift to re-base. Any block of a
+series computed with `window - 1` rows of history and its `offset` matches
+the full-series result bit for bit, which is what the streaming loader and
+the batched Monte Carlo paths rely on.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_sum(values: np.ndarray, window: int, axis: int = -1, offset: int = 0) -> np.ndarray:
+    """
+    Trailing sum over `window` along `axis`, NaN for the first window - 1 rows.
+    offset: absolute row number of the first row (for blocks of a longer series).
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.moveaxis(values, axis, -1)
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if n >= window:
+        front = offset % window
+        size = -(-(front + n) // window) * window
+        padded = np.zeros(values.shape[:-1] + (size,))
+        padded[..., front:front + n] = values
+        blocks = padded.reshape(values.shape[:-1] + (size // window, window))
+        prefix = np.cumsum(blocks, axis=-1).reshape(padded.shape)
+        suffix = np.cumsum(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+        # Padded position of each window's last row; windows ending a block are one prefix
+        end = np.arange(front + window - 1, front + n)
+        head = np.where(end % window == window - 1, 0.0, suffix[..., end - window + 1])
+        out[..., window - 1:] = head + prefix[..., end]
+    return np.moveaxis(out, -1, axis)
+
+
+def rolling_mean(values: np.ndarray, window: int, axis: int = -1, offset: int = 0) -> np.ndarray:
+    """Trailing mean over `window` along `axis`, NaN for the first window - 1 rows."""
+    return rolling_sum(values, window, axis=axis, offset=offset) / window
+
+
+def _rolling_reduce(values: np.ndarray, window: int, reduce) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = reduce(sliding_window_view(values, window, axis=-1), axis=-1)
+    return out
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing max over `window` along the last axis, NaN for the first window - 1 rows."""
+    return _rolling_reduce(values, window, np.max)
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing min over `window` along the last axis, NaN for the first window - 1 rows."""
+    return _rolling_reduce(values, window, np.min)
+
+
+def rsi(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    Relative strength index with simple (not Wilder) averages of gains and
+    losses, so it stays window-local. NaN for the first `window` rows.
+    """
+    close = np.asarray(close, dtype=float)
+    diff = np.diff(close, axis=-1, prepend=np.nan)
+    gain = rolling_mean(np.maximum(diff, 0.0), window)
+    loss = rolling_mean(np.maximum(-diff, 0.0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+    return np.where(np.isnan(gain) | np.isnan(loss), np.nan, out)
@@ -0,0 +1,233 @@
+"""
+Append-only, memory-mapped event journal for the OrderBook.
+
+Every book mutation (add, match, clear) and every fill is written as one
+fixed-width 48-byte record into a memory-mapped file. Records carry a
+1-based sequence number, so a torn tail after a crash is detected by the
+first slot whose seq is not the expected one.
+
+Replay rebuilds the book at any sequence number: start from the nearest
+snapshot at or before it (written every `snapshot_every` records next to the
+journal), then fold the remaining records in with vectorized group-sums per
+(side, price) instead of re-running the matching logic record by record.
+"""
+from typing import Dict, List, Optional
+import os
+import bisect
+import numpy as np
+
+from src.core.order_book import OrderBook
+
+
+MAGIC = b"OBJRNL01"
+HEADER_SIZE = 64
+
+# Event kinds
+ADD = 1      # resting quantity added at (side, price)
+MATCH = 2    # resting quantity removed at (side, price) by an aggressor
+CLEAR = 3    # book cleared
+FILL = 4     # trade; order_id = buy id, aux_id = sell id
+
+BUY = 1
+SELL = -1
+
+RECORD_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("kind", "u1"),
+    ("side", "i1"),
+    ("_pad", "V6"),
+    ("order_id", "<i8"),
+    ("aux_id", "<i8"),
+    ("price", "<f8"),
+    ("quantity", "<f8"),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize  # 48 bytes
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("record_size", "<u4"),
+    ("_pad", "V4"),
+    ("count", "<u8"),
+])
+
+
+class EventJournal:
+    def __init__(self, path: str, snapshot_every: int = 100_000, initial_records: int = 65_536):
+        """
+        path: journal file; created if missing, recovered and appended to if present.
+        snapshot_every: write a book snapshot every N records (0 disables).
+        """
+        self.path = path
+        self.snapshot_dir = path + ".snapshots"
+        self.snapshot_every = snapshot_every
+        self._last_snapshot_seq: int = 0
+
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                header = np.zeros(1, dtype=HEADER_DTYPE)
+                header["magic"] = MAGIC
+                header["record_size"] = RECORD_SIZE
+                f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+                f.truncate(HEADER_SIZE + initial_records * RECORD_SIZE)
+
+        self._map()
+        if self._header["magic"][0] != MAGIC or self._header["record_size"][0] != RECORD_SIZE:
+            raise ValueError(f"{path} is not an order book journal")
+        self.count: int = self._recover()
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.snapshot_seqs: List[int] = sorted(
+            int(name.split(".")[0]) for name in os.listdir(self.snapshot_dir) if name.endswith(".npz")
+        )
+        self._last_snapshot_seq = self.snapshot_seqs[-1] if self.snapshot_seqs else 0
+
+    # ------------------------------------------------------------------
+    # File mapping
+    # ------------------------------------------------------------------
+    def _map(self):
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode="r+")
+        self._header = self._mm[:HEADER_SIZE][: HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        self.records = self._mm[HEADER_SIZE:].view(RECORD_DTYPE)
+
+    def _grow(self):
+        capacity = len(self.records)
+        self.flush()
+        del self.records, self._header, self._mm
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + 2 * capacity * RECORD_SIZE)
+        self._map()
+
+    def _recover(self) -> int:
+        """
+        Committed count from the header, extended over any records written
+        after the last flush (seq must continue 1, 2, 3, ...).
+        """
+        count = int(self._header["count"][0])
+        tail = self.records["seq"][count:]
+        expected = np.arange(count + 1, count + 1 + len(tail), dtype=np.uint64)
+        bad = np.flatnonzero(tail != expected)
+        count += int(bad[0]) if len(bad) else len(tail)
+        self.records[count:][self.records["seq"][count:] != 0] = np.zeros(1, dtype=RECORD_DTYPE)
+        self._header["count"] = count
+        return count
+
+    def flush(self):
+        """Publish the record count and flush dirty pages to disk."""
+        self._header["count"] = self.count
+        self._mm.flush()
+
+    def close(self):
+        self.flush()
+        del self.records, self._header, self._mm
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, kind: int, side: int = 0, price: float = 0.0, quantity: float = 0.0,
+               order_id: int = 0, aux_id: int = 0) -> int:
+        """Append one record. Returns its sequence number."""
+        if self.count == len(self.records):
+            self._grow()
+        seq = self.count + 1
+        self.records[self.count] = (seq, kind, side, b"\0" * 6, order_id, aux_id, price, quantity)
+        self.count = seq
+        return seq
+
+    def record_add(self, side: str, price: float, quantity: float, order_id: int) -> int:
+        return self.append(ADD, BUY if side == "buy" else SELL, price, quantity, order_id)
+
+    def record_match(self, resting_side: str, price: float, quantity: float, order_id: int) -> int:
+        return self.append(MATCH, BUY if resting_side == "buy" else SELL, price, quantity, order_id)
+
+    def record_fill(self, aggressor_side: str, price: float, quantity: float,
+                    buy_order_id: int, sell_order_id: int) -> int:
+        return self.append(FILL, BUY if aggressor_side == "buy" else SELL, price, quantity,
+                           buy_order_id, sell_order_id)
+
+    def record_clear(self) -> int:
+        return self.append(CLEAR)
+
+    def maybe_snapshot(self, book: OrderBook):
+        """Write a snapshot if `snapshot_every` records passed since the last one."""
+        if self.snapshot_every and self.count - self._last_snapshot_seq >= self.snapshot_every:
+            self.snapshot(book)
+
+    def snapshot(self, book: OrderBook) -> int:
+        """Checkpoint the book state at the current sequence number."""
+        seq = self.count
+        self.flush()
+        np.savez(
+            os.path.join(self.snapshot_dir, f"{seq:020d}.npz"),
+            bid_prices=np.fromiter(book.bids.keys(), dtype=float, count=len(book.bids)),
+            bid_quantities=np.fromiter(book.bids.values(), dtype=float, count=len(book.bids)),
+            ask_prices=np.fromiter(book.asks.keys(), dtype=float, count=len(book.asks)),
+            ask_quantities=np.fromiter(book.asks.values(), dtype=float, count=len(book.asks)),
+            stats=np.array([book.next_order_id, book.total_volume, book.trade_count], dtype=float),
+        )
+        if not self.snapshot_seqs or self.snapshot_seqs[-1] < seq:
+            self.snapshot_seqs.append(seq)
+        self._last_snapshot_seq = seq
+        return seq
+
+    # ------------------------------------------------------------------
+    # Reading / replay
+    # ------------------------------------------------------------------
+    def events(self, start_seq: int = 1, end_seq: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of records with start_seq <= seq <= end_seq."""
+        end_seq = self.count if end_seq is None else min(end_seq, self.count)
+        return self.records[max(0, start_seq - 1):end_seq]
+
+    def _load_snapshot(self, seq: int) -> Dict:
+        with np.load(os.path.join(self.snapshot_dir, f"{seq:020d}.npz")) as snap:
+            return {key: snap[key] for key in snap.files}
+
+    def replay(self, seq: Optional[int] = None) -> OrderBook:
+        """
+        Rebuild the order book as it was right after record `seq`
+        (default: the latest record). The returned book is not journaled.
+        """
+        seq = self.count if seq is None else min(seq, self.count)
+
+        i = bisect.bisect_right(self.snapshot_seqs, seq) - 1
+        base_seq = self.snapshot_seqs[i] if i >= 0 else 0
+        base = self._load_snapshot(base_seq) if base_seq else None
+        events = self.events(base_seq + 1, seq)
+
+        # Order ids keep counting across clears
+        next_order_id = int(base["stats"][0]) if base is not None else 1
+        if len(events):
+            next_order_id = max(next_order_id, int(events["order_id"].max()) + 1, int(events["aux_id"].max()) + 1)
+
+        # A clear wipes everything before it
+        clears = np.flatnonzero(events["kind"] == CLEAR)
+        if len(clears):
+            events = events[clears[-1] + 1:]
+            base = None
+
+        book = OrderBook()
+        book.next_order_id = next_order_id
+        levels = {BUY: {}, SELL: {}}
+        if base is not None:
+            levels[BUY] = dict(zip(base["bid_prices"].tolist(), base["bid_quantities"].tolist()))
+            levels[SELL] = dict(zip(base["ask_prices"].tolist(), base["ask_quantities"].tolist()))
+            book.total_volume = float(base["stats"][1])
+            book.trade_count = int(base["stats"][2])
+
+        kind = events["kind"]
+        for side in (BUY, SELL):
+            mask = ((kind == ADD) | (kind == MATCH)) & (events["side"] == side)
+            if not mask.any():
+                continue
+            signed = np.where(kind[mask] == ADD, events["quantity"][mask], -events["quantity"][mask])
+            prices, inverse = np.unique(events["price"][mask], return_inverse=True)
+            deltas = np.bincount(inverse, weights=signed, minlength=len(prices))
+            for price, delta in zip(prices.tolist(), deltas.tolist()):
+                levels[side][price] = levels[side].get(price, 0.0) + delta
+
+        for side, target in ((BUY, book.bids), (SELL, book.asks)):
+            target.update({p: q for p, q in levels[side].items() if q > 1e-9})
+
+        fills = events[kind == FILL]
+        book.total_volume += float((fills["price"] * fills["quantity"]).sum())
+        book.trade_count += len(fills)
+        return book
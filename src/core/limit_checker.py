@@ -0,0 +1,314 @@
+"""
+Pre-trade limit checker for many strategies sharing firm-wide limits.
+
+All counters live in NumPy arrays indexed by (strategy, symbol), so a whole
+batch of proposals is approved with a handful of vectorized passes:
+
+- order rate: token bucket per strategy (rate tokens/sec, burst capacity)
+- position: |position| per (strategy, symbol)
+- notional: gross notional per strategy, per symbol and firm-wide
+
+Within a batch, proposals are applied in arrival order and rejected orders
+do not consume limits, so the result is exactly that of checking the same
+orders one at a time. A pass checks a window of orders as if all of them
+were approved; the prefix before the first failure is approved, the failing
+order rejected, and the next pass starts right after it. The window doubles
+after a pass without rejections and shrinks after one with a rejection, so
+a batch costs a few vectorized passes plus roughly one short pass per
+rejection.
+
+Exposure is valued at the symbol's mark price (a symbol never marked takes
+the first price it is seen at). With book=False approvals only take order
+rate tokens, and positions / notionals are booked from actual fills through
+book_fills().
+"""
+from typing import Dict, Optional, Sequence, Tuple
+import time
+import numpy as np
+
+
+# Reason codes returned per proposal
+OK = 0
+RATE_LIMIT = 1
+POSITION_LIMIT = 2
+STRATEGY_NOTIONAL = 3
+SYMBOL_NOTIONAL = 4
+FIRM_NOTIONAL = 5
+
+REASONS = (
+    "Within limits",
+    "Order rate limit",
+    "Position limit",
+    "Strategy notional limit",
+    "Symbol notional limit",
+    "Firm notional limit",
+)
+
+
+def _grouped_cumsum(values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Running sum of `values` within each key, in the original order."""
+    order = np.argsort(keys, kind="stable")
+    sorted_vals = values[order]
+    sorted_keys = keys[order]
+    csum = np.cumsum(sorted_vals)
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    offsets = np.repeat(csum[starts] - sorted_vals[starts], np.diff(np.r_[starts, len(keys)]))
+    out = np.empty_like(csum)
+    out[order] = csum - offsets
+    return out
+
+
+class LimitChecker:
+    # Orders per vectorized pass: grows while passes approve everything, shrinks after a rejection
+    PASS_WINDOW = (16, 4096)
+
+    def __init__(
+        self,
+        n_strategies: int,
+        n_symbols: int,
+        position_limit: float = np.inf,
+        strategy_notional_limit: float = np.inf,
+        symbol_notional_limit: float = np.inf,
+        firm_notional_limit: float = np.inf,
+        order_rate: float = np.inf,
+        order_burst: Optional[float] = None,
+    ):
+        """
+        Limits may be scalars or arrays broadcastable to:
+          position_limit            (n_strategies, n_symbols)
+          strategy_notional_limit   (n_strategies,)
+          symbol_notional_limit     (n_symbols,)
+          order_rate / order_burst  (n_strategies,)  tokens per second / bucket size
+        """
+        self.n_strategies = n_strategies
+        self.n_symbols = n_symbols
+
+        self.position_limit = np.broadcast_to(np.asarray(position_limit, dtype=float), (n_strategies, n_symbols)).copy()
+        self.strategy_notional_limit = np.broadcast_to(np.asarray(strategy_notional_limit, dtype=float), (n_strategies,)).copy()
+        self.symbol_notional_limit = np.broadcast_to(np.asarray(symbol_notional_limit, dtype=float), (n_symbols,)).copy()
+        self.firm_notional_limit = float(firm_notional_limit)
+
+        self.order_rate = np.broadcast_to(np.asarray(order_rate, dtype=float), (n_strategies,)).copy()
+        burst = self.order_rate if order_burst is None else order_burst
+        self.order_burst = np.broadcast_to(np.asarray(burst, dtype=float), (n_strategies,)).copy()
+        self.tokens = self.order_burst.copy()
+        self.last_refill: Optional[float] = None
+
+        # Counters
+        self.positions = np.zeros((n_strategies, n_symbols))
+        self.mark_prices = np.zeros(n_symbols)
+        self.strategy_notional = np.zeros(n_strategies)
+        self.symbol_notional = np.zeros(n_symbols)
+        self.firm_notional: float = 0.0
+
+        # Statistics for monitoring
+        self.checked: int = 0
+        self.rejected: int = 0
+
+    # ------------------------------------------------------------------
+    # State updates
+    # ------------------------------------------------------------------
+    def mark(self, prices: Sequence[float]):
+        """Re-mark notional counters at new symbol prices. O(strategies * symbols)."""
+        self.mark_prices = np.asarray(prices, dtype=float).reshape(self.n_symbols).copy()
+        self._recompute_notional()
+
+    def set_positions(self, positions: np.ndarray):
+        """Overwrite positions (e.g. from a reconciliation) and re-derive notionals."""
+        self.positions = np.asarray(positions, dtype=float).reshape(self.n_strategies, self.n_symbols).copy()
+        self._recompute_notional()
+
+    def _recompute_notional(self):
+        gross = np.abs(self.positions) * self.mark_prices
+        self.strategy_notional = gross.sum(axis=1)
+        self.symbol_notional = gross.sum(axis=0)
+        self.firm_notional = float(gross.sum())
+
+    def _refill(self, now: float):
+        if self.last_refill is not None:
+            elapsed = max(0.0, now - self.last_refill)
+            with np.errstate(invalid="ignore"):
+                self.tokens = np.minimum(self.order_burst, self.tokens + self.order_rate * elapsed)
+        self.last_refill = now
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+    def _mark_unmarked(self, symbol: np.ndarray, price: np.ndarray):
+        """Give symbols without a mark price the first price they are seen at."""
+        unmarked = self.mark_prices[symbol] <= 0
+        if not unmarked.any():
+            return
+        syms, first = np.unique(symbol[unmarked], return_index=True)
+        self.mark_prices[syms] = price[unmarked][first]
+        self._recompute_notional()
+
+    def approve_batch(
+        self,
+        strategy: Sequence[int],
+        symbol: Sequence[int],
+        quantity: Sequence[float],
+        price: Sequence[float],
+        now: Optional[float] = None,
+        commit: bool = True,
+        book: bool = True,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Check a batch of proposals in arrival order.
+
+        strategy, symbol: integer ids
+        quantity: signed size (+ buy, - sell)
+        price: order price; only used as mark for symbols not yet marked
+
+        Returns (approved bool array, reason code array). With commit=True the
+        approved orders take their order rate tokens and, with book=True, are
+        applied to positions and notionals as if filled.
+        """
+        strategy = np.asarray(strategy, dtype=np.intp)
+        symbol = np.asarray(symbol, dtype=np.intp)
+        quantity = np.asarray(quantity, dtype=float)
+        price = np.asarray(price, dtype=float)
+        n = len(quantity)
+
+        self._refill(time.monotonic() if now is None else now)
+        self._mark_unmarked(symbol, price)
+        reasons = np.zeros(n, dtype=np.uint8)
+        approved = np.zeros(n, dtype=bool)
+
+        # Working copies of the counters, advanced past every approved prefix
+        tokens = self.tokens.copy()
+        positions = self.positions.copy()
+        strategy_notional = self.strategy_notional.copy()
+        symbol_notional = self.symbol_notional.copy()
+        firm_notional = self.firm_notional
+
+        pair = strategy * self.n_symbols + symbol
+        mark = self.mark_prices[symbol]
+        min_window, max_window = self.PASS_WINDOW
+        window = max_window
+        p = 0
+        while p < n:
+            w = slice(p, min(n, p + window))
+            st, sy, q = strategy[w], symbol[w], quantity[w]
+            m = len(q)
+
+            pos_after = positions[st, sy] + _grouped_cumsum(q, pair[w])
+            abs_delta = np.abs(pos_after) - np.abs(pos_after - q)
+            notional_delta = abs_delta * mark[w]
+            strat_usage = strategy_notional[st] + _grouped_cumsum(notional_delta, st)
+            sym_usage = symbol_notional[sy] + _grouped_cumsum(notional_delta, sy)
+            firm_usage = firm_notional + np.cumsum(notional_delta)
+
+            # Lowest code wins when several limits fail; only orders that add exposure can fail them
+            failed = np.zeros(m, dtype=np.uint8)
+            failed[firm_usage > self.firm_notional_limit] = FIRM_NOTIONAL
+            failed[sym_usage > self.symbol_notional_limit[sy]] = SYMBOL_NOTIONAL
+            failed[strat_usage > self.strategy_notional_limit[st]] = STRATEGY_NOTIONAL
+            failed[np.abs(pos_after) > self.position_limit[st, sy]] = POSITION_LIMIT
+            failed[abs_delta <= 0] = OK
+            # The k-th order (1-based) of a strategy in the window needs k tokens
+            rank = _grouped_cumsum(np.ones(m), st)
+            failed[rank > np.floor(tokens[st] + 1e-9)] = RATE_LIMIT
+
+            bad = np.flatnonzero(failed)
+            ok = int(bad[0]) if len(bad) else m
+            if ok:
+                done = slice(p, p + ok)
+                approved[done] = True
+                np.add.at(positions, (strategy[done], symbol[done]), quantity[done])
+                tokens -= np.bincount(strategy[done], minlength=self.n_strategies)
+                np.add.at(strategy_notional, strategy[done], notional_delta[:ok])
+                np.add.at(symbol_notional, symbol[done], notional_delta[:ok])
+                firm_notional += float(notional_delta[:ok].sum())
+            if len(bad):
+                # Past a rejection the rest of the window is checked one order at a time
+                firm_notional = self._check_sequential(
+                    p + ok, p + m, pair, quantity, mark, approved, reasons,
+                    tokens, positions, strategy_notional, symbol_notional, firm_notional,
+                )
+                window = max(min_window, window // 4)
+            else:
+                window = min(max_window, 2 * window)
+            p += m
+
+        self.checked += n
+        self.rejected += int(n - approved.sum())
+
+        if commit:
+            self.tokens = tokens
+            if book:
+                self.positions = positions
+                self.strategy_notional = strategy_notional
+                self.symbol_notional = symbol_notional
+                self.firm_notional = firm_notional
+
+        return approved, reasons
+
+    def _check_sequential(self, lo, hi, pair, quantity, mark, approved, reasons,
+                          tokens, positions, strategy_notional, symbol_notional, firm_notional) -> float:
+        """Scalar checks of orders [lo, hi), updating the working counters in place."""
+        flat = positions.reshape(-1)
+        pairs = pair[lo:hi].tolist()
+        position_limit = self.position_limit.reshape(-1)[pair[lo:hi]].tolist()
+        strategy_limit = self.strategy_notional_limit.tolist()
+        symbol_limit = self.symbol_notional_limit.tolist()
+        firm_limit = self.firm_notional_limit
+        for j, (k, qty, price) in enumerate(zip(pairs, quantity[lo:hi].tolist(), mark[lo:hi].tolist())):
+            st, sy = divmod(k, self.n_symbols)
+            before = flat[k].item()
+            after = before + qty
+            delta = (abs(after) - abs(before)) * price
+            reason = OK
+            if tokens[st] + 1e-9 < 1.0:
+                reason = RATE_LIMIT
+            elif delta > 0:
+                if abs(after) > position_limit[j]:
+                    reason = POSITION_LIMIT
+                elif strategy_notional[st] + delta > strategy_limit[st]:
+                    reason = STRATEGY_NOTIONAL
+                elif symbol_notional[sy] + delta > symbol_limit[sy]:
+                    reason = SYMBOL_NOTIONAL
+                elif firm_notional + delta > firm_limit:
+                    reason = FIRM_NOTIONAL
+            if reason != OK:
+                reasons[lo + j] = reason
+                continue
+            approved[lo + j] = True
+            flat[k] = after
+            tokens[st] -= 1.0
+            strategy_notional[st] += delta
+            symbol_notional[sy] += delta
+            firm_notional += delta
+        return firm_notional
+
+    def book_fills(self, strategy: Sequence[int], symbol: Sequence[int], quantity: Sequence[float],
+                   price: Sequence[float]):
+        """
+        Apply signed fills to positions and notionals, for approvals made
+        with book=False. price only marks symbols not yet marked.
+        """
+        strategy = np.asarray(strategy, dtype=np.intp)
+        symbol = np.asarray(symbol, dtype=np.intp)
+        quantity = np.asarray(quantity, dtype=float)
+        self._mark_unmarked(symbol, np.asarray(price, dtype=float))
+
+        pos_after = self.positions[strategy, symbol] + _grouped_cumsum(quantity, strategy * self.n_symbols + symbol)
+        notional_delta = (np.abs(pos_after) - np.abs(pos_after - quantity)) * self.mark_prices[symbol]
+        np.add.at(self.positions, (strategy, symbol), quantity)
+        np.add.at(self.strategy_notional, strategy, notional_delta)
+        np.add.at(self.symbol_notional, symbol, notional_delta)
+        self.firm_notional += float(notional_delta.sum())
+
+    def check(self, strategy: int, symbol: int, quantity: float, price: float, now: Optional[float] = None,
+              book: bool = True) -> Dict:
+        """Single-proposal convenience wrapper around approve_batch."""
+        approved, reasons = self.approve_batch([strategy], [symbol], [quantity], [price], now=now, book=book)
+        return {"approved": bool(approved[0]), "reason": REASONS[reasons[0]]}
+
+    def get_stats(self) -> Dict:
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "firm_notional": self.firm_notional,
+            "firm_notional_limit": self.firm_notional_limit,
+        }
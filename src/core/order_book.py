@@ -3,11 +3,15 @@ Optimized Limit Order Book implementation with efficient matching logic.
 Uses SortedDict for O(log n) operations instead of O(n).
 """
 from typing import List, Dict, Optional
+from collections import OrderedDict
 from dataclasses import dataclass
 from sortedcontainers import SortedDict
+import numpy as np
 
+from src.core.auction import uncross
 
-@dataclass
+
+@dataclass(slots=True)
 class Order:
     order_id: int
     side: str        # 'buy' or 'sell'
@@ -16,7 +20,7 @@ class Order:
     timestamp: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     buy_order_id: int
     sell_order_id: int
@@ -33,7 +37,11 @@ class OrderBook:
     - Aggregated by price level
     """
 
-    def __init__(self):
+    def __init__(self, journal=None):
+        """
+        journal: optional EventJournal; every add / match / clear and every
+        fill is appended to it so the book can be rebuilt by replay.
+        """
         # Use SortedDict for O(log n) operations
         self.bids: SortedDict = SortedDict()  # price -> quantity (descending)
         self.asks: SortedDict = SortedDict()  # price -> quantity (ascending)
@@ -43,6 +51,37 @@ class OrderBook:
         self.total_volume: float = 0.0
         self.trade_count: int = 0
 
+        self.journal = journal
+
+        # Incremental depth: (side, price) -> seq of its last change, oldest first.
+        # Capped at max_level_changes; older entries are evicted and readers
+        # behind _trim_seq get the full book instead of a diff.
+        self.depth_seq: int = 0
+        self._level_changes: "OrderedDict[tuple, int]" = OrderedDict()
+        self._reset_seq: int = 0  # seq of the last clear()
+        self._trim_seq: int = 0   # seq of the newest evicted change
+        self.max_level_changes: int = 10_000
+
+        # Optional cumulative-depth index, see DepthIndex.attach()
+        self.depth_index = None
+
+        # Call auction mode: orders are queued and cleared together by uncross()
+        self.auction_mode: bool = False
+        self.auction_allocation: str = "pro_rata"
+        self._auction_orders: List[Order] = []
+
+    def _touch(self, side: str, price: float):
+        """Record that a price level changed. O(1)."""
+        self.depth_seq += 1
+        key = (side, price)
+        self._level_changes[key] = self.depth_seq
+        self._level_changes.move_to_end(key)
+        if len(self._level_changes) > self.max_level_changes:
+            _, self._trim_seq = self._level_changes.popitem(last=False)
+        if self.depth_index is not None:
+            levels = self.bids if side == "buy" else self.asks
+            self.depth_index.update(side, price, levels.get(price, 0.0))
+
     def _get_best_bid_price(self) -> Optional[float]:
         """O(1) operation with SortedDict"""
         return self.bids.keys()[-1] if self.bids else None
@@ -97,6 +136,144 @@ class OrderBook:
             "mid_price": self.get_mid_price()
         }
 
+    def get_depth_updates(self, since_seq: int = 0) -> Dict:
+        """
+        Price levels changed after `since_seq`, newest change per level only.
+        Walks the change log backwards, so the cost is O(changes), not O(levels).
+
+        Returns:
+        {
+            "seq": int,        # pass back as since_seq next time
+            "reset": bool,     # True: drop local state first (book was cleared,
+                               # or since_seq is older than the change log)
+            "bids": [{"price", "quantity"}],   # quantity 0.0 = level removed
+            "asks": [{"price", "quantity"}],
+        }
+        """
+        if since_seq < self._trim_seq and self._trim_seq > self._reset_seq:
+            # Changes after since_seq were evicted from the log: send the whole book
+            return {
+                "seq": self.depth_seq,
+                "reset": True,
+                "bids": [{"price": p, "quantity": q} for p, q in reversed(self.bids.items())],
+                "asks": [{"price": p, "quantity": q} for p, q in self.asks.items()],
+            }
+
+        reset = since_seq < self._reset_seq
+        if reset:
+            since_seq = self._reset_seq
+
+        bids: List[Dict] = []
+        asks: List[Dict] = []
+        for (side, price), seq in reversed(self._level_changes.items()):
+            if seq <= since_seq:
+                break
+            if side == "buy":
+                bids.append({"price": price, "quantity": self.bids.get(price, 0.0)})
+            else:
+                asks.append({"price": price, "quantity": self.asks.get(price, 0.0)})
+
+        return {"seq": self.depth_seq, "reset": reset, "bids": bids, "asks": asks}
+
+    def set_auction_mode(self, enabled: bool = True, allocation: str = "pro_rata"):
+        """
+        Switch between continuous matching and call auctions.
+        allocation: "pro_rata" or "time" for the marginal price level.
+        """
+        if allocation not in ("pro_rata", "time"):
+            raise ValueError("allocation must be 'pro_rata' or 'time'")
+        self.auction_mode = enabled
+        self.auction_allocation = allocation
+
+    def queue_order(self, side: str, price: float, quantity: float, timestamp: int) -> int:
+        """Add an order to the next auction without matching it. Returns its id."""
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be 'buy' or 'sell'")
+        order_id = self.next_order_id
+        self.next_order_id += 1
+        self._auction_orders.append(
+            Order(order_id=order_id, side=side, price=price, quantity=quantity, timestamp=timestamp)
+        )
+        return order_id
+
+    def uncross(self, timestamp: int, reference_price: Optional[float] = None) -> List[Trade]:
+        """
+        Clear all queued orders together with the resting book at the single
+        volume-maximizing price. Resting levels keep time priority over queued
+        orders. Unfilled remainders rest in the book at their limit price.
+        Returns one trade per filled queued order, all at the clearing price.
+        """
+        queued = self._auction_orders
+        self._auction_orders = []
+        if not queued:
+            return []
+
+        n_bids, n_asks = len(self.bids), len(self.asks)
+        side = np.concatenate([
+            np.ones(n_bids), -np.ones(n_asks),
+            [1.0 if o.side == "buy" else -1.0 for o in queued],
+        ])
+        price = np.concatenate([
+            np.fromiter(self.bids.keys(), float, n_bids),
+            np.fromiter(self.asks.keys(), float, n_asks),
+            [o.price for o in queued],
+        ])
+        quantity = np.concatenate([
+            np.fromiter(self.bids.values(), float, n_bids),
+            np.fromiter(self.asks.values(), float, n_asks),
+            [o.quantity for o in queued],
+        ])
+        priority = np.concatenate([np.full(n_bids + n_asks, -1.0), np.arange(len(queued), dtype=float)])
+
+        result = uncross(side, price, quantity, priority, self.auction_allocation, reference_price)
+        remaining = quantity - result["filled"]
+
+        # Rebuild the levels from what is left and report the changes
+        new_levels = {"buy": {}, "sell": {}}
+        for s_, p, q in zip(side.tolist(), price.tolist(), remaining.tolist()):
+            if q > 1e-12 and 0 < p < float("inf"):
+                levels = new_levels["buy" if s_ > 0 else "sell"]
+                levels[p] = levels.get(p, 0.0) + q
+        for name, book_side in (("buy", self.bids), ("sell", self.asks)):
+            target = new_levels[name]
+            for p in set(book_side.keys()) | set(target.keys()):
+                old, new = book_side.get(p, 0.0), target.get(p, 0.0)
+                if old == new:
+                    continue
+                if self.journal is not None:
+                    if new > old:
+                        self.journal.record_add(name, p, new - old, 0)
+                    else:
+                        self.journal.record_match(name, p, old - new, 0)
+                if new > 0:
+                    book_side[p] = new
+                else:
+                    del book_side[p]
+                self._touch(name, p)
+
+        trades: List[Trade] = []
+        clearing = result["price"]
+        offset = n_bids + n_asks
+        for i, o in enumerate(queued):
+            qty = float(result["filled"][offset + i])
+            if qty <= 0:
+                continue
+            trades.append(Trade(
+                buy_order_id=o.order_id if o.side == "buy" else -1,
+                sell_order_id=o.order_id if o.side == "sell" else -1,
+                price=clearing,
+                quantity=qty,
+                timestamp=timestamp,
+            ))
+            self.total_volume += qty * clearing
+            self.trade_count += 1
+            if self.journal is not None:
+                self.journal.record_fill(o.side, clearing, qty, trades[-1].buy_order_id, trades[-1].sell_order_id)
+
+        if self.journal is not None:
+            self.journal.maybe_snapshot(self)
+        return trades
+
     def place_order(self, side: str, price: float, quantity: float, timestamp: int) -> List[Trade]:
         """
         Place a new limit order and try to match it against the book.
@@ -104,6 +281,10 @@ class OrderBook:
         
         Optimized with SortedDict for faster matching.
         """
+        if self.auction_mode:
+            self.queue_order(side, price, quantity, timestamp)
+            return []
+
         order_id = self.next_order_id
         self.next_order_id += 1
         order = Order(order_id=order_id, side=side, price=price, quantity=quantity, timestamp=timestamp)
@@ -122,6 +303,11 @@ class OrderBook:
             self.total_volume += trade.quantity * trade.price
             self.trade_count += 1
 
+        if self.journal is not None:
+            for trade in trades:
+                self.journal.record_fill(side, trade.price, trade.quantity, trade.buy_order_id, trade.sell_order_id)
+            self.journal.maybe_snapshot(self)
+
         return trades
 
     def _match_buy(self, order: Order) -> List[Trade]:
@@ -149,16 +335,22 @@ class OrderBook:
 
             # Update quantities
             order.quantity -= trade_qty
+            if self.journal is not None:
+                self.journal.record_match("sell", best_ask, trade_qty, order.order_id)
             self.asks[best_ask] -= trade_qty
             if self.asks[best_ask] <= 0:
                 del self.asks[best_ask]
+            self._touch("sell", best_ask)
 
         # If remaining quantity > 0, add to bids
         if order.quantity > 0:
+            if self.journal is not None:
+                self.journal.record_add("buy", order.price, order.quantity, order.order_id)
             if order.price in self.bids:
                 self.bids[order.price] += order.quantity
             else:
                 self.bids[order.price] = order.quantity
+            self._touch("buy", order.price)
 
         return trades
 
@@ -185,22 +377,35 @@ class OrderBook:
             )
 
             order.quantity -= trade_qty
+            if self.journal is not None:
+                self.journal.record_match("buy", best_bid, trade_qty, order.order_id)
             self.bids[best_bid] -= trade_qty
             if self.bids[best_bid] <= 0:
                 del self.bids[best_bid]
+            self._touch("buy", best_bid)
 
         # If remaining quantity > 0, add to asks
         if order.quantity > 0:
+            if self.journal is not None:
+                self.journal.record_add("sell", order.price, order.quantity, order.order_id)
             if order.price in self.asks:
                 self.asks[order.price] += order.quantity
             else:
                 self.asks[order.price] = order.quantity
+            self._touch("sell", order.price)
 
         return trades
     
     def clear(self):
         """Clear the order book"""
+        if self.journal is not None:
+            self.journal.record_clear()
         self.bids.clear()
         self.asks.clear()
+        self.depth_seq += 1
+        self._reset_seq = self.depth_seq
+        self._level_changes.clear()
+        if self.depth_index is not None:
+            self.depth_index.clear()
         self.total_volume = 0.0
         self.trade_count = 0
\ No newline at end of file
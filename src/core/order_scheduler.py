@@ -0,0 +1,193 @@
+"""
+Parent/child order scheduler for TWAP, VWAP and POV execution.
+
+Each parent order gets one row in a (parents x max_horizon) matrix holding
+the child quantity for every bar offset after its start. A step is then a
+single fancy-index into that matrix plus two masked sums, so hundreds of
+concurrent parents cost about the same as one:
+
+- twap: equal slices over `horizon` bars
+- vwap: slices proportional to an expected volume profile
+- pov:  a fixed fraction of each bar's traded volume (sized at run time)
+
+Buy and sell children due on the same bar are netted into one child. The
+parents only give up what was actually sent (confirm()), so quantity cut
+by a downstream cap stays with its parent and is swept by its last slice.
+"""
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+
+ALGOS = ("twap", "vwap", "pov")
+
+
+class OrderScheduler:
+    def __init__(self, max_horizon: int = 20, capacity: int = 64):
+        self.max_horizon = max_horizon
+        self.capacity = capacity
+        self.n: int = 0  # rows in use
+
+        self.sign = np.zeros(capacity)                   # +1 buy, -1 sell
+        self.start = np.zeros(capacity, dtype=np.int64)  # first bar index
+        self.horizon = np.zeros(capacity, dtype=np.int64)
+        self.remaining = np.zeros(capacity)
+        self.pov_rate = np.zeros(capacity)               # > 0 only for POV parents
+        self.schedule = np.zeros((capacity, max_horizon))
+        self.parent_ids = np.zeros(capacity, dtype=np.int64)
+        self.next_parent_id: int = 1
+        self._due: Optional[tuple] = None  # (rows, child qty) of the last due(), until confirm()
+
+        # Statistics for monitoring
+        self.crossed: float = 0.0  # quantity netted between buy and sell children
+        self.expired: float = 0.0  # quantity left when a parent's window ended
+
+    def __len__(self) -> int:
+        return int((self.remaining[: self.n] > 0).sum())
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in ("sign", "start", "horizon", "remaining", "pov_rate", "parent_ids"):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[: self.n] = old[: self.n]
+            setattr(self, name, new)
+        schedule = np.zeros((self.capacity, self.max_horizon))
+        schedule[: self.n] = self.schedule[: self.n]
+        self.schedule = schedule
+
+    def _compact(self):
+        """Drop finished parents so the per-step arrays stay small."""
+        keep = np.flatnonzero(self.remaining[: self.n] > 0)
+        self._due = None  # row numbers change
+        for name in ("sign", "start", "horizon", "remaining", "pov_rate", "parent_ids", "schedule"):
+            arr = getattr(self, name)
+            arr[: len(keep)] = arr[keep]
+        self.n = len(keep)
+
+    def submit(
+        self,
+        side: str,
+        quantity: float,
+        start: int,
+        algo: str = "twap",
+        horizon: int = 5,
+        volume_profile: Optional[Sequence[float]] = None,
+        pov_rate: float = 0.1,
+    ) -> int:
+        """
+        Add a parent order. Returns its parent id.
+
+        volume_profile: expected volume for each of the next `horizon` bars
+            (vwap only); slices are proportional to it.
+        pov_rate: fraction of each bar's volume to take (pov only).
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be 'buy' or 'sell'")
+        if algo not in ALGOS:
+            raise ValueError(f"algo must be one of {ALGOS}")
+        horizon = max(1, min(int(horizon), self.max_horizon))
+
+        if self.n == self.capacity:
+            self._compact()
+            if self.n == self.capacity:
+                self._grow()
+
+        row = self.n
+        self.n += 1
+        self.sign[row] = 1.0 if side == "buy" else -1.0
+        self.start[row] = start
+        self.horizon[row] = horizon
+        self.remaining[row] = quantity
+        self.pov_rate[row] = 0.0
+        self.schedule[row] = 0.0
+
+        if algo == "twap":
+            self.schedule[row, :horizon] = quantity / horizon
+        elif algo == "vwap":
+            profile = np.asarray(volume_profile if volume_profile is not None else np.ones(horizon), dtype=float)
+            profile = np.resize(profile, horizon)
+            total = profile.sum()
+            weights = profile / total if total > 0 else np.full(horizon, 1.0 / horizon)
+            self.schedule[row, :horizon] = quantity * weights
+        else:
+            self.pov_rate[row] = pov_rate
+            # Whatever is left at the last bar is swept so the parent completes
+            self.schedule[row, horizon - 1] = np.inf
+
+        parent_id = self.next_parent_id
+        self.next_parent_id += 1
+        self.parent_ids[row] = parent_id
+        return parent_id
+
+    def due(self, index: int, bar_volume: float = 0.0) -> Dict[str, float]:
+        """
+        Child quantity due at bar `index`, netted across sides, so at most one
+        of {"buy": qty, "sell": qty} is non-zero. Nothing is taken off the
+        parents until confirm() reports what was sent.
+        """
+        self._due = None
+        n = self.n
+        if n == 0:
+            return {"buy": 0.0, "sell": 0.0}
+
+        offset = index - self.start[:n]
+        # Parents whose window passed without being stepped are dropped
+        expired = (offset >= self.horizon[:n]) & (self.remaining[:n] > 0)
+        if expired.any():
+            self.expired += float(self.remaining[:n][expired].sum())
+            self.remaining[:n][expired] = 0.0
+        active = (offset >= 0) & (offset < self.horizon[:n]) & (self.remaining[:n] > 0)
+        if not active.any():
+            return {"buy": 0.0, "sell": 0.0}
+
+        rows = np.flatnonzero(active)
+        qty = self.schedule[rows, offset[rows]]
+        pov = self.pov_rate[rows] > 0
+        qty = np.where(pov & np.isfinite(qty), self.pov_rate[rows] * bar_volume, qty)
+        # Last scheduled slice absorbs rounding / unsent remainder
+        last = offset[rows] == self.horizon[rows] - 1
+        qty = np.where(last, self.remaining[rows], np.minimum(qty, self.remaining[rows]))
+        self._due = (rows, qty)
+
+        sign = self.sign[rows]
+        net = float(qty[sign > 0].sum() - qty[sign < 0].sum())
+        return {"buy": max(net, 0.0), "sell": max(-net, 0.0)}
+
+    def confirm(self, sent: float):
+        """
+        Take the last due() off the parents: the crossed part of both sides
+        plus `sent` of the net side, split pro rata over the children.
+        """
+        if self._due is None:
+            return
+        rows, qty = self._due
+        self._due = None
+        buys = self.sign[rows] > 0
+        buy, sell = float(qty[buys].sum()), float(qty[~buys].sum())
+        crossed = min(buy, sell)
+        done_buy = min(buy, crossed + (sent if buy > sell else 0.0))
+        done_sell = min(sell, crossed + (sent if sell > buy else 0.0))
+        fraction = np.where(buys, done_buy / buy if buy > 0 else 0.0, done_sell / sell if sell > 0 else 0.0)
+        remaining = self.remaining[rows] - qty * fraction
+        self.remaining[rows] = np.where(remaining > 1e-9, remaining, 0.0)
+        self.crossed += crossed
+
+    def pending(self) -> Dict[str, float]:
+        """Quantity not yet released to the market, per side."""
+        rem = self.remaining[: self.n]
+        sign = self.sign[: self.n]
+        return {"buy": float(rem[sign > 0].sum()), "sell": float(rem[sign < 0].sum())}
+
+    def get_parents(self) -> List[Dict]:
+        """Open parents for visualization"""
+        return [
+            {
+                "parent_id": int(self.parent_ids[i]),
+                "side": "buy" if self.sign[i] > 0 else "sell",
+                "start": int(self.start[i]),
+                "horizon": int(self.horizon[i]),
+                "remaining": float(self.remaining[i]),
+            }
+            for i in range(self.n)
+            if self.remaining[i] > 0
+        ]
@@ -0,0 +1,234 @@
+"""
+Rolling portfolio risk engine: volatility, VaR / CVaR and vol-targeted sizing.
+
+Per-bar returns of N symbols are kept in a fixed-size ring buffer. The
+running sum vector and cross-product matrix are maintained with rank-1
+updates (add the new return, subtract the one falling out of the window),
+so each bar costs O(N^2) and the covariance matrix is always available
+without rescanning the window.
+
+Pre-trade checks use the cached product C @ exposure, so the portfolio
+variance after a single-symbol trade is O(1):
+    var' = e'Ce + 2 * d * (Ce)_i + d^2 * C_ii
+"""
+from typing import Dict, Optional, Sequence
+from statistics import NormalDist
+import math
+import numpy as np
+
+
+class RiskEngine:
+    def __init__(
+        self,
+        n_symbols: int = 1,
+        window: int = 60,
+        confidence: float = 0.95,
+        periods_per_year: int = 252,
+        resync_every: Optional[int] = None,
+    ):
+        """
+        n_symbols: number of symbols tracked (columns of the return matrix).
+        window: rolling window length in bars.
+        confidence: VaR / CVaR confidence level (0.95 = 95%).
+        periods_per_year: bars per year, for annualized volatility.
+        resync_every: recompute the sums from the buffer every N updates to
+            stop floating-point drift of the rank-1 updates (default: window).
+        """
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.n_symbols = n_symbols
+        self.window = window
+        self.confidence = confidence
+        self.periods_per_year = periods_per_year
+        self.resync_every = resync_every or window
+
+        self.returns = np.zeros((window, n_symbols))
+        self.count: int = 0        # returns currently in the window
+        self.head: int = 0         # next ring-buffer slot to write
+        self.updates: int = 0
+        self.last_prices: Optional[np.ndarray] = None
+
+        self._sum = np.zeros(n_symbols)
+        self._cross = np.zeros((n_symbols, n_symbols))
+        self._cov: Optional[np.ndarray] = None
+
+        # Cached exposure state for O(1) pre-trade checks
+        self._exposure = np.zeros(n_symbols)
+        self._cov_exposure = np.zeros(n_symbols)
+        self._port_var: Optional[float] = 0.0   # None = stale, refreshed on demand
+
+        self._z = NormalDist().inv_cdf(confidence)
+        self._tail_density = NormalDist().pdf(self._z) / (1.0 - confidence)
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= 2
+
+    def update(self, prices: Sequence[float]) -> Optional[np.ndarray]:
+        """
+        Feed the latest close of every symbol. Returns this bar's simple
+        returns, or None on the first call.
+        """
+        prices = np.asarray(prices, dtype=float).reshape(self.n_symbols)
+        if self.last_prices is None:
+            self.last_prices = prices
+            return None
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(self.last_prices != 0, prices / self.last_prices - 1.0, 0.0)
+        self.last_prices = prices
+        self.add_returns(r)
+        return r
+
+    def add_returns(self, r: np.ndarray):
+        """Push one row of returns into the window with rank-1 updates."""
+        if self.count == self.window:
+            old = self.returns[self.head]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        else:
+            self.count += 1
+
+        self.returns[self.head] = r
+        self._sum += r
+        self._cross += np.outer(r, r)
+        self.head = (self.head + 1) % self.window
+
+        self.updates += 1
+        if self.updates % self.resync_every == 0:
+            window = self._window()
+            self._sum = window.sum(axis=0)
+            self._cross = window.T @ window
+
+        self._cov = None
+        self._port_var = None
+
+    def _window(self) -> np.ndarray:
+        """Returns currently in the window (unordered)."""
+        if self.count == self.window:
+            return self.returns
+        return self.returns[: self.count]
+
+    # ------------------------------------------------------------------
+    # Moments
+    # ------------------------------------------------------------------
+    def mean(self) -> np.ndarray:
+        return self._sum / self.count if self.count else np.zeros(self.n_symbols)
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of the window, cached until the next update."""
+        if self._cov is None:
+            if self.count < 2:
+                self._cov = np.zeros((self.n_symbols, self.n_symbols))
+            else:
+                m = self.count
+                self._cov = (self._cross - np.outer(self._sum, self._sum) / m) / (m - 1)
+        return self._cov
+
+    def volatility(self, annualize: bool = True) -> np.ndarray:
+        vol = np.sqrt(np.maximum(np.diag(self.covariance()), 0.0))
+        return vol * math.sqrt(self.periods_per_year) if annualize else vol
+
+    # ------------------------------------------------------------------
+    # VaR / CVaR (positive numbers = loss, in the units of the exposure)
+    # ------------------------------------------------------------------
+    def parametric_var(self, exposure: Optional[Sequence[float]] = None) -> Dict:
+        """Gaussian one-bar VaR and CVaR of a portfolio of currency exposures."""
+        e = self._as_exposure(exposure)
+        mu = float(self.mean() @ e)
+        sigma = math.sqrt(max(float(e @ self.covariance() @ e), 0.0))
+        return {
+            "var": -(mu - self._z * sigma),
+            "cvar": -(mu - self._tail_density * sigma),
+            "sigma": sigma,
+        }
+
+    def historical_var(self, exposure: Optional[Sequence[float]] = None) -> Dict:
+        """Empirical one-bar VaR and CVaR from the window's P&L distribution."""
+        if self.count == 0:
+            return {"var": 0.0, "cvar": 0.0}
+        e = self._as_exposure(exposure)
+        pnl = self._window() @ e
+        k = max(1, int(math.floor(len(pnl) * (1.0 - self.confidence))))
+        tail = np.partition(pnl, k - 1)[:k]
+        return {"var": -float(tail.max()), "cvar": -float(tail.mean())}
+
+    def _as_exposure(self, exposure: Optional[Sequence[float]]) -> np.ndarray:
+        if exposure is None:
+            return self._exposure
+        return np.asarray(exposure, dtype=float).reshape(self.n_symbols)
+
+    # ------------------------------------------------------------------
+    # Exposure tracking, sizing and pre-trade checks
+    # ------------------------------------------------------------------
+    def set_exposure(self, exposure: Sequence[float]):
+        """Current currency exposure per symbol (position * price)."""
+        self._exposure = np.asarray(exposure, dtype=float).reshape(self.n_symbols).copy()
+        self._port_var = None
+
+    def _refresh_exposure(self) -> float:
+        """O(N^2) once per bar / exposure change; every check after that is O(1)."""
+        if self._port_var is None:
+            self._cov_exposure = self.covariance() @ self._exposure
+            self._port_var = float(self._exposure @ self._cov_exposure)
+        return self._port_var
+
+    def portfolio_var_after(self, symbol: int, delta_exposure: float) -> float:
+        """One-bar portfolio variance if `delta_exposure` is added to `symbol`. O(1)."""
+        port_var = self._refresh_exposure()
+        cov = self.covariance()
+        return (
+            port_var
+            + 2.0 * delta_exposure * self._cov_exposure[symbol]
+            + delta_exposure * delta_exposure * cov[symbol, symbol]
+        )
+
+    def check_trade(self, symbol: int, delta_exposure: float, max_var: float) -> bool:
+        """True if the parametric VaR after the trade stays within `max_var`."""
+        sigma = math.sqrt(max(self.portfolio_var_after(symbol, delta_exposure), 0.0))
+        mean = self.mean()
+        mu = float(mean[symbol]) * delta_exposure + float(mean @ self._exposure)
+        return -(mu - self._z * sigma) <= max_var
+
+    def max_exposure_for_var(self, symbol: int, max_var: float) -> float:
+        """
+        Largest additional exposure (>= 0) in `symbol` that keeps the
+        Gaussian VaR within `max_var` (mean ignored, so slightly conservative).
+        """
+        cov = self.covariance()
+        c = cov[symbol, symbol]
+        limit_var = (max_var / self._z) ** 2 if self._z > 0 else float("inf")
+        if c <= 0:
+            return float("inf")
+        # Solve c*d^2 + 2*b*d + (a - limit) <= 0 for the positive root
+        a = self._refresh_exposure()
+        b = self._cov_exposure[symbol]
+        disc = b * b - c * (a - limit_var)
+        if disc < 0:
+            return 0.0
+        return max(0.0, (-b + math.sqrt(disc)) / c)
+
+    def target_exposure(self, symbol: int, capital: float, target_vol: float) -> float:
+        """
+        Volatility-targeted exposure: capital * target_vol / realized_vol
+        (both annualized). Returns 0 until the window has two returns.
+        """
+        if not self.ready:
+            return 0.0
+        vol = float(self.volatility()[symbol])
+        if vol <= 0:
+            return float("inf")
+        return capital * target_vol / vol
+
+    def summary(self, exposure: Optional[Sequence[float]] = None) -> Dict:
+        """Snapshot of the current risk numbers for logging / UI."""
+        hist = self.historical_var(exposure)
+        param = self.parametric_var(exposure)
+        return {
+            "volatility": self.volatility().tolist(),
+            "historical_var": hist["var"],
+            "historical_cvar": hist["cvar"],
+            "parametric_var": param["var"],
+            "parametric_cvar": param["cvar"],
+            "window": self.count,
+        }
@@ -0,0 +1,169 @@
+"""
+Columnar trade log.
+
+Fills are stored in growable typed NumPy columns instead of one Python
+object per trade. Appends are O(1) amortized (capacity doubles when full)
+and aggregate queries run as vectorized reductions over the columns.
+A fill costs 41 bytes here versus ~150+ bytes for a Trade object plus its
+list slot, see memory_report().
+"""
+from typing import Dict, Iterator, List, Optional, Union
+import tracemalloc
+import numpy as np
+
+from src.core.order_book import Trade
+
+
+COLUMNS = (
+    ("buy_order_id", np.int64),
+    ("sell_order_id", np.int64),
+    ("price", np.float64),
+    ("quantity", np.float64),
+    ("timestamp", np.int64),
+    ("side", np.int8),  # +1 our buy, -1 our sell, 0 unknown
+)
+
+
+class TradeLog:
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.n: int = 0
+        self._cols: Dict[str, np.ndarray] = {name: np.zeros(capacity, dtype=dt) for name, dt in COLUMNS}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _grow(self, needed: int):
+        while self.capacity < needed:
+            self.capacity *= 2
+        for name, col in self._cols.items():
+            new = np.zeros(self.capacity, dtype=col.dtype)
+            new[: self.n] = col[: self.n]
+            self._cols[name] = new
+
+    def append(self, trade: Trade, side: int = 0):
+        """Append one fill. O(1) amortized."""
+        if self.n == self.capacity:
+            self._grow(self.n + 1)
+        i = self.n
+        cols = self._cols
+        cols["buy_order_id"][i] = trade.buy_order_id
+        cols["sell_order_id"][i] = trade.sell_order_id
+        cols["price"][i] = trade.price
+        cols["quantity"][i] = trade.quantity
+        cols["timestamp"][i] = trade.timestamp
+        cols["side"][i] = side
+        self.n += 1
+
+    def extend_columns(self, **columns: np.ndarray):
+        """Bulk append already-columnar fills (missing columns default to 0)."""
+        k = len(next(iter(columns.values())))
+        if self.n + k > self.capacity:
+            self._grow(self.n + k)
+        for name, col in self._cols.items():
+            if name in columns:
+                col[self.n:self.n + k] = columns[name]
+        self.n += k
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one column over the stored fills."""
+        return self._cols[name][: self.n]
+
+    # ------------------------------------------------------------------
+    # List-like access (materializes Trade objects on demand)
+    # ------------------------------------------------------------------
+    def _trade(self, i: int) -> Trade:
+        cols = self._cols
+        return Trade(
+            buy_order_id=int(cols["buy_order_id"][i]),
+            sell_order_id=int(cols["sell_order_id"][i]),
+            price=float(cols["price"][i]),
+            quantity=float(cols["quantity"][i]),
+            timestamp=int(cols["timestamp"][i]),
+        )
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Trade, List[Trade]]:
+        if isinstance(key, slice):
+            return [self._trade(i) for i in range(*key.indices(self.n))]
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError("trade index out of range")
+        return self._trade(key)
+
+    def __iter__(self) -> Iterator[Trade]:
+        for i in range(self.n):
+            yield self._trade(i)
+
+    def to_dicts(self, start: int = 0) -> List[Dict]:
+        """Fills from `start` on as plain dicts (e.g. for JSON)."""
+        names = [name for name, _ in COLUMNS]
+        cols = [self._cols[name][start:self.n].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*cols)]
+
+    # ------------------------------------------------------------------
+    # Vectorized queries
+    # ------------------------------------------------------------------
+    def _mask(self, side: Optional[int]) -> slice:
+        return slice(None) if side is None else self.column("side") == side
+
+    def total_volume(self, side: Optional[int] = None) -> float:
+        """Sum of quantity, optionally for one side (+1 / -1)."""
+        return float(self.column("quantity")[self._mask(side)].sum())
+
+    def total_notional(self, side: Optional[int] = None) -> float:
+        m = self._mask(side)
+        return float((self.column("price")[m] * self.column("quantity")[m]).sum())
+
+    def vwap(self, side: Optional[int] = None) -> Optional[float]:
+        volume = self.total_volume(side)
+        return self.total_notional(side) / volume if volume > 0 else None
+
+    def fills_per_step(self, n_steps: Optional[int] = None) -> np.ndarray:
+        """Number of fills per timestamp (step index)."""
+        ts = self.column("timestamp")
+        if len(ts) == 0:
+            return np.zeros(n_steps or 0, dtype=np.int64)
+        return np.bincount(ts, minlength=n_steps or 0)
+
+    def volume_per_step(self, n_steps: Optional[int] = None) -> np.ndarray:
+        ts = self.column("timestamp")
+        if len(ts) == 0:
+            return np.zeros(n_steps or 0)
+        return np.bincount(ts, weights=self.column("quantity"), minlength=n_steps or 0)
+
+    def net_position(self) -> float:
+        """Signed quantity of our own fills (buys - sells)."""
+        return float((self.column("side") * self.column("quantity")).sum())
+
+    # ------------------------------------------------------------------
+    # Memory accounting
+    # ------------------------------------------------------------------
+    def nbytes(self) -> int:
+        """Bytes held by the columns (allocated capacity)."""
+        return sum(col.nbytes for col in self._cols.values())
+
+    @staticmethod
+    def object_bytes_per_trade(sample: int = 10_000) -> float:
+        """Measured heap cost of one Trade object plus its list slot."""
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        trades = [Trade(i, -1, 100.0 + i * 1e-3, 1.0 + i, i) for i in range(sample)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del trades
+        return (after - before) / sample
+
+    def memory_report(self) -> Dict:
+        """Columnar footprint versus the same fills kept as a list of Trade objects."""
+        per_row = sum(np.dtype(dt).itemsize for _, dt in COLUMNS)
+        per_object = self.object_bytes_per_trade()
+        return {
+            "trades": self.n,
+            "column_bytes": self.n * per_row,
+            "allocated_bytes": self.nbytes(),
+            "object_bytes": int(self.n * per_object),
+            "bytes_per_trade_columnar": per_row,
+            "bytes_per_trade_objects": per_object,
+            "savings_ratio": per_object / per_row,
+        }
@@ -0,0 +1,186 @@
+"""
+Stop-loss / take-profit trigger book.
+
+Holds exit levels for many open lots in two price-sorted books so that a new
+price or bar only touches the triggers it actually crossed:
+
+- fall book: fires when the price trades down to the level
+  (long stop-losses, short take-profits)
+- rise book: fires when the price trades up to the level
+  (short stop-losses, long take-profits)
+
+Each update is a bisect plus a slice of the crossed levels, i.e. O(log n + k).
+"""
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from sortedcontainers import SortedList
+
+
+@dataclass
+class Lot:
+    lot_id: int
+    side: str        # 'long' or 'short'
+    quantity: float
+    entry_price: float
+    stop_loss: Optional[float]
+    take_profit: Optional[float]
+    timestamp: int
+
+
+class TriggerBook:
+    """
+    Price-indexed stop-loss / take-profit levels for open lots.
+
+    The two triggers of a lot are one-cancels-other: when one fires, the
+    sibling is removed from the other book.
+    """
+
+    def __init__(self):
+        self.fall: SortedList = SortedList()  # (level, lot_id), fires on price <= level
+        self.rise: SortedList = SortedList()  # (level, lot_id), fires on price >= level
+        self.lots: "OrderedDict[int, Lot]" = OrderedDict()  # insertion order = FIFO
+        self.next_lot_id: int = 1
+
+    def __len__(self) -> int:
+        return len(self.lots)
+
+    def _levels(self, lot: Lot) -> List[tuple]:
+        """(book, level, kind) entries for a lot"""
+        entries = []
+        if lot.side == "long":
+            if lot.stop_loss is not None:
+                entries.append((self.fall, lot.stop_loss, "stop_loss"))
+            if lot.take_profit is not None:
+                entries.append((self.rise, lot.take_profit, "take_profit"))
+        else:
+            if lot.stop_loss is not None:
+                entries.append((self.rise, lot.stop_loss, "stop_loss"))
+            if lot.take_profit is not None:
+                entries.append((self.fall, lot.take_profit, "take_profit"))
+        return entries
+
+    def add_lot(
+        self,
+        side: str,
+        quantity: float,
+        entry_price: float,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        timestamp: int = 0,
+    ) -> Optional[int]:
+        """
+        Register an open lot with its exit levels. O(log n).
+        Returns the lot id, or None if the lot has no trigger to watch.
+        """
+        if side not in ("long", "short"):
+            raise ValueError("side must be 'long' or 'short'")
+        if quantity <= 0 or (stop_loss is None and take_profit is None):
+            return None
+
+        lot = Lot(
+            lot_id=self.next_lot_id,
+            side=side,
+            quantity=quantity,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            timestamp=timestamp,
+        )
+        self.next_lot_id += 1
+        self.lots[lot.lot_id] = lot
+        for book, level, _ in self._levels(lot):
+            book.add((level, lot.lot_id))
+        return lot.lot_id
+
+    def cancel(self, lot_id: int) -> Optional[Lot]:
+        """Remove a lot and both of its triggers. O(log n)."""
+        lot = self.lots.pop(lot_id, None)
+        if lot is None:
+            return None
+        for book, level, _ in self._levels(lot):
+            book.discard((level, lot_id))
+        return lot
+
+    def release(self, side: str, quantity: float) -> float:
+        """
+        Reduce open lots of one side FIFO, e.g. after a discretionary exit.
+        Fully consumed lots lose their triggers. Returns the quantity released.
+        """
+        released = 0.0
+        for lot_id in list(self.lots.keys()):
+            if quantity - released <= 0:
+                break
+            lot = self.lots[lot_id]
+            if lot.side != side:
+                continue
+            take = min(lot.quantity, quantity - released)
+            lot.quantity -= take
+            released += take
+            if lot.quantity <= 0:
+                self.cancel(lot_id)
+        return released
+
+    def on_price(self, price: float, timestamp: int = 0) -> List[Dict]:
+        """Fire triggers crossed by a single trade price."""
+        return self.on_bar(price, price, price, timestamp)
+
+    def on_bar(self, open_: float, high: float, low: float, timestamp: int = 0) -> List[Dict]:
+        """
+        Fire every trigger crossed by the bar's range and remove the lots.
+
+        Fill price is the trigger level, or the open if the bar gapped through
+        it. If both triggers of a lot are crossed inside one bar the
+        stop-loss wins (the intra-bar path is unknown, so assume the worst).
+
+        Returns a list of fired exits:
+        [{"lot_id", "side", "kind", "level", "price", "quantity", "entry_price",
+          "stop_loss", "take_profit", "order_side", "timestamp"}]
+        """
+        if not self.lots:
+            return []
+
+        hits: Dict[int, tuple] = {}
+
+        # Levels >= low were traded through on the way down
+        idx = self.fall.bisect_left((low,))
+        for level, lot_id in self.fall[idx:]:
+            hits[lot_id] = (level, min(level, open_))
+        del self.fall[idx:]
+
+        # Levels <= high were traded through on the way up
+        idx = self.rise.bisect_left((high, float("inf")))
+        for level, lot_id in self.rise[:idx]:
+            lot = self.lots[lot_id]
+            is_stop = lot.side == "short"
+            if lot_id in hits and not is_stop:
+                continue  # long lot already stopped out this bar
+            hits[lot_id] = (level, max(level, open_))
+        del self.rise[:idx]
+
+        fired: List[Dict] = []
+        for lot_id, (level, price) in hits.items():
+            lot = self.cancel(lot_id)
+            kind = "stop_loss" if level == lot.stop_loss else "take_profit"
+            fired.append({
+                "lot_id": lot_id,
+                "side": lot.side,
+                "kind": kind,
+                "level": level,
+                "price": float(price),
+                "quantity": lot.quantity,
+                "entry_price": lot.entry_price,
+                "stop_loss": lot.stop_loss,
+                "take_profit": lot.take_profit,
+                "order_side": "sell" if lot.side == "long" else "buy",
+                "timestamp": timestamp,
+            })
+        return fired
+
+    def get_levels(self) -> Dict:
+        """Open trigger levels for visualization"""
+        return {
+            "fall": [level for level, _ in self.fall],
+            "rise": [level for level, _ in self.rise],
+            "open_lots": len(self.lots),
+        }
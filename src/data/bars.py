@@ -0,0 +1,226 @@
+"""
+Tick-to-bar resampling and multi-timeframe aggregation.
+
+Batch resampling turns trade ticks (timestamp, price, size) or finer OHLCV
+bars into time, volume, dollar or tick bars. Every bar type is just a
+different bar id per row; rows are then reduced per contiguous segment with
+np.add.reduceat / np.maximum.reduceat / np.minimum.reduceat, so a million
+ticks resample in a few milliseconds.
+
+MultiTimeframeAggregator keeps several time bars (e.g. 1m / 5m / 1h) up to
+date from live ticks or bars: each timeframe holds its open partial bar and
+a bounded history of completed ones, and every update touches only the
+partial bars, so strategies read all timeframes without re-resampling.
+
+Timestamps are integers in any unit (seconds, ns, bar index); bar sizes
+for time bars are in the same unit.
+"""
+from typing import Dict, Optional
+import numpy as np
+
+
+BAR_FIELDS = ("timestamp", "open", "high", "low", "close", "volume", "dollar", "count")
+
+
+# ----------------------------------------------------------------------
+# Batch resampling
+# ----------------------------------------------------------------------
+def _reduce(bar_id: np.ndarray, timestamp, open_, high, low, close, volume, dollar, count) -> Dict[str, np.ndarray]:
+    """Reduce rows sharing a (non-decreasing) bar id into one bar each."""
+    n = len(bar_id)
+    if n == 0:
+        return {f: np.empty(0) for f in BAR_FIELDS}
+    starts = np.flatnonzero(np.concatenate([[True], bar_id[1:] != bar_id[:-1]]))
+    ends = np.concatenate([starts[1:], [n]]) - 1
+    volume_sum = np.add.reduceat(volume, starts)
+    dollar_sum = np.add.reduceat(dollar, starts)
+    bars = {
+        "timestamp": timestamp[starts],
+        "open": open_[starts],
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": close[ends],
+        "volume": volume_sum,
+        "dollar": dollar_sum,
+        "count": np.add.reduceat(count, starts),
+    }
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bars["vwap"] = np.where(volume_sum > 0, dollar_sum / volume_sum, bars["close"])
+    return bars
+
+
+def _threshold_ids(amount: np.ndarray, threshold: float) -> np.ndarray:
+    """Bar id per row; a bar closes on the row that brings it to `threshold`."""
+    before = np.cumsum(amount) - amount
+    return np.floor(before / threshold).astype(np.int64)
+
+
+def resample_ticks(
+    timestamp: np.ndarray,
+    price: np.ndarray,
+    size: np.ndarray,
+    kind: str = "time",
+    threshold: float = 60,
+    origin: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Trade ticks (sorted by time) -> bars.
+
+    kind: "time" (threshold = bar length), "tick" (threshold ticks per bar),
+        "volume" (threshold shares) or "dollar" (threshold notional).
+    origin: time bars are aligned to origin + k * threshold.
+
+    Returns {"timestamp", "open", "high", "low", "close", "volume", "dollar",
+             "count", "vwap"} arrays; timestamp is the bar start for time bars
+    and the first tick's time otherwise.
+    """
+    timestamp = np.asarray(timestamp)
+    price = np.asarray(price, dtype=float)
+    size = np.asarray(size, dtype=float)
+    dollar = price * size
+
+    if kind == "time":
+        bar_id = (timestamp - origin) // int(threshold)
+    elif kind == "tick":
+        bar_id = np.arange(len(price)) // int(threshold)
+    elif kind == "volume":
+        bar_id = _threshold_ids(size, threshold)
+    elif kind == "dollar":
+        bar_id = _threshold_ids(dollar, threshold)
+    else:
+        raise ValueError("kind must be 'time', 'tick', 'volume' or 'dollar'")
+
+    bars = _reduce(bar_id, timestamp, price, price, price, price, size, dollar, np.ones(len(price), dtype=np.int64))
+    if kind == "time" and len(price):
+        bars["timestamp"] = origin + np.unique(bar_id) * int(threshold)
+    return bars
+
+
+def resample_bars(bars: Dict[str, np.ndarray], threshold: int, origin: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Finer OHLCV bars -> coarser time bars (e.g. 1m -> 5m).
+    `bars` needs timestamp/open/high/low/close/volume; dollar and count are
+    estimated from close * volume and 1 per bar when missing.
+    """
+    timestamp = np.asarray(bars["timestamp"])
+    close = np.asarray(bars["close"], dtype=float)
+    volume = np.asarray(bars["volume"], dtype=float)
+    dollar = np.asarray(bars["dollar"], dtype=float) if "dollar" in bars else close * volume
+    count = np.asarray(bars["count"]) if "count" in bars else np.ones(len(close), dtype=np.int64)
+    bar_id = (timestamp - origin) // int(threshold)
+    out = _reduce(bar_id, timestamp, np.asarray(bars["open"], dtype=float), np.asarray(bars["high"], dtype=float),
+                  np.asarray(bars["low"], dtype=float), close, volume, dollar, count)
+    if len(close):
+        out["timestamp"] = origin + np.unique(bar_id) * int(threshold)
+    return out
+
+
+# ----------------------------------------------------------------------
+# Incremental multi-timeframe aggregation
+# ----------------------------------------------------------------------
+class _BarSeries:
+    """Completed bars of one timeframe in columnar arrays, plus the open partial bar."""
+
+    def __init__(self, seconds: int, history: int):
+        self.seconds = seconds
+        self.history = history
+        self.n = 0
+        self.total = 0  # bars completed so far, including ones dropped from history
+        self.cols = {f: np.zeros(2 * history) for f in BAR_FIELDS}
+        self.partial: Optional[Dict] = None
+
+    def _append(self, bar: Dict):
+        if self.n == len(self.cols["close"]):
+            # Keep the newest `history` bars; amortized O(1) per bar
+            for f, col in self.cols.items():
+                col[: self.history] = col[self.n - self.history:self.n]
+            self.n = self.history
+        for f in BAR_FIELDS:
+            self.cols[f][self.n] = bar[f]
+        self.n += 1
+        self.total += 1
+
+    def update(self, timestamp: int, open_: float, high: float, low: float, close: float,
+               volume: float, dollar: float, count: int) -> Optional[Dict]:
+        """Fold one tick / bar in; returns the bar it completed, if any."""
+        start = timestamp - timestamp % self.seconds
+        done = None
+        p = self.partial
+        if p is not None and start != p["timestamp"]:
+            done = p
+            self._append(p)
+            p = None
+        if p is None:
+            self.partial = {"timestamp": start, "open": open_, "high": high, "low": low, "close": close,
+                            "volume": volume, "dollar": dollar, "count": count}
+        else:
+            p["high"] = max(p["high"], high)
+            p["low"] = min(p["low"], low)
+            p["close"] = close
+            p["volume"] += volume
+            p["dollar"] += dollar
+            p["count"] += count
+        return done
+
+    def get(self, field: str, n: Optional[int] = None, include_partial: bool = False) -> np.ndarray:
+        col = self.cols[field][: self.n]
+        col = col if n is None else col[max(0, self.n - n):]
+        if include_partial and self.partial is not None:
+            col = np.append(col, self.partial[field])
+        return col
+
+
+class MultiTimeframeAggregator:
+    def __init__(self, timeframes: Optional[Dict[str, int]] = None, history: int = 10_000):
+        """
+        timeframes: {name: bar length in timestamp units}, default 1m / 5m / 1h in seconds.
+        history: completed bars kept per timeframe.
+        """
+        self.timeframes = timeframes or {"1m": 60, "5m": 300, "1h": 3600}
+        self.series = {name: _BarSeries(length, history) for name, length in self.timeframes.items()}
+
+    def update_tick(self, timestamp: int, price: float, size: float = 0.0) -> Dict[str, Dict]:
+        """Fold one trade tick into every timeframe. Returns {timeframe: completed bar}."""
+        done = {}
+        for name, s in self.series.items():
+            bar = s.update(timestamp, price, price, price, price, size, price * size, 1)
+            if bar is not None:
+                done[name] = bar
+        return done
+
+    def update_bar(self, timestamp: int, open_: float, high: float, low: float, close: float,
+                   volume: float = 0.0) -> Dict[str, Dict]:
+        """Fold one finer bar (e.g. a market_state from the loader) into every timeframe."""
+        done = {}
+        for name, s in self.series.items():
+            bar = s.update(timestamp, open_, high, low, close, volume, close * volume, 1)
+            if bar is not None:
+                done[name] = bar
+        return done
+
+    def update_ticks(self, timestamp: np.ndarray, price: np.ndarray, size: np.ndarray) -> Dict[str, int]:
+        """
+        Fold a batch of ticks in: each timeframe resamples the batch with
+        resample_ticks and folds in one row per bar. Returns bars completed per timeframe.
+        """
+        completed = {}
+        for name, s in self.series.items():
+            bars = resample_ticks(timestamp, price, size, kind="time", threshold=s.seconds)
+            before = s.total
+            for i in range(len(bars["close"])):
+                s.update(int(bars["timestamp"][i]), bars["open"][i], bars["high"][i], bars["low"][i],
+                         bars["close"][i], bars["volume"][i], bars["dollar"][i], int(bars["count"][i]))
+            completed[name] = s.total - before
+        return completed
+
+    def bars(self, timeframe: str, n: Optional[int] = None, include_partial: bool = False) -> Dict[str, np.ndarray]:
+        """Last n completed bars of `timeframe` (zero-copy views unless include_partial)."""
+        s = self.series[timeframe]
+        return {f: s.get(f, n, include_partial) for f in BAR_FIELDS}
+
+    def close(self, timeframe: str, n: Optional[int] = None, include_partial: bool = False) -> np.ndarray:
+        return self.series[timeframe].get("close", n, include_partial)
+
+    def current(self, timeframe: str) -> Optional[Dict]:
+        """The open (incomplete) bar of `timeframe`."""
+        return self.series[timeframe].partial
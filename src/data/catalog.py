@@ -0,0 +1,247 @@
+"""
+Lazy dataset catalog over a data/ directory tree.
+
+One small JSON index (`catalog.json` under the root) lists every CSV file
+with its symbol, first/last timestamp, row count, size/mtime and a sparse
+offset table: the timestamp and byte offset of every `stride`-th data row.
+Queries only read the index and then the byte ranges they need:
+
+- load(symbol, start, end) picks the symbol's partitions overlapping the
+  range from the index, binary-searches each offset table for the first and
+  last block and parses just those bytes
+- nothing else is opened, so a cold query against thousands of symbols
+  costs one index read plus the slices it returns
+
+Layout: files directly under a directory named like a symbol
+(`data/MSFT/2023.csv`, `data/MSFT/2024.csv`) are partitions of that symbol;
+any other file takes its symbol from the file name up to the first "_"
+(`data/raw/aapl_1y.csv` -> "AAPL"). Rows must be sorted by time; files that
+are not are flagged and read whole.
+"""
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from src.data.loader import DataLoader
+
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "data"
+INDEX_NAME = "catalog.json"
+INDEX_VERSION = 1
+SCAN_CHUNK_BYTES = 1 << 24  # bytes read at a time when indexing a file
+
+
+def _symbol_for(path: Path, root: Path) -> str:
+    parent = path.parent
+    if parent != root and parent.name.isupper():
+        return parent.name
+    return path.stem.split("_")[0].upper()
+
+
+def _scan_csv(path: Path, stride: int, chunk_bytes: int = SCAN_CHUNK_BYTES) -> Dict:
+    """
+    Timestamps and sparse byte offsets of one CSV, read in chunks of
+    `chunk_bytes` (cut at the last newline), so memory stays at one chunk
+    plus the sparse table whatever the file size.
+    """
+    rows = 0
+    start = end = header_end = data_offset = None
+    is_sorted = True
+    sparse_ts: List[int] = []
+    sparse_offsets: List[int] = []
+    base = 0       # file offset of `tail`
+    tail = b""     # bytes after the last complete line
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_bytes)
+            data = tail + block
+            cut = data.rfind(b"\n") + 1 if block else len(data)
+            if cut == 0:
+                if not block:
+                    break
+                tail = data  # no complete line yet
+                continue
+            lines, tail = data[:cut], data[cut:]
+            newlines = np.flatnonzero(np.frombuffer(lines, dtype=np.uint8) == ord("\n"))
+            line_starts = np.concatenate([[0], newlines + 1])
+            line_starts = line_starts[line_starts < len(lines)] + base
+            if header_end is None:
+                header_end = int(line_starts[1]) if len(line_starts) > 1 else base + len(lines)
+
+            # First field of every line, parsed as a date; junk / header lines -> NaT
+            first = pd.read_csv(io.BytesIO(lines), header=None, usecols=[0], dtype=str,
+                                skip_blank_lines=False).iloc[:, 0]
+            stamps = pd.to_datetime(first, errors="coerce", format="mixed")
+            valid = np.flatnonzero(stamps.notna().to_numpy()[: len(line_starts)])
+            if len(valid):
+                ts = stamps.iloc[valid].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+                offsets = line_starts[valid]
+                if start is None:
+                    start, data_offset = int(ts[0]), int(offsets[0])
+                is_sorted = is_sorted and (end is None or int(ts[0]) >= end) and bool(np.all(np.diff(ts) >= 0))
+                picks = np.flatnonzero((rows + np.arange(len(ts))) % stride == 0)
+                sparse_ts.extend(ts[picks].tolist())
+                sparse_offsets.extend(offsets[picks].astype(int).tolist())
+                rows += len(ts)
+                end = int(ts[-1])
+            base += cut
+            if not block:
+                break
+
+    if rows == 0:
+        return {"rows": 0}
+    return {
+        "rows": rows,
+        "start": start,
+        "end": end,
+        "sorted": is_sorted,
+        "header_bytes": header_end,
+        "data_offset": data_offset,
+        "sparse_ts": sparse_ts,
+        "sparse_offsets": sparse_offsets,
+    }
+
+
+def _to_ns(value) -> Optional[int]:
+    return None if value is None else pd.Timestamp(value).value
+
+
+class DatasetCatalog:
+    def __init__(self, root: Union[str, Path] = DEFAULT_ROOT, stride: int = 4096):
+        """
+        root: directory tree holding the CSV files.
+        stride: rows per sparse index entry (smaller = tighter slices, bigger index).
+        """
+        self.root = Path(root)
+        self.index_path = self.root / INDEX_NAME
+        self.stride = stride
+        self._index: Optional[Dict] = None
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    @property
+    def index(self) -> Dict:
+        """Parsed index, read (or built on first use) lazily."""
+        if self._index is None:
+            if self.index_path.exists():
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+                if self._index.get("version") != INDEX_VERSION or self._index.get("stride") != self.stride:
+                    self._index = None
+            if self._index is None:
+                self.refresh()
+        return self._index
+
+    def refresh(self) -> Dict:
+        """Re-scan only files that are new or whose size / mtime changed, then save."""
+        old = {}
+        if self._index is not None and self._index.get("stride") == self.stride:
+            old = {e["path"]: e for e in self._index["files"]}
+        if not old and self.index_path.exists():
+            with open(self.index_path) as f:
+                stored = json.load(f)
+            if stored.get("version") == INDEX_VERSION and stored.get("stride") == self.stride:
+                old = {e["path"]: e for e in stored["files"]}
+
+        files = []
+        for path in sorted(self.root.rglob("*.csv")):
+            rel = path.relative_to(self.root).as_posix()
+            stat = path.stat()
+            entry = old.get(rel)
+            if entry is None or entry["bytes"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = {
+                    "path": rel,
+                    "symbol": _symbol_for(path, self.root),
+                    "bytes": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    **_scan_csv(path, self.stride),
+                }
+            if entry["rows"]:
+                files.append(entry)
+
+        files.sort(key=lambda e: (e["symbol"], e["start"]))
+        symbols: Dict[str, List[int]] = {}
+        for i, e in enumerate(files):
+            symbols.setdefault(e["symbol"], []).append(i)
+        self._index = {"version": INDEX_VERSION, "stride": self.stride, "files": files, "symbols": symbols}
+
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
+        return self._index
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def symbols(self) -> List[str]:
+        return sorted(self.index["symbols"])
+
+    def info(self, symbol: str) -> Dict:
+        """Date range, row count and partitions of one symbol (index only)."""
+        parts = self._partitions(symbol)
+        return {
+            "symbol": symbol.upper(),
+            "start": pd.Timestamp(min(p["start"] for p in parts)),
+            "end": pd.Timestamp(max(p["end"] for p in parts)),
+            "rows": sum(p["rows"] for p in parts),
+            "files": [p["path"] for p in parts],
+        }
+
+    def path(self, symbol: str) -> str:
+        """Path of the symbol's first partition (for code that wants a file)."""
+        return str(self.root / self._partitions(symbol)[0]["path"])
+
+    def _partitions(self, symbol: str) -> List[Dict]:
+        idx = self.index["symbols"].get(symbol.upper())
+        if not idx:
+            raise KeyError(f"Unknown symbol {symbol!r} in catalog {self.root}")
+        return [self.index["files"][i] for i in idx]
+
+    def _read_slice(self, entry: Dict, start: Optional[int], end: Optional[int]) -> pd.DataFrame:
+        path = self.root / entry["path"]
+        lo, hi = entry["data_offset"], entry["bytes"]
+        if entry["sorted"]:
+            ts, offsets = entry["sparse_ts"], entry["sparse_offsets"]
+            if start is not None:
+                # Block before the first entry >= start: rows equal to start may precede it
+                lo = offsets[max(0, bisect_left(ts, start) - 1)]
+            if end is not None:
+                k = bisect_left(ts, end + 1)
+                hi = offsets[k] if k < len(offsets) else entry["bytes"]
+        with open(path, "rb") as f:
+            header = f.read(entry["header_bytes"])
+            f.seek(lo)
+            body = f.read(hi - lo)
+        df = pd.read_csv(io.BytesIO(header + body), float_precision="round_trip")
+        df = DataLoader.normalize(df).astype(float)
+        return df
+
+    def load(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """
+        OHLCV rows of `symbol` with start <= timestamp <= end (either bound
+        optional), shaped like DataLoader.load_csv() output.
+        """
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        frames = []
+        for entry in self._partitions(symbol):
+            if start_ns is not None and entry["end"] < start_ns:
+                continue
+            if end_ns is not None and entry["start"] > end_ns:
+                continue
+            frames.append(self._read_slice(entry, start_ns, end_ns))
+        if not frames:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        df = df.sort_index()
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df
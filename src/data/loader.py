@@ -21,8 +21,18 @@ class DataLoader:
         and OHLCV columns: Open, High, Low, Close, Volume, Adj Close.
         """
         # Read CSV normally
-        df = pd.read_csv(self.filepath)
+        df = pd.read_csv(self.filepath, float_precision="round_trip")
 
+        # Sort by time just in case
+        self.data = self.normalize(df).sort_index()
+        return self.data
+
+    @staticmethod
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Date-indexed OHLCV frame from raw CSV rows (no sorting, so it also
+        works block by block on a streamed file).
+        """
         # If yfinance saved with index, first column likely is 'Date'
         # or an unnamed index column.
         # Handle common patterns:
@@ -47,11 +57,7 @@ class DataLoader:
 
         # Keep only standard OHLCV if present
         keep_cols = [c for c in ["Open", "High", "Low", "Close", "Volume"] if c in df.columns]
-        df = df[keep_cols]
-
-        # Sort by time just in case
-        self.data = df.sort_index()
-        return self.data
+        return df[keep_cols]
 
     def get_current_state(self, index: int) -> Dict:
         """
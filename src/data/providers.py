@@ -0,0 +1,322 @@
+"""
+Pluggable market data providers with concurrent, cached fetching.
+
+A provider only knows how to fetch one symbol's daily OHLCV bars:
+
+- YFinanceProvider: yfinance.download, run on worker threads (it blocks)
+- FixtureProvider: offline stand-in for tests and demos; serves symbols
+  from a DatasetCatalog and synthesizes seeded bars for any other symbol,
+  with an optional artificial latency to behave like a remote API
+
+DataFetcher sits in front of a provider:
+
+- fetch_many() runs all requests concurrently on one event loop, with at
+  most `max_concurrency` in flight (the connection pool bound)
+- identical requests already in flight share one future instead of
+  hitting the provider twice
+- results are written through to a ColumnarCache (one .npy file per column
+  per symbol), merged with the ranges already cached, and requests fully
+  covered by one cached range never reach the provider
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import DatasetCatalog
+from src.data.synthetic import SyntheticMarket, to_frame
+
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _day(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value).normalize()
+
+
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+class MarketDataProvider(ABC):
+    """Fetch daily OHLCV bars for one symbol, Date-indexed like DataLoader.load_csv()."""
+
+    name = "base"
+
+    @abstractmethod
+    async def fetch(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """Bars in [start, end] (None = open ended)."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def __init__(self, interval: str = "1d", auto_adjust: bool = True):
+        self.interval = interval
+        self.auto_adjust = auto_adjust
+
+    def _download(self, symbol: str, start, end) -> pd.DataFrame:
+        import yfinance as yf
+
+        df = yf.download(
+            symbol,
+            start=start,
+            end=None if end is None else pd.Timestamp(end) + pd.Timedelta(days=1),  # yfinance end is exclusive
+            interval=self.interval,
+            auto_adjust=self.auto_adjust,
+            progress=False,
+            threads=False,
+        )
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        df.index.name = "Date"
+        return df[[c for c in FIELDS if c in df.columns]].astype(float)
+
+    async def fetch(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        return await asyncio.to_thread(self._download, symbol, start, end)
+
+
+class FixtureProvider(MarketDataProvider):
+    name = "fixture"
+
+    def __init__(self, catalog: Optional[DatasetCatalog] = None, latency: float = 0.0,
+                 seed: int = 0, days: int = 252):
+        """
+        catalog: local datasets served as-is (default: the repo's data/ tree).
+        latency: seconds each fetch waits, to stand in for network round trips.
+        seed / days: synthetic history for symbols the catalog does not have.
+        """
+        self.catalog = catalog if catalog is not None else DatasetCatalog()
+        self.latency = latency
+        self.seed = seed
+        self.days = days
+        self.calls = 0
+
+    def _synthetic(self, symbol: str, start, end) -> pd.DataFrame:
+        # Stable per-symbol seed, independent of PYTHONHASHSEED
+        market = SyntheticMarket(
+            seed=self.seed * 1_000_003 + zlib.crc32(symbol.encode()),
+            start_price=50.0 + zlib.crc32(symbol.encode()) % 200,
+            start_time="2024-01-01",
+            bar_seconds=86_400,
+            chunk_rows=self.days,
+        )
+        df = to_frame(next(market.ohlcv_chunks(self.days)))
+        df = df[df.index.dayofweek < 5]
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df
+
+    async def fetch(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if symbol.upper() in self.catalog.index["symbols"]:
+            return self.catalog.load(symbol, start, end)
+        return self._synthetic(symbol, start, end)
+
+
+# ----------------------------------------------------------------------
+# Columnar cache
+# ----------------------------------------------------------------------
+def _merge_ranges(ranges: List[List[Optional[int]]]) -> List[List[Optional[int]]]:
+    """Union of [start, end] day ranges (ns, None = open ended); touching ranges join."""
+    lo_key = lambda r: -np.inf if r[0] is None else r[0]
+    hi_key = lambda r: np.inf if r[1] is None else r[1]
+    day = pd.Timedelta(days=1).value
+    merged: List[List[Optional[int]]] = []
+    for r in sorted(ranges, key=lo_key):
+        if merged and lo_key(r) <= hi_key(merged[-1]) + day:
+            if hi_key(r) > hi_key(merged[-1]):
+                merged[-1][1] = r[1]
+        else:
+            merged.append(list(r))
+    return merged
+
+
+class ColumnarCache:
+    """
+    Per-symbol directory of .npy columns (ns timestamps + OHLCV) and a
+    meta.json listing the day ranges the rows cover.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / symbol.upper()
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def meta(self, symbol: str) -> Optional[Dict]:
+        path = self._dir(symbol) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        meta.setdefault("ranges", [[meta.get("start"), meta.get("end")]])
+        return meta
+
+    def covers(self, symbol: str, start, end) -> bool:
+        """True if one cached range contains [start, end] (None = open ended)."""
+        meta = self.meta(symbol)
+        if meta is None:
+            return False
+        for lo, hi in meta["ranges"]:
+            ok_start = lo is None or (start is not None and _day(start).value >= lo)
+            ok_end = hi is None or (end is not None and _day(end).value <= hi)
+            if ok_start and ok_end:
+                return True
+        return False
+
+    def get(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """Cached rows in [start, end], read through memory maps."""
+        d = self._dir(symbol)
+        ts = np.load(d / "timestamp.npy", mmap_mode="r")
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side="right"))
+        index = pd.DatetimeIndex(np.asarray(ts[lo:hi]).astype("datetime64[ns]"), name="Date")
+        return pd.DataFrame(
+            {f: np.load(d / f"{f}.npy", mmap_mode="r")[lo:hi].astype(float) for f in FIELDS},
+            index=index,
+        )
+
+    def put(self, symbol: str, df: pd.DataFrame, start=None, end=None, source: str = ""):
+        """
+        Merge rows for [start, end] into the symbol's cache: they replace any
+        cached rows in that range, rows outside it are kept. Written
+        atomically (temp dir, then rename).
+        """
+        with self._lock(symbol):
+            d = self._dir(symbol)
+            old_meta = self.meta(symbol)
+            ranges = [[None if start is None else _day(start).value, None if end is None else _day(end).value]]
+            df = df.reindex(columns=FIELDS, fill_value=0.0)
+            if old_meta is not None:
+                ranges += old_meta["ranges"]
+                cached = self.get(symbol)
+                inside = np.ones(len(cached), dtype=bool)
+                if start is not None:
+                    inside &= cached.index >= _day(start)
+                if end is not None:
+                    inside &= cached.index < _day(end) + pd.Timedelta(days=1)
+                df = pd.concat([cached[~inside], df])
+                df = df[~df.index.duplicated(keep="last")]
+
+            tmp = d.with_name(d.name + ".tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            df = df.sort_index()
+            np.save(tmp / "timestamp.npy", df.index.to_numpy(dtype="datetime64[ns]").astype(np.int64))
+            for f in FIELDS:
+                np.save(tmp / f"{f}.npy", df[f].to_numpy(dtype=float))
+            meta = {
+                "symbol": symbol.upper(),
+                "ranges": _merge_ranges(ranges),
+                "rows": len(df),
+                "source": source,
+                "fetched_at": time.time(),
+            }
+            with open(tmp / "meta.json", "w") as f:
+                json.dump(meta, f)
+            old = d.with_name(d.name + ".old")
+            if d.exists():
+                os.replace(d, old)
+            os.replace(tmp, d)
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+# Concurrent fetcher
+# ----------------------------------------------------------------------
+class DataFetcher:
+    def __init__(self, provider: MarketDataProvider, cache: Optional[ColumnarCache] = None,
+                 max_concurrency: int = 16):
+        self.provider = provider
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+        # Statistics for monitoring
+        self.provider_calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    def _pool(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _fetch_remote(self, symbol: str, start, end) -> pd.DataFrame:
+        async with self._pool():
+            self.provider_calls += 1
+            df = await self.provider.fetch(symbol, start, end)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, symbol, df, start, end, self.provider.name)
+        return df
+
+    async def fetch(self, symbol: str, start=None, end=None, refresh: bool = False) -> pd.DataFrame:
+        """One symbol: cache hit, join an identical in-flight request, or fetch."""
+        symbol = symbol.upper()
+        if not refresh and self.cache is not None and self.cache.covers(symbol, start, end):
+            self.cache_hits += 1
+            return await asyncio.to_thread(self.cache.get, symbol, start, end)
+
+        key = (symbol, None if start is None else str(_day(start)), None if end is None else str(_day(end)))
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(self._fetch_remote(symbol, start, end))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def fetch_many(self, symbols: List[str], start=None, end=None,
+                         refresh: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        All symbols concurrently. Returns {symbol: frame}; failed symbols are
+        reported and left out.
+        """
+        symbols = [s.upper() for s in symbols]
+        results = await asyncio.gather(
+            *(self.fetch(s, start, end, refresh) for s in symbols), return_exceptions=True
+        )
+        out = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"[warn] fetch {symbol} failed: {result}")
+                continue
+            out[symbol] = result
+        return out
+
+    def fetch_many_sync(self, symbols: List[str], start=None, end=None,
+                        refresh: bool = False) -> Dict[str, pd.DataFrame]:
+        """fetch_many from synchronous code (runs its own event loop)."""
+        self._semaphore = None
+        return asyncio.run(self.fetch_many(symbols, start, end, refresh))
+
+    def get_stats(self) -> Dict:
+        return {
+            "provider_calls": self.provider_calls,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,294 @@
+"""
+Persistent archive of backtest runs.
+
+Metadata lives in one SQLite database (`runs.sqlite` under the root):
+- runs: one row per run with its symbol, creation time, full config and
+  metrics as JSON, and every metric in METRIC_COLUMNS as its own column,
+  indexed on its own and per symbol, so "best N by metric" is an index walk
+- params: one (run_id, key, value) row per scalar config value, keyed by
+  (run_id, key) and indexed by (key, value), so config filters such as
+  long_window > 30 are index lookups too
+
+Arrays (equity curve, fills) go next to it, one file per run: an .npz of
+NPY columns by default, or Parquet files when fmt="parquet" (needs
+pyarrow).
+
+save() only snapshots the arrays and queues the run; a background thread
+computes metrics, writes the array files and inserts queued runs in one
+transaction per batch, so archiving does not slow the run down. flush()
+waits for the queue to drain.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+
+from src.core.metrics import compute_metrics
+
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "runs"
+DB_NAME = "runs.sqlite"
+METRIC_COLUMNS = (
+    "end_value", "pnl", "return_pct", "max_drawdown_pct",
+    "sharpe_ratio", "sortino_ratio", "volatility", "win_rate",
+)
+FILL_COLUMNS = ("price", "quantity", "timestamp", "side")
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    symbol TEXT,
+    name TEXT,
+    steps INTEGER,
+    fills INTEGER,
+    array_format TEXT,
+    config TEXT,
+    metrics TEXT,
+    {", ".join(f"{m} REAL" for m in METRIC_COLUMNS)}
+);
+CREATE TABLE IF NOT EXISTS params (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS params_key_value ON params (key, value);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+{"".join(f"CREATE INDEX IF NOT EXISTS runs_symbol_{m} ON runs (symbol, {m});" for m in METRIC_COLUMNS)}
+{"".join(f"CREATE INDEX IF NOT EXISTS runs_{m} ON runs ({m});" for m in METRIC_COLUMNS)}
+"""
+
+
+def _scalar_params(config: Dict) -> List[Tuple[str, object]]:
+    """Indexable (key, value) pairs of a config: numbers, strings and booleans."""
+    out = []
+    for key, value in config.items():
+        if isinstance(value, (bool, np.bool_)):
+            out.append((key, int(value)))
+        elif isinstance(value, (int, float, str, np.integer, np.floating)):
+            out.append((key, value.item() if isinstance(value, np.generic) else value))
+    return out
+
+
+class RunStore:
+    def __init__(self, root: Union[str, Path] = DEFAULT_ROOT, fmt: str = "npy", batch_size: int = 256):
+        """
+        root: directory holding runs.sqlite and the array files.
+        fmt: "npy" (one .npz per run) or "parquet".
+        batch_size: most queued runs committed in one transaction.
+        """
+        if fmt not in ("npy", "parquet"):
+            raise ValueError("fmt must be 'npy' or 'parquet'")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / DB_NAME
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        with sqlite3.connect(self.db_path) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+        # Statistics for monitoring
+        self.saved = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def save(self, config: Dict, results: Sequence[Dict], symbol: Optional[str] = None,
+             trades=None, name: str = "") -> str:
+        """
+        Queue one run for archiving and return its id right away.
+        results: backtest snapshots; trades: the engine's TradeLog (optional).
+        """
+        run_id = uuid.uuid4().hex
+        equity = np.fromiter((s["portfolio_value"] for s in results), dtype=float, count=len(results))
+        fills = {}
+        if trades is not None:
+            fills = {c: trades.column(c).copy() for c in FILL_COLUMNS}
+        self._queue.put({
+            "run_id": run_id,
+            "created": time.time(),
+            "symbol": None if symbol is None else symbol.upper(),
+            "name": name,
+            "config": dict(config),
+            "equity": equity,
+            "fills": fills,
+        })
+        self._ensure_writer()
+        return run_id
+
+    def save_backtest(self, coordinator, results: Sequence[Dict], symbol: Optional[str] = None,
+                      name: str = "", **extra) -> str:
+        """save() for a Coordinator run: its config plus `extra` (e.g. start_index)."""
+        config = {**coordinator.config, **extra}
+        return self.save(config, results, symbol=symbol, trades=coordinator.engine.trades, name=name)
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="run-store-writer", daemon=True)
+            self._writer.start()
+
+    def _array_path(self, run_id: str) -> Path:
+        # Two-character shards keep directories small at 100k+ runs
+        return self.root / "arrays" / run_id[:2] / run_id
+
+    def _write_arrays(self, item: Dict):
+        path = self._array_path(item["run_id"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.fmt == "npy":
+            np.savez(path.with_suffix(".npz"), equity=item["equity"],
+                     **{f"fill_{c}": v for c, v in item["fills"].items()})
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path.mkdir(exist_ok=True)
+        pq.write_table(pa.table({"equity": item["equity"]}), path / "equity.parquet")
+        if item["fills"]:
+            pq.write_table(pa.table(item["fills"]), path / "fills.parquet")
+
+    def _write_batch(self, db: sqlite3.Connection, items: List[Dict]):
+        rows, params = [], []
+        for item in items:
+            self._write_arrays(item)
+            # Metrics from the equity curve alone (compute_metrics only reads portfolio_value)
+            metrics = compute_metrics([{"portfolio_value": v} for v in item["equity"].tolist()])
+            rows.append((
+                item["run_id"], item["created"], item["symbol"], item["name"], len(item["equity"]),
+                len(item["fills"].get("price", ())), self.fmt,
+                json.dumps(item["config"], default=str), json.dumps(metrics, default=float),
+                *(float(metrics.get(m, 0.0)) for m in METRIC_COLUMNS),
+            ))
+            params.extend((item["run_id"], k, v) for k, v in _scalar_params(item["config"]))
+        with db:
+            db.executemany(
+                f"INSERT INTO runs VALUES ({', '.join('?' * (9 + len(METRIC_COLUMNS)))})", rows
+            )
+            db.executemany("INSERT INTO params VALUES (?, ?, ?)", params)
+
+    def _write_loop(self):
+        db = sqlite3.connect(self.db_path)
+        db.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(db, items)
+                self.saved += len(items)
+            except Exception as e:
+                self.failed += len(items)
+                print(f"[error] run store write failed for {len(items)} run(s): {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued run is on disk."""
+        self._queue.join()
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict:
+        out = dict(row)
+        out["config"] = json.loads(out["config"])
+        out["metrics"] = json.loads(out["metrics"])
+        for m in METRIC_COLUMNS:
+            out.pop(m, None)
+        return out
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        where: Sequence[Tuple[str, str, object]] = (),
+        order_by: str = "sharpe_ratio",
+        descending: bool = True,
+        limit: int = 20,
+    ) -> List[Dict]:
+        """
+        Run summaries (config + metrics, no arrays) matching every filter.
+        where: (key, op, value) filters; key is a metric column or a config
+            key, op one of OPERATORS. Runs whose config lacks the key (or
+            has it as None) never match a config filter. E.g. top 20 Sharpe for AAPL with
+            long_window > 30:
+                query("AAPL", [("long_window", ">", 30)], "sharpe_ratio", limit=20)
+        """
+        if order_by not in METRIC_COLUMNS + ("created",):
+            raise ValueError(f"order_by must be one of {METRIC_COLUMNS + ('created',)}")
+        clauses, args = [], []
+        if symbol is not None:
+            clauses.append("r.symbol = ?")
+            args.append(symbol.upper())
+        for key, op, value in where:
+            if op not in OPERATORS:
+                raise ValueError(f"op must be one of {OPERATORS}")
+            if key in METRIC_COLUMNS:
+                clauses.append(f"r.{key} {op} ?")
+                args.append(value)
+            else:
+                clauses.append(f"EXISTS (SELECT 1 FROM params p WHERE p.run_id = r.run_id AND p.key = ? AND p.value {op} ?)")
+                args.extend((key, value))
+        sql = "SELECT * FROM runs r"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY r.{order_by} {'DESC' if descending else 'ASC'} LIMIT ?"
+        args.append(int(limit))
+        return [self._summary(row) for row in self._db().execute(sql, args)]
+
+    def count(self, symbol: Optional[str] = None) -> int:
+        if symbol is None:
+            return self._db().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return self._db().execute("SELECT COUNT(*) FROM runs WHERE symbol = ?", (symbol.upper(),)).fetchone()[0]
+
+    def load(self, run_id: str) -> Dict:
+        """Summary plus arrays: {"equity": ndarray, "fills": {column: ndarray}}."""
+        row = self._db().execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown run {run_id!r}")
+        run = self._summary(row)
+        path = self._array_path(run_id)
+        if run["array_format"] == "npy":
+            with np.load(path.with_suffix(".npz")) as f:
+                run["equity"] = f["equity"]
+                run["fills"] = {c: f[f"fill_{c}"] for c in FILL_COLUMNS if f"fill_{c}" in f}
+        else:
+            import pyarrow.parquet as pq
+
+            run["equity"] = pq.read_table(path / "equity.parquet").column("equity").to_numpy()
+            fills = path / "fills.parquet"
+            run["fills"] = {}
+            if fills.exists():
+                table = pq.read_table(fills)
+                run["fills"] = {c: table.column(c).to_numpy() for c in table.column_names}
+        return run
+
+    def get_stats(self) -> Dict:
+        return {"saved": self.saved, "failed": self.failed, "pending": self.pending()}
@@ -0,0 +1,192 @@
+"""
+Chunked streaming loader for OHLCV files too large for memory.
+
+StreamingLoader parses the CSV in blocks of `chunk_rows` rows on a
+background thread and hands them over through a bounded queue, so parsing
+the next block overlaps with simulating the current one and at most
+`prefetch` parsed blocks are held at a time.
+
+StreamCursor exposes the stream to Coordinator with the same
+get_current_state(index) contract as DataLoader, for non-decreasing
+indices. It keeps a window of the current block plus `carry` rows of the
+previous one; column and SMA views index that window by global bar index,
+so agents written against full arrays (sma[idx], volume[i - h:i]) work
+unchanged. SMAs are computed per block over carry + block rows with the
+window-local rolling_mean, so with carry >= window - 1 they equal the
+full-file values exactly.
+
+A reader that lags behind whoever advances the cursor (e.g. a live
+consumer behind its replay feed) sets `pin` to the next index it will
+read; rows from pin - carry on are then kept when new blocks load.
+"""
+from typing import Dict, Iterator, List, Optional
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+from src.core.indicators import rolling_mean
+from src.data.loader import DataLoader
+
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+_DONE = object()
+
+
+class StreamingLoader:
+    def __init__(self, filepath: str, chunk_rows: int = 100_000, prefetch: int = 2):
+        """
+        filepath: CSV in the DataLoader format, already sorted by time.
+        chunk_rows: rows parsed per block.
+        prefetch: parsed blocks buffered ahead of the consumer.
+        """
+        self.filepath = filepath
+        self.chunk_rows = chunk_rows
+        self.prefetch = prefetch
+
+    def _produce(self, out: queue.Queue, stop: threading.Event):
+        try:
+            for raw in pd.read_csv(self.filepath, chunksize=self.chunk_rows, float_precision="round_trip"):
+                block = DataLoader.normalize(raw)
+                block = block.astype(float)
+                while not stop.is_set():
+                    try:
+                        out.put(block, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            out.put(_DONE)
+        except Exception as e:  # surfaced to the consumer
+            out.put(e)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        """Yield normalized OHLCV blocks, parsed ahead on a background thread."""
+        out: queue.Queue = queue.Queue(maxsize=max(1, self.prefetch))
+        stop = threading.Event()
+        worker = threading.Thread(target=self._produce, args=(out, stop), daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if len(item):
+                    yield item
+        finally:
+            stop.set()
+
+    def cursor(self, carry: int = 0) -> "StreamCursor":
+        return StreamCursor(iter(self), carry=carry)
+
+
+class ColumnView:
+    """Global-index view of one column of the cursor's current window."""
+
+    def __init__(self, cursor: "StreamCursor", name: str):
+        self.cursor = cursor
+        self.name = name
+
+    def __getitem__(self, key):
+        cur = self.cursor
+        col = cur.columns[self.name]
+        if isinstance(key, slice):
+            start, stop = key.start or 0, key.stop
+            if start < cur.base or (stop is not None and stop > cur.end):
+                raise IndexError(f"rows [{start}, {stop}) are outside the window [{cur.base}, {cur.end})")
+            return col[start - cur.base:None if stop is None else stop - cur.base]
+        if not cur.base <= key < cur.end:
+            raise IndexError(f"row {key} is outside the window [{cur.base}, {cur.end})")
+        return col[key - cur.base]
+
+
+class StreamCursor:
+    def __init__(self, blocks: Iterator[pd.DataFrame], carry: int = 0):
+        self.blocks = blocks
+        self.carry = carry
+        self.base: int = 0     # global index of the first row in the window
+        self.end: int = 0      # one past the last loaded row
+        self.exhausted: bool = False
+        self.columns: Dict[str, np.ndarray] = {f: np.empty(0) for f in FIELDS}
+        self.sma_windows: List[int] = []
+        self.pin: Optional[int] = None  # next index a lagging reader needs, see module docstring
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+    def column(self, name: str) -> ColumnView:
+        return ColumnView(self, name)
+
+    def sma(self, window: int) -> ColumnView:
+        """Rolling mean of Close, exact across block boundaries."""
+        if window not in self.sma_windows:
+            self.sma_windows.append(window)
+            self.carry = max(self.carry, window - 1)
+            close = self.columns["Close"]
+            self.columns[f"sma_{window}"] = rolling_mean(close, window, offset=self.base)
+        return self.column(f"sma_{window}")
+
+    # ------------------------------------------------------------------
+    # Advancing
+    # ------------------------------------------------------------------
+    def _advance(self) -> bool:
+        """Load the next block behind `carry` rows of the current one."""
+        block = next(self.blocks, None)
+        if block is None:
+            self.exhausted = True
+            return False
+        keep = min(self.carry, self.end - self.base)
+        if self.pin is not None:
+            keep = max(keep, min(self.end - self.base, self.end - (self.pin - self.carry)))
+        base = self.end - keep
+        n = len(block)
+        old = self.columns
+        new: Dict[str, np.ndarray] = {}
+        for f in FIELDS:
+            values = block[f].to_numpy(dtype=float) if f in block.columns else np.zeros(n)
+            new[f] = np.concatenate([old[f][len(old[f]) - keep:], values])
+        for w in self.sma_windows:
+            name = f"sma_{w}"
+            fresh = rolling_mean(new["Close"], w, offset=base)[keep:]
+            new[name] = np.concatenate([old[name][len(old[name]) - keep:], fresh])
+        self.columns = new
+        self.base = base
+        self.end += n
+        return True
+
+    def seek(self, index: int) -> bool:
+        """Make `index` available; False once the stream ends before it."""
+        if index < self.base:
+            raise IndexError(f"row {index} was already evicted (window starts at {self.base})")
+        while index >= self.end:
+            if self.exhausted or not self._advance():
+                return False
+        return True
+
+    def indices(self, start: int = 0, end: Optional[int] = None) -> Iterator[int]:
+        """Bar indices from `start` until `end` or the end of the stream."""
+        i = start
+        while (end is None or i < end) and self.seek(i):
+            yield i
+            i += 1
+
+    def get_current_state(self, index: int) -> Dict:
+        """Same dict as DataLoader.get_current_state, for non-decreasing indices."""
+        if not self.seek(index):
+            raise IndexError(f"Index {index} is past the end of the stream")
+        i = index - self.base
+        cols = self.columns
+        close = float(cols["Close"][i])
+        return {
+            "open": float(cols["Open"][i]),
+            "high": float(cols["High"][i]),
+            "low": float(cols["Low"][i]),
+            "close": close,
+            "volume": float(cols["Volume"][i]),
+            "price": close,
+            "index": index,
+        }
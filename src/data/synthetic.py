@@ -0,0 +1,224 @@
+"""
+Seeded synthetic market data for scale testing.
+
+Two generators, both driven by a hidden Markov regime (calm / volatile /
+trending by default) and both producing data in fixed-size chunks so that
+arbitrarily long datasets are generated in bounded memory:
+
+- ohlcv_chunks(): one-minute OHLCV bars. Log returns are Student-t (heavy
+  tails) scaled by the regime's volatility; volume scales with it.
+- order_flow_chunks(): limit order events with Poisson arrivals (exponential
+  inter-arrival times at a regime-dependent rate), Pareto-distributed sizes
+  and prices placed around a random-walk mid; a fraction is marketable.
+
+Output is deterministic for a given (seed, chunk_rows): chunk k draws from
+its own generator seeded from (seed, stream, k), and only the last
+price / regime / timestamp carry over between chunks.
+
+Writers stream chunks to a DataLoader-compatible CSV or to one .npy
+memory-mapped array per column (np.load(..., mmap_mode="r") reads them back
+without loading into RAM).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+import os
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class Regime:
+    drift: float          # mean log return per bar
+    volatility: float     # std of log return per bar
+    arrival_rate: float   # order events per second
+    volume: float         # mean bar volume
+
+
+DEFAULT_REGIMES = [
+    Regime(drift=0.0, volatility=0.0005, arrival_rate=50.0, volume=20_000.0),     # calm
+    Regime(drift=0.0, volatility=0.0020, arrival_rate=400.0, volume=90_000.0),    # volatile
+    Regime(drift=0.0002, volatility=0.0008, arrival_rate=120.0, volume=40_000.0),  # trending
+]
+
+BAR_COLUMNS = {
+    "timestamp": np.int64,  # ns since epoch
+    "Open": np.float64,
+    "High": np.float64,
+    "Low": np.float64,
+    "Close": np.float64,
+    "Volume": np.float64,
+    "regime": np.int8,
+}
+
+EVENT_COLUMNS = {
+    "timestamp": np.int64,  # ns since epoch
+    "side": np.int8,        # +1 buy / -1 sell
+    "price": np.float64,
+    "quantity": np.float64,
+    "regime": np.int8,
+}
+
+
+@dataclass
+class SyntheticMarket:
+    seed: int = 0
+    start_price: float = 100.0
+    start_time: str = "2000-01-03 00:00"
+    bar_seconds: int = 60
+    regimes: List[Regime] = field(default_factory=lambda: list(DEFAULT_REGIMES))
+    switch_prob: float = 0.002    # chance per bar / event of leaving the current regime
+    tail_df: float = 4.0          # Student-t degrees of freedom for returns
+    tick_size: float = 0.01
+    size_alpha: float = 1.5       # Pareto tail index of order sizes
+    min_size: float = 1.0
+    marketable_frac: float = 0.1  # share of events priced through the mid
+    chunk_rows: int = 1 << 20
+
+    # ------------------------------------------------------------------
+    # Shared pieces
+    # ------------------------------------------------------------------
+    def _rng(self, stream: int, chunk: int) -> np.random.Generator:
+        return np.random.default_rng(np.random.SeedSequence([self.seed, stream, chunk]))
+
+    def _regime_path(self, rng: np.random.Generator, n: int, current: int) -> np.ndarray:
+        """Markov regime per row: stay, or jump to a uniformly drawn regime."""
+        k = len(self.regimes)
+        switch = rng.random(n) < self.switch_prob
+        draws = rng.integers(0, k, size=n)
+        # Index of the most recent switch at or before each row (-1 = none yet)
+        last = np.maximum.accumulate(np.where(switch, np.arange(n), -1))
+        return np.where(last >= 0, draws[np.maximum(last, 0)], current).astype(np.int8)
+
+    def _param(self, name: str) -> np.ndarray:
+        return np.array([getattr(r, name) for r in self.regimes])
+
+    def _heavy_tail(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Unit-variance Student-t draws."""
+        df = self.tail_df
+        return rng.standard_t(df, size=n) * np.sqrt((df - 2) / df) if df > 2 else rng.standard_t(df, size=n)
+
+    # ------------------------------------------------------------------
+    # OHLCV bars
+    # ------------------------------------------------------------------
+    def ohlcv_chunks(self, n_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield {column: array} chunks (see BAR_COLUMNS) totalling n_rows bars."""
+        drift, vol, volume = self._param("drift"), self._param("volatility"), self._param("volume")
+        t0 = pd.Timestamp(self.start_time).value
+        step = self.bar_seconds * 1_000_000_000
+        close, regime, row = self.start_price, 0, 0
+
+        for chunk, start in enumerate(range(0, n_rows, self.chunk_rows)):
+            n = min(self.chunk_rows, n_rows - start)
+            rng = self._rng(0, chunk)
+            reg = self._regime_path(rng, n, regime)
+            sigma = vol[reg]
+
+            log_ret = drift[reg] + sigma * self._heavy_tail(rng, n)
+            closes = close * np.exp(np.cumsum(log_ret))
+            opens = np.concatenate([[close], closes[:-1]])
+            wick = np.abs(rng.standard_normal((2, n))) * sigma * 0.5
+            high = np.maximum(opens, closes) * np.exp(wick[0])
+            low = np.minimum(opens, closes) * np.exp(-wick[1])
+
+            yield {
+                "timestamp": t0 + (row + np.arange(n, dtype=np.int64)) * step,
+                "Open": opens,
+                "High": high,
+                "Low": low,
+                "Close": closes,
+                "Volume": np.round(volume[reg] * rng.lognormal(-0.125, 0.5, size=n)),
+                "regime": reg,
+            }
+            close, regime, row = float(closes[-1]), int(reg[-1]), row + n
+
+    # ------------------------------------------------------------------
+    # Order flow
+    # ------------------------------------------------------------------
+    def order_flow_chunks(self, n_events: int) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield {column: array} chunks (see EVENT_COLUMNS) totalling n_events orders."""
+        rate, vol = self._param("arrival_rate"), self._param("volatility")
+        # Per-bar volatility -> per-event mid move, scaled by the expected gap
+        per_second = vol / np.sqrt(self.bar_seconds)
+        t = pd.Timestamp(self.start_time).value
+        mid, regime = self.start_price, 0
+        tick = self.tick_size
+
+        for chunk, start in enumerate(range(0, n_events, self.chunk_rows)):
+            n = min(self.chunk_rows, n_events - start)
+            rng = self._rng(1, chunk)
+            reg = self._regime_path(rng, n, regime)
+
+            gaps = rng.exponential(1.0 / rate[reg])               # seconds
+            stamps = t + np.cumsum(np.round(gaps * 1e9).astype(np.int64))
+            mids = mid * np.exp(np.cumsum(per_second[reg] * np.sqrt(gaps) * self._heavy_tail(rng, n)))
+
+            side = np.where(rng.random(n) < 0.5, 1, -1).astype(np.int8)
+            # Passive orders rest 1+ ticks away from mid (geometric), marketable ones cross it
+            offset = rng.geometric(0.3, size=n).astype(float) * tick
+            marketable = rng.random(n) < self.marketable_frac
+            signed = np.where(marketable, offset, -offset) * side
+            price = np.round((mids + signed) / tick) * tick
+
+            size = np.floor(self.min_size * (1.0 + rng.pareto(self.size_alpha, size=n)))
+
+            yield {
+                "timestamp": stamps,
+                "side": side,
+                "price": np.maximum(price, tick),
+                "quantity": size,
+                "regime": reg,
+            }
+            t, mid, regime = int(stamps[-1]), float(mids[-1]), int(reg[-1])
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+    def write_csv(self, path: str, n_rows: int) -> str:
+        """Stream n_rows bars to a CSV that DataLoader.load_csv() reads."""
+        with open(path, "w", newline="") as f:
+            for i, chunk in enumerate(self.ohlcv_chunks(n_rows)):
+                frame = pd.DataFrame({
+                    "Date": pd.to_datetime(chunk["timestamp"]),
+                    **{c: chunk[c] for c in ("Open", "High", "Low", "Close", "Volume")},
+                })
+                frame.to_csv(f, header=(i == 0), index=False)
+        return path
+
+    def write_memmap(self, directory: str, n_rows: int, kind: str = "bars") -> Dict[str, np.memmap]:
+        """
+        Stream n_rows bars (kind="bars") or order events (kind="events") into
+        one preallocated .npy file per column under `directory`.
+        Returns the open memory maps.
+        """
+        columns = BAR_COLUMNS if kind == "bars" else EVENT_COLUMNS
+        chunks = self.ohlcv_chunks(n_rows) if kind == "bars" else self.order_flow_chunks(n_rows)
+        os.makedirs(directory, exist_ok=True)
+        maps = {
+            name: np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+",
+                                            dtype=dt, shape=(n_rows,))
+            for name, dt in columns.items()
+        }
+        pos = 0
+        for chunk in chunks:
+            n = len(chunk["timestamp"])
+            for name, mm in maps.items():
+                mm[pos:pos + n] = chunk[name]
+            pos += n
+        for mm in maps.values():
+            mm.flush()
+        return maps
+
+
+def load_memmap(directory: str) -> Dict[str, np.ndarray]:
+    """Open every column written by write_memmap read-only, without loading it."""
+    return {
+        name[:-4]: np.load(os.path.join(directory, name), mmap_mode="r")
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".npy")
+    }
+
+
+def to_frame(chunk: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """An OHLCV chunk as a DataFrame shaped like DataLoader.load_csv() output."""
+    index = pd.DatetimeIndex(pd.to_datetime(chunk["timestamp"]), name="Date")
+    return pd.DataFrame({c: chunk[c] for c in ("Open", "High", "Low", "Close", "Volume")}, index=index)
@@ -0,0 +1,24 @@
+"""Regression tests for DatasetCatalog range reads."""
+import pandas as pd
+
+from src.data.catalog import DatasetCatalog
+
+
+def _write_csv(path, stamps):
+    rows = [f"{ts},{i},{i + 1},{i - 1},{i},{100 + i}" for i, ts in enumerate(stamps)]
+    path.write_text("Date,Open,High,Low,Close,Volume\n" + "\n".join(rows) + "\n")
+
+
+def test_load_start_with_duplicate_timestamps_across_stride(tmp_path):
+    # 50 rows, stride 16: rows 10-39 share one timestamp, spanning entries 16 and 32
+    base = pd.Timestamp("2024-01-02 09:30:00")
+    stamps = [base + pd.Timedelta(seconds=s) for s in range(10)]
+    stamps += [base + pd.Timedelta(seconds=10)] * 30
+    stamps += [base + pd.Timedelta(seconds=11 + s) for s in range(10)]
+    _write_csv(tmp_path / "dup_1s.csv", [ts.strftime("%Y-%m-%d %H:%M:%S") for ts in stamps])
+
+    catalog = DatasetCatalog(tmp_path, stride=16)
+    at = base + pd.Timedelta(seconds=10)
+    assert len(catalog.load("DUP", at, at)) == 30
+    assert len(catalog.load("DUP", at)) == 40
+    assert len(catalog.load("DUP")) == 50
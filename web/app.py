@@ -10,8 +10,8 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from src.coordinator.coordinator import Coordinator
 from src.core.metrics import compute_metrics, count_trades
+from web.backtest_jobs import follow, get_runner
 
 # Page config
 st.set_page_config(
@@ -240,168 +240,176 @@ with tab2:
             """)
     
     # Main demo area
+    # Backtests run in the background and are cached by their full parameter set,
+    # so repeating a combination renders instantly
+    params = {
+        "symbol": "AAPL",
+        "starting_cash": float(starting_cash),
+        "start_index": int(start_index),
+        "end_index": int(end_index),
+    }
     if st.button("🚀 Run Backtest", type="primary", use_container_width=True):
-        with st.spinner("🔄 Running simulation..."):
-            try:
-                # Initialize coordinator
-                coord = Coordinator("data/raw/aapl_1y.csv", starting_cash=starting_cash)
-                
-                # Run backtest
-                results = coord.run_backtest(start_index=int(start_index), end_index=int(end_index))
-                
-                if not results:
-                    st.error("❌ No results returned. Check your index range.")
-                else:
-                    # Store results in session state for other pages
-                    st.session_state.backtest_results = results
-                    
-                    # Process results
-                    df = pd.DataFrame(results)
-                    df["action"] = df["proposal"].apply(lambda p: p.get("action"))
-                    df["approved"] = df["risk_decision"].apply(lambda r: r.get("approved"))
-                    df["max_size"] = df["risk_decision"].apply(lambda r: r.get("max_size"))
-                    
-                    st.session_state.backtest_df = df
-                    
-                    metrics = compute_metrics(results)
-                    trades = count_trades(results)
-                    
-                    st.session_state.metrics = metrics
-                    st.session_state.trades = trades
-                    
-                    # Metrics Dashboard
-                    st.markdown("### 📊 Performance Metrics")
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric(
-                            "💵 Final Value",
-                            f"${metrics['end_value']:,.2f}",
-                            f"{metrics['pnl']:+,.2f}"
-                        )
-                    
-                    with col2:
-                        st.metric(
-                            "📈 Total Return",
-                            f"{metrics['return_pct']:.2f}%",
-                            delta_color="normal"
-                        )
-                    
-                    with col3:
-                        st.metric(
-                            "📉 Max Drawdown",
-                            f"{metrics['max_drawdown_pct']:.2f}%",
-                            delta_color="inverse"
-                        )
-                    
-                    with col4:
-                        st.metric(
-                            "🔄 Total Trades",
-                            f"{trades['total_trades']}",
-                            f"Buy: {trades['buy_trades']} | Sell: {trades['sell_trades']}"
-                        )
-                    
-                    # Charts
-                    st.markdown("---")
-                    st.markdown("### 📈 Portfolio Performance")
-                    
-                    # Create subplot figure
-                    fig = make_subplots(
-                        rows=2, cols=2,
-                        subplot_titles=('Portfolio Value Over Time', 'Cash & Position', 
-                                      'Trade Distribution', 'Agent Activity'),
-                        specs=[[{"secondary_y": False}, {"secondary_y": False}],
-                               [{"type": "bar"}, {"type": "scatter"}]],
-                        vertical_spacing=0.12,
-                        horizontal_spacing=0.1
-                    )
-                    
-                    # Portfolio value
-                    fig.add_trace(
-                        go.Scatter(
-                            x=df['step'],
-                            y=df['portfolio_value'],
-                            mode='lines',
-                            name='Portfolio Value',
-                            line=dict(color='#667eea', width=2),
-                            fill='tozeroy',
-                            fillcolor='rgba(102, 126, 234, 0.1)'
-                        ),
-                        row=1, col=1
-                    )
-                    
-                    # Cash and position
-                    fig.add_trace(
-                        go.Scatter(
-                            x=df['step'],
-                            y=df['cash'],
-                            mode='lines',
-                            name='Cash',
-                            line=dict(color='#48bb78', width=2)
-                        ),
-                        row=1, col=2
-                    )
-                    
-                    fig.add_trace(
-                        go.Scatter(
-                            x=df['step'],
-                            y=df['position'],
-                            mode='lines',
-                            name='Position',
-                            line=dict(color='#ed8936', width=2)
-                        ),
-                        row=1, col=2
-                    )
-                    
-                    # Trade distribution
-                    action_counts = df['action'].value_counts()
-                    fig.add_trace(
-                        go.Bar(
-                            x=action_counts.index,
-                            y=action_counts.values,
-                            name='Actions',
-                            marker_color=['#48bb78', '#ed8936', '#718096']
-                        ),
-                        row=2, col=1
-                    )
-                    
-                    # Agent approval rate
-                    approval_rate = df.groupby('step')['approved'].mean().rolling(10).mean()
-                    fig.add_trace(
-                        go.Scatter(
-                            x=df['step'],
-                            y=approval_rate,
-                            mode='lines',
-                            name='Approval Rate',
-                            line=dict(color='#9f7aea', width=2)
-                        ),
-                        row=2, col=2
-                    )
-                    
-                    fig.update_layout(
-                        height=700,
-                        showlegend=True,
-                        template='plotly_white',
-                        hovermode='x unified'
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Success message with navigation
-                    st.success("✅ Backtest completed successfully!")
-                    st.info("💡 **Navigate to other pages** (left sidebar) to explore detailed results for agents, order book, and metrics!")
-                    
-                    # Detailed data
-                    with st.expander("📋 View Detailed Results"):
-                        st.dataframe(
-                            df[['step', 'price', 'action', 'approved', 'max_size', 
-                                'cash', 'position', 'portfolio_value']],
-                            use_container_width=True
-                        )
-            except Exception as e:
-                st.error(f"❌ Error running backtest: {str(e)}")
-                st.error("Make sure the data file exists at: data/raw/aapl_1y.csv")
+        st.session_state.demo_job = get_runner().submit(**params)
+    job = st.session_state.get("demo_job")
+
+    if job is not None:
+        follow(job)
+        if job.error is not None:
+            st.error(f"❌ Error running backtest: {job.error}")
+            st.error("Make sure an AAPL dataset exists under data/")
+        elif not job.results:
+            st.error("❌ No results returned. Check your index range.")
+        else:
+            results = job.results
+            st.caption(f"Backtest {job.params['start_index']}-{job.params['end_index']} with "
+                       f"${job.params['starting_cash']:,.0f} finished in {job.elapsed:.2f}s")
+            # Store results in session state for other pages
+            st.session_state.backtest_results = results
+
+            # Process results
+            df = pd.DataFrame(results)
+            df["action"] = df["proposal"].apply(lambda p: p.get("action"))
+            df["approved"] = df["risk_decision"].apply(lambda r: r.get("approved"))
+            df["max_size"] = df["risk_decision"].apply(lambda r: r.get("max_size"))
+
+            st.session_state.backtest_df = df
+
+            metrics = compute_metrics(results)
+            trades = count_trades(results)
+
+            st.session_state.metrics = metrics
+            st.session_state.trades = trades
+
+            # Metrics Dashboard
+            st.markdown("### 📊 Performance Metrics")
+
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                st.metric(
+                    "💵 Final Value",
+                    f"${metrics['end_value']:,.2f}",
+                    f"{metrics['pnl']:+,.2f}"
+                )
+
+            with col2:
+                st.metric(
+                    "📈 Total Return",
+                    f"{metrics['return_pct']:.2f}%",
+                    delta_color="normal"
+                )
+
+            with col3:
+                st.metric(
+                    "📉 Max Drawdown",
+                    f"{metrics['max_drawdown_pct']:.2f}%",
+                    delta_color="inverse"
+                )
+
+            with col4:
+                st.metric(
+                    "🔄 Total Trades",
+                    f"{trades['total_trades']}",
+                    f"Buy: {trades['buy_trades']} | Sell: {trades['sell_trades']}"
+                )
+
+            # Charts
+            st.markdown("---")
+            st.markdown("### 📈 Portfolio Performance")
+
+            # Create subplot figure
+            fig = make_subplots(
+                rows=2, cols=2,
+                subplot_titles=('Portfolio Value Over Time', 'Cash & Position', 
+                              'Trade Distribution', 'Agent Activity'),
+                specs=[[{"secondary_y": False}, {"secondary_y": False}],
+                       [{"type": "bar"}, {"type": "scatter"}]],
+                vertical_spacing=0.12,
+                horizontal_spacing=0.1
+            )
+
+            # Portfolio value
+            fig.add_trace(
+                go.Scatter(
+                    x=df['step'],
+                    y=df['portfolio_value'],
+                    mode='lines',
+                    name='Portfolio Value',
+                    line=dict(color='#667eea', width=2),
+                    fill='tozeroy',
+                    fillcolor='rgba(102, 126, 234, 0.1)'
+                ),
+                row=1, col=1
+            )
+
+            # Cash and position
+            fig.add_trace(
+                go.Scatter(
+                    x=df['step'],
+                    y=df['cash'],
+                    mode='lines',
+                    name='Cash',
+                    line=dict(color='#48bb78', width=2)
+                ),
+                row=1, col=2
+            )
+
+            fig.add_trace(
+                go.Scatter(
+                    x=df['step'],
+                    y=df['position'],
+                    mode='lines',
+                    name='Position',
+                    line=dict(color='#ed8936', width=2)
+                ),
+                row=1, col=2
+            )
+
+            # Trade distribution
+            action_counts = df['action'].value_counts()
+            fig.add_trace(
+                go.Bar(
+                    x=action_counts.index,
+                    y=action_counts.values,
+                    name='Actions',
+                    marker_color=['#48bb78', '#ed8936', '#718096']
+                ),
+                row=2, col=1
+            )
+
+            # Agent approval rate
+            approval_rate = df.groupby('step')['approved'].mean().rolling(10).mean()
+            fig.add_trace(
+                go.Scatter(
+                    x=df['step'],
+                    y=approval_rate,
+                    mode='lines',
+                    name='Approval Rate',
+                    line=dict(color='#9f7aea', width=2)
+                ),
+                row=2, col=2
+            )
+
+            fig.update_layout(
+                height=700,
+                showlegend=True,
+                template='plotly_white',
+                hovermode='x unified'
+            )
+
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Success message with navigation
+            st.success("✅ Backtest completed successfully!")
+            st.info("💡 **Navigate to other pages** (left sidebar) to explore detailed results for agents, order book, and metrics!")
+
+            # Detailed data
+            with st.expander("📋 View Detailed Results"):
+                st.dataframe(
+                    df[['step', 'price', 'action', 'approved', 'max_size', 
+                        'cash', 'position', 'portfolio_value']],
+                    use_container_width=True
+                )
     else:
         st.info("👆 Configure your backtest settings in the sidebar and click 'Run Backtest' to begin!")
         
@@ -0,0 +1,51 @@
+"""
+Shared background backtest runner for the Streamlit pages.
+
+One BacktestRunner (src/coordinator/jobs.py) per server process, shared by
+every page and session through st.cache_resource: results are cached by the
+full parameter set, and backtests run on worker threads while the page
+shows a progress bar and the equity curve so far.
+"""
+import time
+
+import pandas as pd
+import streamlit as st
+
+from src.coordinator.coordinator import Coordinator
+from src.coordinator.jobs import BacktestJob, BacktestRunner
+from src.data.catalog import DatasetCatalog
+
+
+@st.cache_resource
+def get_catalog() -> DatasetCatalog:
+    return DatasetCatalog()
+
+
+def _new_coordinator(params: dict) -> Coordinator:
+    catalog = get_catalog()
+    symbol = params["symbol"]
+    return Coordinator(catalog.path(symbol), starting_cash=params["starting_cash"], data=catalog.load(symbol))
+
+
+@st.cache_resource
+def get_runner() -> BacktestRunner:
+    return BacktestRunner(_new_coordinator, max_workers=2, cache_size=32, chunk_steps=25)
+
+
+def follow(job: BacktestJob, poll: float = 0.2):
+    """
+    Progress bar and partial equity curve until the job finishes. Widgets
+    stay live: any interaction reruns the script, and the job keeps running
+    in the background and is picked up again on the next run.
+    """
+    if job.done:
+        return
+    bar = st.progress(0.0, text="Starting backtest...")
+    chart = st.empty()
+    while not job.done:
+        bar.progress(job.progress, text=f"Running backtest: {job.done_steps}/{job.total_steps} steps")
+        if job.results:
+            chart.line_chart(pd.DataFrame(job.results[:]).set_index("step")["portfolio_value"])
+        time.sleep(poll)
+    bar.empty()
+    chart.empty()
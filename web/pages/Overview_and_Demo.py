@@ -7,13 +7,8 @@ if str(ROOT) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from src.coordinator.coordinator import Coordinator
 from src.core.metrics import compute_metrics, count_trades
-
-
-@st.cache_resource
-def get_coordinator(starting_cash: float) -> Coordinator:
-    return Coordinator("data/raw/aapl_1y.csv", starting_cash=starting_cash)
+from web.backtest_jobs import follow, get_runner
 
 
 st.title("Overview & Demo")
@@ -23,13 +18,24 @@ starting_cash = st.sidebar.number_input("Starting Cash", value=100_000.0, step=1
 start_index = st.sidebar.number_input("Start Index", value=30, min_value=0)
 end_index = st.sidebar.number_input("End Index (exclusive)", value=200, min_value=1)
 
+# Every run gets a fresh coordinator in the background; identical settings reuse the cached result
+params = {
+    "symbol": "AAPL",
+    "starting_cash": float(starting_cash),
+    "start_index": int(start_index),
+    "end_index": int(end_index),
+}
 if st.sidebar.button("Run Backtest"):
-    coord = get_coordinator(starting_cash)
+    st.session_state.overview_job = get_runner().submit(**params)
+job = st.session_state.get("overview_job")
 
-    with st.spinner("Running backtest..."):
-        results = coord.run_backtest(start_index=int(start_index), end_index=int(end_index))
+if job is not None:
+    follow(job)
+    results = job.results
 
-    if not results:
+    if job.error is not None:
+        st.error(f"Backtest failed: {job.error}")
+    elif not results:
         st.error("No results returned. Check index range.")
     else:
         df = pd.DataFrame(results)